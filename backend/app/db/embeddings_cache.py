@@ -0,0 +1,142 @@
+"""SQLite-backed persistent tier of the embeddings cache.
+
+Vectors are keyed by a content hash of ``(text, model)`` and stored as packed
+float32 bytes, so re-indexing an unchanged document never reaches Ollama –
+even across restarts.  All methods are synchronous; call them from async code
+via ``asyncio.to_thread``.
+"""
+
+import logging
+import sqlite3
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DB_DIR = Path(__file__).parent.parent.parent / "data"
+DB_PATH = DB_DIR / "embeddings_cache.db"
+
+# SQLite's default limit on host parameters per statement is 999
+_MAX_PARAMS = 900
+
+# Row cap; past it the oldest entries are evicted.  ~3 KB per 768-dim vector,
+# so the file stays around 60 MB.
+MAX_ROWS = 20_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,
+    vector BLOB NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_embeddings_created_at ON embeddings(created_at);
+"""
+
+
+def _pack(vector: Sequence[float]) -> bytes:
+    if isinstance(vector, array) and vector.typecode == "f":
+        return vector.tobytes()
+    return array("f", vector).tobytes()
+
+
+class EmbeddingsCacheDB:
+    """Content-addressed embedding store (key → float32 vector).
+
+    Holds at most *max_rows* entries; put_many() evicts the oldest-written
+    ones beyond that.  Re-storing a key refreshes its age.
+    """
+
+    def __init__(self, db_path: Path = DB_PATH, max_rows: int = MAX_ROWS) -> None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db_path = str(db_path)
+        self._max_rows = max_rows
+        self._init_schema()
+
+    def _get_conn(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._db_path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _init_schema(self) -> None:
+        try:
+            conn = self._get_conn()
+            conn.executescript(_SCHEMA)
+            conn.close()
+            logger.info("EmbeddingsCacheDB initialized at %s", self._db_path)
+        except Exception as exc:
+            logger.error("EmbeddingsCacheDB schema init failed: %s", exc)
+
+    def get_many(self, keys: List[str]) -> Dict[str, array]:
+        """Return the stored float32 vectors for whichever of *keys* are present."""
+        found: Dict[str, array] = {}
+        conn = self._get_conn()
+        try:
+            for i in range(0, len(keys), _MAX_PARAMS):
+                batch = keys[i : i + _MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector
+        finally:
+            conn.close()
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, Sequence[float]]]) -> None:
+        """Store ``(key, vector)`` pairs, replacing existing entries."""
+        now = datetime.now(timezone.utc).isoformat()
+        rows = [(key, _pack(vector), now) for key, vector in items]
+        if not rows:
+            return
+        conn = self._get_conn()
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, created_at) "
+                "VALUES (?, ?, ?)",
+                rows,
+            )
+            excess = (
+                conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                - self._max_rows
+            )
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    "SELECT key FROM embeddings ORDER BY created_at, rowid LIMIT ?)",
+                    (excess,),
+                )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def count(self) -> int:
+        conn = self._get_conn()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        finally:
+            conn.close()
+
+    def clear(self) -> None:
+        conn = self._get_conn()
+        try:
+            conn.execute("DELETE FROM embeddings")
+            conn.commit()
+        finally:
+            conn.close()
+
+
+_embeddings_cache_db: Optional[EmbeddingsCacheDB] = None
+
+
+def get_embeddings_cache_db() -> EmbeddingsCacheDB:
+    global _embeddings_cache_db
+    if _embeddings_cache_db is None:
+        _embeddings_cache_db = EmbeddingsCacheDB()
+    return _embeddings_cache_db
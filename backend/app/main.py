@@ -57,7 +57,9 @@ _supervisor = TaskSupervisor()
 async def lifespan(app: FastAPI):
     """Startup: connect WebSocket broadcast to task manager and orchestrator."""
     ws_manager = get_ws_manager()
-    get_agent_orchestrator().set_broadcast(ws_manager.broadcast)
+    get_agent_orchestrator().set_broadcast(
+        ws_manager.broadcast, lambda: ws_manager.connection_count
+    )
     get_task_manager().set_broadcast(ws_manager.broadcast)
 
     # Ensure data directories exist
@@ -206,6 +208,29 @@ async def lifespan(app: FastAPI):
     # Cancel all supervised tasks on shutdown
     await _supervisor.stop_all()
 
+    # Close shared HTTP connection pools and helper processes
+    from app.services.claude_mcp_service import get_claude_mcp_service
+    from app.services.embeddings_service import get_embeddings_service
+    from app.services.llm_service import get_llm_service
+    from app.services.macos_service import get_macos_service
+    from app.services.notification_service import get_notification_service
+
+    for _svc in (
+        get_embeddings_service(),
+        get_claude_mcp_service(),
+        get_llm_service(),
+        get_notification_service(),
+        get_macos_service(),
+    ):
+        try:
+            await _svc.aclose()
+        except Exception as exc:
+            logger.debug("Shutdown close failed: %s", exc)
+
+    from app.services.file_parser_service import shutdown_parser_pool
+
+    shutdown_parser_pool()
+
     logger.info("AI Home Hub shutting down")
 
 
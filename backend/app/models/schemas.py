@@ -44,6 +44,12 @@ class ChatResponse(BaseModel):
 class OpenClawActionRequest(BaseModel):
     action: str
     params: Dict[str, Any] = {}
+    # Batch only: index of an earlier action that must finish first
+    depends_on: Optional[int] = None
+
+
+class OpenClawBatchRequest(BaseModel):
+    actions: List[OpenClawActionRequest]
 
 
 class OpenClawActionResponse(BaseModel):
@@ -130,6 +136,10 @@ class VSCodeOpenFileRequest(BaseModel):
     line: Optional[int] = None
 
 
+class VSCodeOpenFilesRequest(BaseModel):
+    files: List[VSCodeOpenFileRequest]
+
+
 class VSCodeRunTaskRequest(BaseModel):
     project_key: str
     task_name: str
@@ -141,6 +151,10 @@ class GitOperationRequest(BaseModel):
     branch: Optional[str] = None
 
 
+class GitMultiStatusRequest(BaseModel):
+    repo_paths: List[str] = Field(..., min_length=1, max_length=200)
+
+
 class MacOSActionRequest(BaseModel):
     action: str  # safari_open | mail_send | volume_set | sleep_display | finder_open | quit_app
     params: Dict[str, Any] = {}
@@ -2,7 +2,7 @@
 
 from typing import Any, Dict, List
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 
 from app.models.schemas import (
     AgentSearchKBRequest,
@@ -43,10 +43,17 @@ async def spawn_agent(body: SpawnAgentRequest) -> Dict[str, Any]:
 
 
 @router.get("/agents", tags=["agents"])
-async def list_agents() -> Dict[str, Any]:
-    """List all active agents with their current status."""
+async def list_agents(request: Request, response: Response) -> Any:
+    """List all active agents with their current status.
+
+    Supports ``If-None-Match`` so pollers get 304 while nothing changed.
+    """
     orchestrator = get_agent_orchestrator()
+    etag = orchestrator.state_etag
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
     agents = orchestrator.list_agents()
+    response.headers["ETag"] = etag
     return {"agents": agents, "count": len(agents)}
 
 
@@ -68,7 +75,7 @@ async def get_agent_artifacts(agent_id: str) -> Dict[str, Any]:
     orchestrator = get_agent_orchestrator()
     if not orchestrator.get_agent(agent_id):
         raise HTTPException(status_code=404, detail=f"Agent {agent_id} not found")
-    artifacts = orchestrator.get_agent_artifacts_with_preview(agent_id)
+    artifacts = await orchestrator.get_agent_artifacts_with_preview(agent_id)
     return {"agent_id": agent_id, "artifacts": artifacts}
 
 
@@ -76,7 +83,7 @@ async def get_agent_artifacts(agent_id: str) -> Dict[str, Any]:
 async def get_artifact(artifact_id: str) -> Dict[str, Any]:
     """Retrieve a specific artifact by ID."""
     orchestrator = get_agent_orchestrator()
-    artifact = orchestrator.get_artifact(artifact_id)
+    artifact = await orchestrator.load_artifact(artifact_id)
     if not artifact:
         raise HTTPException(status_code=404, detail=f"Artifact {artifact_id} not found")
     return artifact
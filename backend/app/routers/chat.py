@@ -1,5 +1,6 @@
 """Chat router – LLM chat with session persistence, knowledge base context, and shared memory."""
 
+import asyncio
 import json
 import logging
 import shutil
@@ -59,7 +60,9 @@ async def chat_stream_ws(websocket: WebSocket) -> None:
         return
 
     # Session management
-    if not session_id or not session_svc.session_exists(session_id):
+    if not session_id or not await asyncio.to_thread(
+        session_svc.session_exists, session_id
+    ):
         session_id = session_svc.create_session()
 
     history = session_svc.get_history_for_llm(session_id, limit=20)
@@ -108,8 +111,10 @@ async def chat_stream_ws(websocket: WebSocket) -> None:
     }
 
     # Persist both turns
-    session_svc.save_message(session_id, "user", message)
-    session_svc.save_message(session_id, "assistant", reply_text, meta)
+    await asyncio.to_thread(session_svc.save_message, session_id, "user", message)
+    await asyncio.to_thread(
+        session_svc.save_message, session_id, "assistant", reply_text, meta
+    )
     meta["session_id"] = session_id
 
     await websocket.send_json({"type": "done", "meta": meta})
@@ -129,7 +134,9 @@ async def chat(request: ChatRequest) -> ChatResponse:
 
     # Session management
     session_id = request.session_id
-    if not session_id or not session_svc.session_exists(session_id):
+    if not session_id or not await asyncio.to_thread(
+        session_svc.session_exists, session_id
+    ):
         session_id = session_svc.create_session()
 
     # Load conversation history (with summarization if needed)
@@ -180,8 +187,12 @@ async def chat(request: ChatRequest) -> ChatResponse:
     )
 
     # Persist both turns (store original message, not the one with KB context)
-    session_svc.save_message(session_id, "user", request.message)
-    session_svc.save_message(session_id, "assistant", reply, meta)
+    await asyncio.to_thread(
+        session_svc.save_message, session_id, "user", request.message
+    )
+    await asyncio.to_thread(
+        session_svc.save_message, session_id, "assistant", reply, meta
+    )
 
     meta["session_id"] = session_id
     return ChatResponse(reply=reply, meta=meta, session_id=session_id)
@@ -252,7 +263,9 @@ async def chat_with_files(
         full_message = file_context_str + message
 
         # Session management
-        if not session_id or not session_svc.session_exists(session_id):
+        if not session_id or not await asyncio.to_thread(
+            session_svc.session_exists, session_id
+        ):
             session_id = session_svc.create_session()
 
         history = session_svc.get_history_for_llm(session_id, limit=20)
@@ -273,8 +286,12 @@ async def chat_with_files(
             user_display = (
                 " ".join(f"[📎 {n}]" for n in attachment_names) + " " + message
             )
-        session_svc.save_message(session_id, "user", user_display)
-        session_svc.save_message(session_id, "assistant", reply, meta)
+        await asyncio.to_thread(
+            session_svc.save_message, session_id, "user", user_display
+        )
+        await asyncio.to_thread(
+            session_svc.save_message, session_id, "assistant", reply, meta
+        )
 
         meta["session_id"] = session_id
         return {"reply": reply, "meta": meta, "session_id": session_id}
@@ -292,7 +309,7 @@ async def chat_with_files(
 async def list_sessions() -> Dict[str, Any]:
     """List all conversation sessions."""
     session_svc = get_session_service()
-    sessions = session_svc.list_sessions()
+    sessions = await session_svc.list_sessions()
     return {"sessions": sessions, "count": len(sessions)}
 
 
@@ -302,7 +319,7 @@ async def get_session(session_id: str) -> Dict[str, Any]:
     from fastapi import HTTPException
 
     session_svc = get_session_service()
-    if not session_svc.session_exists(session_id):
+    if not await asyncio.to_thread(session_svc.session_exists, session_id):
         raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
     messages = session_svc.load_history(session_id)
     return {"session_id": session_id, "messages": messages}
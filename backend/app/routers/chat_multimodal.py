@@ -152,7 +152,9 @@ async def multimodal_chat(request: MultimodalChatRequest) -> ChatResponse:
 
     session_svc = get_session_service()
     session_id = request.session_id
-    if not session_id or not session_svc.session_exists(session_id):
+    if not session_id or not await asyncio.to_thread(
+        session_svc.session_exists, session_id
+    ):
         session_id = session_svc.create_session()
 
     if request.images:
@@ -179,8 +181,12 @@ async def multimodal_chat(request: MultimodalChatRequest) -> ChatResponse:
         meta.update(context_meta)
 
     meta["images_count"] = len(request.images)
-    session_svc.save_message(session_id, "user", request.message)
-    session_svc.save_message(session_id, "assistant", reply, meta)
+    await asyncio.to_thread(
+        session_svc.save_message, session_id, "user", request.message
+    )
+    await asyncio.to_thread(
+        session_svc.save_message, session_id, "assistant", reply, meta
+    )
 
     meta["session_id"] = session_id
     return ChatResponse(reply=reply, meta=meta, session_id=session_id)
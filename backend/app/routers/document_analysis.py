@@ -1,5 +1,6 @@
 """Document Analysis router – create analysis jobs and list available files."""
 
+import asyncio
 import logging
 from datetime import datetime, timezone
 from pathlib import Path
@@ -78,15 +79,12 @@ async def get_available_files() -> Dict[str, Any]:
         from app.services.vector_store_service import get_vector_store_service
 
         vs = get_vector_store_service()
-        collection = vs.collection
-        if collection:
+        if vs.collection:
             # Get unique source files from the collection metadata
-            result = collection.get(include=["metadatas"])
+            indexed_files = await asyncio.to_thread(vs.get_indexed_files)
             seen_paths = set()
-            for meta in result.get("metadatas") or []:
-                if not meta:
-                    continue
-                source = meta.get("source") or meta.get("file_path", "")
+            for file_path, meta in indexed_files.items():
+                source = meta.get("source") or file_path
                 if source and source not in seen_paths:
                     seen_paths.add(source)
                     kb_documents.append(
@@ -5,6 +5,7 @@ from pathlib import Path as SysPath
 from typing import Any, Dict, List
 
 from fastapi import APIRouter, HTTPException, Path, Query
+from fastapi.responses import StreamingResponse
 
 from app.models.schemas import SearchRequest, WriteFileRequest
 from app.services.filesystem_service import get_filesystem_service
@@ -70,6 +71,21 @@ async def read_file(
         raise HTTPException(status_code=500, detail=str(exc))
 
 
+@router.get("/filesystem/read/stream", tags=["filesystem"])
+async def read_file_stream(
+    path: str = Query(..., description="Absolute file path")
+) -> StreamingResponse:
+    """Stream a text file in chunks (for large files). Same access rules as /read."""
+    svc = get_filesystem_service()
+    try:
+        chunks = svc.read_file_stream(path)
+    except PermissionError as exc:
+        raise HTTPException(status_code=403, detail=str(exc))
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    return StreamingResponse(chunks, media_type="text/plain; charset=utf-8")
+
+
 @router.get("/filesystem/list", tags=["filesystem"])
 async def list_directory(
     path: str = Query(..., description="Absolute directory path")
@@ -1,20 +1,24 @@
 """Integrations router – endpoints for all external service integrations."""
 
+import asyncio
 from typing import Any, Dict
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 
 from app.utils.auth import verify_api_key
 
 from app.models.schemas import (
     AntigravityAgentRequest,
+    GitMultiStatusRequest,
     GitOperationRequest,
     MacOSActionRequest,
     MCPCallRequest,
     NotificationRequest,
+    OpenClawBatchRequest,
     VSCodeOpenProjectRequest,
     VSCodeRunTaskRequest,
     VSCodeOpenFileRequest,
+    VSCodeOpenFilesRequest,
 )
 from app.services.antigravity_service import get_antigravity_service
 from app.services.claude_mcp_service import get_claude_mcp_service
@@ -67,6 +71,15 @@ async def vscode_open_file(body: VSCodeOpenFileRequest) -> Dict[str, Any]:
     return result
 
 
+@router.post("/integrations/vscode/open-files", tags=["integrations", "vscode"])
+async def vscode_open_files(body: VSCodeOpenFilesRequest) -> Dict[str, Any]:
+    """Open several files (each optionally at a line) with a single CLI call."""
+    svc = get_vscode_service()
+    return await svc.run_action(
+        "open_files", {"files": [f.model_dump() for f in body.files]}
+    )
+
+
 @router.post("/integrations/vscode/run-task", tags=["integrations", "vscode"])
 async def vscode_run_task(body: VSCodeRunTaskRequest) -> Dict[str, Any]:
     """Execute a VS Code task in a configured project."""
@@ -190,6 +203,13 @@ async def git_status(repo_path: str) -> Dict[str, Any]:
     return await svc.run_action("status", {"repo_path": repo_path})
 
 
+@router.post("/integrations/git/multi-status", tags=["integrations", "git"])
+async def git_multi_status(body: GitMultiStatusRequest) -> Dict[str, Any]:
+    """Get git status for many repositories at once, keyed by repo path."""
+    svc = get_git_service()
+    return await svc.multi_status(body.repo_paths)
+
+
 @router.post("/integrations/git/commit", tags=["integrations", "git"])
 async def git_commit(body: GitOperationRequest) -> Dict[str, Any]:
     """Stage all changes and commit."""
@@ -236,6 +256,27 @@ async def openclaw_action(action: str, params: Dict[str, Any] = None) -> Dict[st
     return await svc.run_action_async(action, params or {})
 
 
+@router.get("/integrations/openclaw/screenshot.bin", tags=["integrations", "openclaw"])
+async def openclaw_screenshot_bin(format: str = "jpg") -> Response:
+    """Capture a screenshot and return the raw image (no base64/JSON wrapping)."""
+    svc = get_openclaw_service()
+    try:
+        data, media_type = await svc.screenshot_bytes(format)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except (RuntimeError, FileNotFoundError, asyncio.TimeoutError) as exc:
+        raise HTTPException(status_code=500, detail=str(exc) or "Screenshot failed")
+    return Response(content=data, media_type=media_type)
+
+
+@router.post("/integrations/openclaw/batch", tags=["integrations", "openclaw"])
+async def openclaw_batch(body: OpenClawBatchRequest) -> Dict[str, Any]:
+    """Execute several OpenClaw actions; independent ones run concurrently."""
+    svc = get_openclaw_service()
+    results = await svc.run_actions_async([a.model_dump() for a in body.actions])
+    return {"results": results}
+
+
 # ── Notifications ────────────────────────────────────────────
 
 
@@ -2,8 +2,10 @@
 
 import asyncio
 import csv
+import heapq
 import io
 import logging
+import os
 import shutil
 import tempfile
 import uuid
@@ -239,14 +241,14 @@ async def _run_ingest_core(
             continue
 
         try:
-            parsed = parser.parse_file(file_path)
+            parsed = await parser.parse_file_async(file_path)
             if "error" in parsed and not parsed.get("text"):
                 errors.append(f"{file_path.name}: {parsed['error']}")
                 failed_count += 1
                 continue
 
             text = parsed.get("text", "")
-            if not text.strip():
+            if not text or text.isspace():
                 errors.append(f"{file_path.name}: No text extracted")
                 failed_count += 1
                 continue
@@ -254,7 +256,7 @@ async def _run_ingest_core(
             chunks = chunk_text(
                 text, chunk_size=DEFAULT_CHUNK_SIZE, overlap=DEFAULT_CHUNK_OVERLAP
             )
-            embeddings = await embeddings_svc.generate_embeddings_batch(chunks)
+            embeddings = await embeddings_svc.generate_embeddings_packed(chunks)
 
             valid_items = [
                 (chunk, emb, idx)
@@ -296,7 +298,7 @@ async def _run_ingest_core(
             if job is not None:
                 job["progress"] = {"current": file_idx + 1, "total": total_files}
 
-            await ws_manager.broadcast(
+            ws_manager.broadcast_coalesced(
                 {
                     "type": "ingest_progress",
                     "current": file_idx + 1,
@@ -419,13 +421,7 @@ def get_file_metadata(file_path: str) -> Optional[Dict[str, Any]]:
     the file has never been indexed.
     """
     try:
-        vector_store = get_vector_store_service()
-        results = vector_store.collection.get(
-            where={"file_path": file_path},
-            limit=1,
-        )
-        if results and results.get("metadatas"):
-            return results["metadatas"][0]
+        return get_vector_store_service().get_file_metadata(file_path)
     except Exception as exc:
         logger.warning("Could not retrieve metadata for %s: %s", file_path, exc)
     return None
@@ -554,24 +550,39 @@ async def list_kb_files(
                 "preview": "",
                 "size_bytes": 0,
             }
-            # Try to get file size from disk
-            try:
-                file_map[fp]["size_bytes"] = Path(fp).stat().st_size
-            except OSError:
-                pass
         file_map[fp]["chunk_count"] += 1
         # Capture first chunk as preview
         if not file_map[fp]["preview"] and idx < len(documents):
             file_map[fp]["preview"] = (documents[idx] or "")[:500]
 
-    # Sort by mtime descending (newest first)
-    all_files = sorted(
-        file_map.values(), key=lambda f: f.get("mtime") or 0, reverse=True
+    # Sort by mtime descending (newest first); only the requested page
+    # needs ordering, so partially select it when the window is plain
+    def by_mtime(f: Dict[str, Any]) -> Any:
+        return f.get("mtime") or 0
+
+    if offset >= 0 and limit >= 0:
+        newest = heapq.nlargest(offset + limit, file_map.values(), key=by_mtime)
+        paginated = newest[offset:]
+    else:
+        all_files = sorted(file_map.values(), key=by_mtime, reverse=True)
+        paginated = all_files[offset : offset + limit]
+
+    # File sizes from disk, only for the returned page; the stats run
+    # concurrently since the paths may sit on slow or network mounts
+    sizes = await asyncio.gather(
+        *(asyncio.to_thread(_file_size, f["file_path"]) for f in paginated)
     )
-    total = len(all_files)
-    paginated = all_files[offset : offset + limit]
+    for f, size in zip(paginated, sizes):
+        f["size_bytes"] = size
+
+    return {"files": paginated, "total": len(file_map)}
+
 
-    return {"files": paginated, "total": total}
+def _file_size(path: str) -> int:
+    try:
+        return os.stat(path).st_size
+    except (OSError, ValueError):
+        return 0
 
 
 # ── File deletion ────────────────────────────────────────────────
@@ -726,7 +737,7 @@ async def _job_upload_index(
     for idx, fpath in enumerate(saved_paths):
         file_path = Path(fpath)
         try:
-            parsed = get_file_parser_service().parse_file(file_path)
+            parsed = await get_file_parser_service().parse_file_async(file_path)
             # Fallback for code extensions not handled by file_parser_service
             if parsed.get("error") and not parsed.get("text"):
                 ext = file_path.suffix.lower()
@@ -769,8 +780,8 @@ async def _job_upload_index(
                     failed += 1
                     continue
 
-            text = parsed.get("text", "").strip()
-            if not text:
+            text = parsed.get("text", "")
+            if not text or text.isspace():
                 errors.append(f"{file_path.name}: No text extracted")
                 failed += 1
                 continue
@@ -778,7 +789,7 @@ async def _job_upload_index(
             chunks = chunk_text(
                 text, chunk_size=DEFAULT_CHUNK_SIZE, overlap=DEFAULT_CHUNK_OVERLAP
             )
-            embeddings = await embeddings_svc.generate_embeddings_batch(chunks)
+            embeddings = await embeddings_svc.generate_embeddings_packed(chunks)
 
             valid_items = [
                 (chunk, emb, i)
@@ -822,7 +833,7 @@ async def _job_upload_index(
             failed += 1
         finally:
             job["progress"] = {"current": idx + 1, "total": total}
-            await ws_manager.broadcast(
+            ws_manager.broadcast_coalesced(
                 {
                     "type": "kb_upload_progress",
                     "current": idx + 1,
@@ -992,11 +1003,17 @@ async def kb_overview() -> Dict[str, Any]:
             include=["metadatas"],
         )
         metadatas: List[Dict[str, Any]] = raw.get("metadatas") or []
+        # Every chunk of a file repeats its path – parse each path once
+        ext_cache: Dict[str, str] = {}
 
         for meta in metadatas:
             coll_name = str(meta.get("collection") or "default")
             file_path = meta.get("file_path", "")
-            ext = Path(file_path).suffix.lower() if file_path else "unknown"
+            ext = ext_cache.get(file_path)
+            if ext is None:
+                ext = ext_cache[file_path] = (
+                    Path(file_path).suffix.lower() if file_path else "unknown"
+                )
 
             if coll_name not in collections:
                 collections[coll_name] = {
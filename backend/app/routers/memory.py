@@ -1,5 +1,6 @@
 """Memory router – CRUD, search, and session summarization for shared long-term memory."""
 
+import asyncio
 import logging
 from typing import Any, Dict, List, Optional
 
@@ -100,7 +101,7 @@ async def summarize_session(request: SummarizeSessionRequest):
     from app.services.llm_service import get_llm_service
 
     session_svc = get_session_service()
-    if not session_svc.session_exists(request.session_id):
+    if not await asyncio.to_thread(session_svc.session_exists, request.session_id):
         raise HTTPException(
             status_code=404, detail=f"Session {request.session_id} not found"
         )
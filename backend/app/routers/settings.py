@@ -98,6 +98,10 @@ async def get_settings_schema() -> Dict[str, Any]:
                                 "enum": ["stdio", "http"],
                             },
                             "stdio_path": {"type": "string"},
+                            "stdio_args": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                            },
                         },
                     },
                     "antigravity": {
@@ -14,12 +14,15 @@ import httpx
 from fastapi import APIRouter
 
 from app.services.settings_service import get_settings_service
-from app.services.vector_store_service import get_vector_store_service, CHROMA_DIR
+from app.services.vector_store_service import (
+    CHROMA_DIR,
+    get_storage_usage,
+    get_vector_store_service,
+)
 from app.services.ws_manager import get_ws_manager
 from app.services.agent_orchestrator import (
     get_agent_orchestrator,
-    AGENT_STATUS_PENDING,
-    AGENT_STATUS_RUNNING,
+    AGENT_STATUS_ACTIVE,
 )
 from app.services.task_manager import get_task_manager, STATUS_PENDING, STATUS_RUNNING
 
@@ -71,23 +74,7 @@ async def _check_knowledge_base() -> Dict[str, Any]:
         vs = get_vector_store_service()
         stats = vs.get_stats()
 
-        # Calculate storage size and last_indexed_at from data files
-        storage_mb = 0.0
-        last_indexed_at = None
-        if CHROMA_DIR.exists():
-            latest_mtime = 0.0
-            total_size = 0
-            for f in CHROMA_DIR.rglob("*"):
-                if f.is_file():
-                    st = f.stat()
-                    total_size += st.st_size
-                    if f.suffix in (".bin", ".parquet") and st.st_mtime > latest_mtime:
-                        latest_mtime = st.st_mtime
-            storage_mb = round(total_size / (1024 * 1024), 1)
-            if latest_mtime > 0:
-                last_indexed_at = datetime.fromtimestamp(
-                    latest_mtime, tz=timezone.utc
-                ).isoformat()
+        storage_mb, last_indexed_at = await asyncio.to_thread(get_storage_usage)
 
         return {
             "status": "healthy",
@@ -241,11 +228,7 @@ async def _check_agents() -> Dict[str, Any]:
     try:
         orch = get_agent_orchestrator()
         agents = orch._agents
-        active = sum(
-            1
-            for a in agents.values()
-            if a.status in (AGENT_STATUS_PENDING, AGENT_STATUS_RUNNING)
-        )
+        active = sum(1 for a in agents.values() if a.status & AGENT_STATUS_ACTIVE)
         settings = get_settings_service().load()
         max_concurrent = settings.get("agents", {}).get("max_concurrent", 5)
 
@@ -27,6 +27,9 @@ async def websocket_endpoint(websocket: WebSocket) -> None:
 
     Clients may send:
     - type: "ping"          → server replies with {"type": "pong"}
+
+    Clients that request the ``msgpack`` subprotocol receive the same messages
+    as msgpack-encoded binary frames instead of JSON text.
     """
     ws_manager = get_ws_manager()
     await ws_manager.connect(websocket)
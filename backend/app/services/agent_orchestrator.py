@@ -1,6 +1,8 @@
 """Agent orchestrator – multi-agent spawning, monitoring, artifact generation, KB search, and sub-agents."""
 
 import asyncio
+import concurrent.futures
+import enum
 import json
 import logging
 import uuid
@@ -14,18 +16,42 @@ from fastapi import HTTPException
 from app.services.settings_service import get_settings_service
 from app.services.skills_service import get_skills_service
 from app.services.agent_skills_service import get_agent_skills_service
-from app.utils.constants import MAX_SUB_AGENT_DEPTH, MIN_KB_SEARCH_SCORE
+from app.utils.constants import (
+    MAX_SUB_AGENT_DEPTH,
+    MIN_KB_SEARCH_SCORE,
+    SUB_AGENT_SLOT_WAIT_S,
+)
 
 logger = logging.getLogger(__name__)
 
 ARTIFACTS_DIR = Path(__file__).parent.parent.parent / "data" / "artifacts"
 
+
+class AgentStatus(enum.IntFlag):
+    """Agent lifecycle states as bit flags, so groups test with a single AND."""
+
+    PENDING = 1
+    RUNNING = 2
+    COMPLETED = 4
+    FAILED = 8
+    INTERRUPTED = 16
+
+
 # Agent status values
-AGENT_STATUS_PENDING = "pending"
-AGENT_STATUS_RUNNING = "running"
-AGENT_STATUS_COMPLETED = "completed"
-AGENT_STATUS_FAILED = "failed"
-AGENT_STATUS_INTERRUPTED = "interrupted"
+AGENT_STATUS_PENDING = AgentStatus.PENDING
+AGENT_STATUS_RUNNING = AgentStatus.RUNNING
+AGENT_STATUS_COMPLETED = AgentStatus.COMPLETED
+AGENT_STATUS_FAILED = AgentStatus.FAILED
+AGENT_STATUS_INTERRUPTED = AgentStatus.INTERRUPTED
+
+# Status groups
+AGENT_STATUS_ACTIVE = AgentStatus.PENDING | AgentStatus.RUNNING
+AGENT_STATUS_FINISHED = (
+    AgentStatus.COMPLETED | AgentStatus.FAILED | AgentStatus.INTERRUPTED
+)
+
+# Lower-case names exposed to the frontend and memory log
+_STATUS_NAMES = {status: status.name.lower() for status in AgentStatus}
 
 # Valid agent types
 AGENT_TYPES = {"code", "research", "testing", "devops", "general"}
@@ -107,7 +133,10 @@ class AgentRecord:
         skill_ids: Optional[List[str]] = None,
         parent_agent_id: Optional[str] = None,
         depth: int = 0,
+        on_change: Optional[Callable[[], None]] = None,
     ) -> None:
+        self._cached_dict: Optional[Dict[str, Any]] = None
+        self._on_change = on_change
         self.agent_id = agent_id
         self.agent_type = agent_type
         self.task = task
@@ -125,7 +154,23 @@ class AgentRecord:
         self._asyncio_task: Optional[asyncio.Task] = None
         self.guardrails: Optional[AgentGuardrails] = None
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        if not name.startswith("_"):
+            self.mark_dirty()
+
+    def mark_dirty(self) -> None:
+        """Invalidate the cached dict; call after mutating a field in place."""
+        object.__setattr__(self, "_cached_dict", None)
+        if self._on_change is not None:
+            self._on_change()
+
     def to_dict(self) -> Dict[str, Any]:
+        if self._cached_dict is None:
+            object.__setattr__(self, "_cached_dict", self._build_dict())
+        return self._cached_dict
+
+    def _build_dict(self) -> Dict[str, Any]:
         return {
             "agent_id": self.agent_id,
             "agent_type": self.agent_type,
@@ -134,7 +179,7 @@ class AgentRecord:
             "skill_ids": self.skill_ids,
             "parent_agent_id": self.parent_agent_id,
             "depth": self.depth,
-            "status": self.status,
+            "status": _STATUS_NAMES[self.status],
             "progress": self.progress,
             "message": self.message,
             "artifacts": self.artifacts,
@@ -173,14 +218,37 @@ class AgentOrchestrator:
         self._agents: Dict[str, AgentRecord] = {}
         self._settings = get_settings_service()
         self._broadcast_fn: Optional[Callable] = None
+        self._clients_count: Optional[Callable[[], int]] = None
+        self._spawn_sem: Optional[asyncio.Semaphore] = None
+        self._spawn_sem_limit = 0
+        # Bumped on every agent mutation; exposed as ETag for polling clients
+        self._state_version = 0
+        self._etag_salt = uuid.uuid4().hex[:8]
+        # Bounded pool for artifact disk IO so concurrent agents never block
+        # the event loop nor spawn an unbounded number of threads.
+        self._io_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix="artifact-io"
+        )
         ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
 
-    def set_broadcast(self, fn: Callable) -> None:
-        """Register a coroutine for broadcasting WebSocket messages."""
+    def set_broadcast(
+        self, fn: Callable, clients_count: Optional[Callable[[], int]] = None
+    ) -> None:
+        """Register a coroutine for broadcasting WebSocket messages.
+
+        ``clients_count`` reports connected listeners so updates can be skipped
+        entirely while nobody is subscribed.
+        """
         self._broadcast_fn = fn
+        self._clients_count = clients_count
+
+    def _has_listeners(self) -> bool:
+        if self._broadcast_fn is None:
+            return False
+        return self._clients_count is None or self._clients_count() > 0
 
     async def _broadcast(self, agent: AgentRecord) -> None:
-        if self._broadcast_fn:
+        if self._has_listeners():
             try:
                 await self._broadcast_fn(
                     {"type": "agent_update", "agent": agent.to_dict()}
@@ -188,8 +256,37 @@ class AgentOrchestrator:
             except Exception as exc:
                 logger.debug("Agent broadcast failed: %s", exc)
 
+    async def _run_io(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run blocking artifact IO on the dedicated artifact-io pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_pool, fn, *args)
+
+    def _bump_state_version(self) -> None:
+        self._state_version += 1
+
+    @property
+    def state_etag(self) -> str:
+        """Opaque ETag that changes whenever any agent's state changes."""
+        return f'"{self._etag_salt}-{self._state_version}"'
+
     # ── Spawning ───────────────────────────────────────────────
 
+    def _active_count(self) -> int:
+        return sum(1 for a in self._agents.values() if a.status & AGENT_STATUS_ACTIVE)
+
+    def _spawn_slots(self, max_concurrent: int) -> asyncio.Semaphore:
+        """Semaphore bounding concurrently active agents.
+
+        Rebuilt when ``agents.max_concurrent`` changes; agents still running
+        release into the semaphore they acquired, so the new one starts with
+        only the slots that are actually free.
+        """
+        if self._spawn_sem is None or self._spawn_sem_limit != max_concurrent:
+            free = max(max_concurrent - self._active_count(), 0)
+            self._spawn_sem = asyncio.Semaphore(free)
+            self._spawn_sem_limit = max_concurrent
+        return self._spawn_sem
+
     async def spawn_agent(
         self,
         agent_type: str,
@@ -199,27 +296,17 @@ class AgentOrchestrator:
         skill_names: Optional[List[str]] = None,
         parent_agent_id: Optional[str] = None,
         depth: int = 0,
+        slot_wait_s: float = 0,
     ) -> str:
-        """Spawn a new agent. Returns agent_id."""
+        """Spawn a new agent. Returns agent_id.
+
+        ``slot_wait_s`` is how long to wait for a free concurrency slot; with
+        the default of 0 the spawn is rejected immediately when all are taken.
+        """
         cfg = self._settings.load().get("agents", {})
         max_concurrent = cfg.get("max_concurrent", 5)
 
         from app.services.metrics_service import agent_spawn_blocked_total
-
-        active_count = sum(
-            1
-            for a in self._agents.values()
-            if a.status in (AGENT_STATUS_PENDING, AGENT_STATUS_RUNNING)
-        )
-        if active_count >= max_concurrent:
-            agent_spawn_blocked_total.labels(reason="concurrent_limit").inc()
-            logger.debug(
-                "Agent spawn blocked: concurrent_limit (%d/%d)",
-                active_count,
-                max_concurrent,
-            )
-            raise AgentSpawnError("concurrent_limit")
-
         from app.services.resource_monitor import get_resource_monitor
 
         monitor = get_resource_monitor()
@@ -275,30 +362,58 @@ class AgentOrchestrator:
         # Load per-type guardrails from settings
         guardrail_cfg = self._settings.get_agent_config(agent_type)
 
-        agent_id = str(uuid.uuid4())[:8]
-        record = AgentRecord(
-            agent_id,
-            agent_type,
-            task,
-            workspace,
-            skill_ids=skill_ids,
-            parent_agent_id=parent_agent_id,
-            depth=depth,
-        )
-        record.guardrails = AgentGuardrails(
-            max_steps=guardrail_cfg.get("max_steps", 8),
-            step_timeout_s=guardrail_cfg.get("step_timeout_s", 30),
-            max_total_tokens=guardrail_cfg.get("max_total_tokens", 8000),
-        )
-        self._agents[agent_id] = record
-
-        # Track sub-agent in parent
-        if parent_agent_id and parent_agent_id in self._agents:
-            self._agents[parent_agent_id].sub_agent_ids.append(agent_id)
+        # Reserve a concurrency slot; released when the agent task finishes
+        slots = self._spawn_slots(max_concurrent)
+        try:
+            if slots.locked() and slot_wait_s <= 0:
+                raise TimeoutError
+            async with asyncio.timeout(slot_wait_s if slot_wait_s > 0 else None):
+                await slots.acquire()
+        except TimeoutError:
+            agent_spawn_blocked_total.labels(reason="concurrent_limit").inc()
+            logger.debug(
+                "Agent spawn blocked: concurrent_limit (%d/%d)",
+                self._active_count(),
+                max_concurrent,
+            )
+            raise AgentSpawnError("concurrent_limit")
 
-        # Start agent coroutine
-        timeout_min = cfg.get("timeout_minutes", 30)
-        record._asyncio_task = asyncio.create_task(self._run_agent(record, timeout_min))
+        # Until the done-callback below owns the slot, give it back on any error
+        try:
+            agent_id = uuid.uuid4().hex[:8]
+            record = AgentRecord(
+                agent_id,
+                agent_type,
+                task,
+                workspace,
+                skill_ids=skill_ids,
+                parent_agent_id=parent_agent_id,
+                depth=depth,
+                on_change=self._bump_state_version,
+            )
+            record.guardrails = AgentGuardrails(
+                max_steps=guardrail_cfg.get("max_steps", 8),
+                step_timeout_s=guardrail_cfg.get("step_timeout_s", 30),
+                max_total_tokens=guardrail_cfg.get("max_total_tokens", 8000),
+            )
+            self._agents[agent_id] = record
+
+            # Track sub-agent in parent
+            if parent_agent_id and parent_agent_id in self._agents:
+                parent = self._agents[parent_agent_id]
+                parent.sub_agent_ids.append(agent_id)
+                parent.mark_dirty()
+
+            # Start agent coroutine
+            timeout_min = cfg.get("timeout_minutes", 30)
+            record._asyncio_task = asyncio.create_task(
+                self._run_agent(record, timeout_min)
+            )
+        except BaseException:
+            slots.release()
+            raise
+        # A done-callback also fires when the task is cancelled before it starts
+        record._asyncio_task.add_done_callback(lambda _t: slots.release())
         logger.info(
             "Spawned agent %s (%s) depth=%d parent=%s",
             agent_id,
@@ -350,7 +465,7 @@ class AgentOrchestrator:
                     record.agent_type,
                     goal,
                     result_summary,
-                    record.status,
+                    _STATUS_NAMES[record.status],
                 )
             except Exception as mem_exc:
                 logger.debug("Memory store for agent run failed: %s", mem_exc)
@@ -377,6 +492,7 @@ class AgentOrchestrator:
         for i, (phase_name, phase_pct) in enumerate(phases):
             if record.guardrails:
                 ok, reason = record.guardrails.check_and_increment()
+                record.mark_dirty()
                 if not ok:
                     record.message = f"[GUARDRAIL] Stopped: {reason}"
                     logger.warning(
@@ -421,6 +537,7 @@ class AgentOrchestrator:
                             },
                         )
                         record.artifacts.append(artifact_id)
+                        record.mark_dirty()
             except asyncio.TimeoutError:
                 logger.warning(
                     "Agent %s step %r timed out after %ds (type=%s)",
@@ -534,17 +651,18 @@ class AgentOrchestrator:
         artifact_type: plan | task_breakdown | test_results | screenshot | report
         Returns artifact_id.
         """
-        artifact_id = str(uuid.uuid4())[:8]
+        artifact_id = uuid.uuid4().hex[:8]
         artifact = {
             "artifact_id": artifact_id,
             "agent_id": agent_id,
             "artifact_type": artifact_type,
             "content": content,
             "created_at": _now(),
+            # Stored so previews never have to re-serialise the content
+            "size": _artifact_size(content),
+            "preview": _artifact_preview(content, artifact_type),
         }
-        artifact_path = ARTIFACTS_DIR / f"{artifact_id}.json"
-        with open(artifact_path, "w", encoding="utf-8") as f:
-            json.dump(artifact, f, indent=2, ensure_ascii=False)
+        await self._run_io(self._write_artifact, artifact_id, artifact)
 
         logger.info(
             "Artifact %s (%s) created for agent %s",
@@ -562,9 +680,14 @@ class AgentOrchestrator:
         with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
 
+    async def load_artifact(self, artifact_id: str) -> Optional[Dict[str, Any]]:
+        """Load an artifact by ID without blocking the event loop."""
+        return await self._run_io(self.get_artifact, artifact_id)
+
     # ── Monitoring ─────────────────────────────────────────────
 
     def list_agents(self) -> List[Dict[str, Any]]:
+        # to_dict() is cached per record, so unchanged agents cost a lookup
         return [a.to_dict() for a in self._agents.values()]
 
     def get_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
@@ -601,19 +724,19 @@ class AgentOrchestrator:
         await self.interrupt_agent(agent_id)
         if agent_id in self._agents:
             del self._agents[agent_id]
+            self._bump_state_version()
             return True
         return False
 
     def cleanup_finished(self) -> int:
         """Remove completed/failed agents. Returns count removed."""
         done = [
-            aid
-            for aid, a in self._agents.items()
-            if a.status
-            in (AGENT_STATUS_COMPLETED, AGENT_STATUS_FAILED, AGENT_STATUS_INTERRUPTED)
+            aid for aid, a in self._agents.items() if a.status & AGENT_STATUS_FINISHED
         ]
         for aid in done:
             del self._agents[aid]
+        if done:
+            self._bump_state_version()
         return len(done)
 
     # ── Agent tools: Web Search ───────────────────────────────
@@ -800,10 +923,11 @@ class AgentOrchestrator:
             workspace=parent.workspace,
             parent_agent_id=parent_agent_id,
             depth=parent.depth + 1,
+            slot_wait_s=SUB_AGENT_SLOT_WAIT_S,
         )
 
         # Broadcast sub-agent creation
-        if self._broadcast_fn:
+        if self._has_listeners():
             try:
                 await self._broadcast_fn(
                     {
@@ -819,24 +943,33 @@ class AgentOrchestrator:
 
     # ── Artifact preview generation ───────────────────────────
 
-    def get_agent_artifacts_with_preview(self, agent_id: str) -> List[Dict[str, Any]]:
+    async def get_agent_artifacts_with_preview(
+        self, agent_id: str
+    ) -> List[Dict[str, Any]]:
         """Get artifacts with preview information for frontend display."""
         record = self._agents.get(agent_id)
         if not record:
             return []
 
+        # Artifact reads are independent blocking disk IO – fan them out.
+        loaded = await asyncio.gather(
+            *(self.load_artifact(artifact_id) for artifact_id in record.artifacts)
+        )
+
         artifacts = []
-        for artifact_id in record.artifacts:
-            art = self.get_artifact(artifact_id)
+        stale: List[tuple] = []
+        for artifact_id, art in zip(record.artifacts, loaded):
             if not art:
                 continue
+            if "size" not in art or "preview" not in art:
+                # Artifact written before size/preview were stored – backfill once
+                art["size"] = _artifact_size(art.get("content", {}))
+                art["preview"] = _artifact_preview(
+                    art.get("content", {}), art.get("artifact_type", "unknown")
+                )
+                stale.append((artifact_id, art))
 
-            content = art.get("content", {})
-            artifact_type = art.get("artifact_type", "unknown")
-
-            # Generate preview based on type
-            preview_info = self._generate_preview(content, artifact_type, artifact_id)
-
+            preview_info = self._generate_preview(art, artifact_id)
             artifacts.append(
                 {
                     **art,
@@ -844,58 +977,69 @@ class AgentOrchestrator:
                 }
             )
 
+        if stale:
+            await asyncio.gather(
+                *(self._run_io(self._write_artifact, aid, art) for aid, art in stale)
+            )
+
         return artifacts
 
+    def _write_artifact(self, artifact_id: str, artifact: Dict[str, Any]) -> None:
+        """Persist an artifact as JSON."""
+        path = ARTIFACTS_DIR / f"{artifact_id}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(artifact, f, indent=2, ensure_ascii=False)
+
     def _generate_preview(
         self,
-        content: Any,
-        artifact_type: str,
+        artifact: Dict[str, Any],
         artifact_id: str,
     ) -> Dict[str, Any]:
-        """Generate preview metadata for an artifact."""
-        if isinstance(content, dict):
-            text_content = content.get("content", "")
-        elif isinstance(content, str):
-            text_content = content
-        else:
-            text_content = str(content)
-
-        filename = f"{artifact_id}.json"
-        file_type = "json"
-        size = len(json.dumps(content, default=str).encode("utf-8")) if content else 0
-
-        # Type-specific previews
-        if artifact_type in ("plan", "report"):
-            file_type = "markdown"
-            preview = text_content[:500] if text_content else ""
-            return {
-                "filename": f"{artifact_id}.md",
-                "type": file_type,
-                "size": size,
-                "preview": preview,
-                "download_url": f"/api/agents/artifacts/{artifact_id}",
-            }
-        elif artifact_type == "screenshot":
-            return {
-                "filename": f"{artifact_id}.png",
-                "type": "image",
-                "size": size,
-                "preview": "",  # thumbnail would go here
-                "download_url": f"/api/agents/artifacts/{artifact_id}",
-            }
-        else:
-            preview = (
-                text_content[:500]
-                if text_content
-                else json.dumps(content, default=str)[:500]
-            )
-            return {
-                "filename": filename,
-                "type": file_type,
-                "size": size,
-                "preview": preview,
-                "download_url": f"/api/agents/artifacts/{artifact_id}",
-            }
+        """Project stored preview metadata of an artifact for the frontend."""
+        extension, file_type = _PREVIEW_FORMATS.get(
+            artifact.get("artifact_type", "unknown"), _DEFAULT_PREVIEW_FORMAT
+        )
+        return {
+            "filename": f"{artifact_id}.{extension}",
+            "type": file_type,
+            "size": artifact["size"],
+            # Screenshots store an empty preview; a thumbnail would go here
+            "preview": artifact["preview"],
+            "download_url": f"/api/agents/artifacts/{artifact_id}",
+        }
+
+
+# artifact_type → (file extension, preview type) for the frontend
+_PREVIEW_FORMATS: Dict[str, tuple] = {
+    "plan": ("md", "markdown"),
+    "report": ("md", "markdown"),
+    "screenshot": ("png", "image"),
+}
+_DEFAULT_PREVIEW_FORMAT = ("json", "json")
+
+
+def _artifact_size(content: Any) -> int:
+    """Size in bytes of the JSON-serialised artifact content."""
+    return len(json.dumps(content, default=str).encode("utf-8")) if content else 0
+
+
+def _artifact_preview(content: Any, artifact_type: str) -> str:
+    """First 500 characters of the artifact's textual content."""
+    if artifact_type == "screenshot":
+        return ""
+
+    if isinstance(content, dict):
+        text_content = content.get("content", "")
+    elif isinstance(content, str):
+        text_content = content
+    else:
+        text_content = str(content)
+
+    if text_content:
+        return text_content[:500]
+    if artifact_type in ("plan", "report"):
+        return ""
+    return json.dumps(content, default=str)[:500]
 
 
 def _now() -> str:
@@ -4,6 +4,7 @@ import logging
 from typing import Any, Dict, List, Optional
 
 import httpx
+import orjson
 
 from app.services.settings_service import get_settings_service
 
@@ -56,24 +57,16 @@ class AntigravityService:
             }
         return None
 
-    # ── Agent operations ───────────────────────────────────────
-
-    async def start_agent_task(
-        self, prompt: str, workspace: Optional[str] = None
-    ) -> Dict[str, Any]:
-        """Start an Antigravity agent on a specific task."""
+    async def _request(self, method: str, path: str, **kwargs: Any) -> Dict[str, Any]:
+        """Send a request to the Antigravity API and map failures to error dicts."""
         if err := self._check_enabled():
             return err
 
-        cfg = self._cfg()
-        ws = workspace or cfg.get("workspace_root", "")
-        payload = {"prompt": prompt, "workspace": ws}
-
         try:
             async with self._client() as client:
-                resp = await client.post("/api/agents/start", json=payload)
+                resp = await client.request(method, path, **kwargs)
                 resp.raise_for_status()
-                return {"status": "ok", "data": resp.json()}
+                return {"status": "ok", "data": orjson.loads(resp.content)}
         except httpx.ConnectError:
             return {
                 "status": "error",
@@ -84,80 +77,34 @@ class AntigravityService:
         except Exception as exc:
             return {"status": "error", "detail": str(exc)}
 
+    # ── Agent operations ───────────────────────────────────────
+
+    async def start_agent_task(
+        self, prompt: str, workspace: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Start an Antigravity agent on a specific task."""
+        ws = workspace or self._cfg().get("workspace_root", "")
+        payload = {"prompt": prompt, "workspace": ws}
+        return await self._request("POST", "/api/agents/start", json=payload)
+
     async def get_agent_status(self, task_id: str) -> Dict[str, Any]:
         """Check progress of an Antigravity agent task."""
-        if err := self._check_enabled():
-            return err
-
-        try:
-            async with self._client() as client:
-                resp = await client.get(f"/api/agents/{task_id}/status")
-                resp.raise_for_status()
-                return {"status": "ok", "data": resp.json()}
-        except httpx.ConnectError:
-            return {
-                "status": "error",
-                "detail": f"Cannot reach Antigravity at {self._base_url()}",
-            }
-        except Exception as exc:
-            return {"status": "error", "detail": str(exc)}
+        return await self._request("GET", f"/api/agents/{task_id}/status")
 
     async def retrieve_artifacts(self, task_id: str) -> Dict[str, Any]:
         """Get generated code, plans, and screenshots from a task."""
-        if err := self._check_enabled():
-            return err
-
-        try:
-            async with self._client() as client:
-                resp = await client.get(f"/api/agents/{task_id}/artifacts")
-                resp.raise_for_status()
-                return {"status": "ok", "data": resp.json()}
-        except httpx.ConnectError:
-            return {
-                "status": "error",
-                "detail": f"Cannot reach Antigravity at {self._base_url()}",
-            }
-        except Exception as exc:
-            return {"status": "error", "detail": str(exc)}
+        return await self._request("GET", f"/api/agents/{task_id}/artifacts")
 
     async def list_agents(self) -> Dict[str, Any]:
         """List all active Antigravity agents."""
-        if err := self._check_enabled():
-            return err
-
-        try:
-            async with self._client() as client:
-                resp = await client.get("/api/agents")
-                resp.raise_for_status()
-                return {"status": "ok", "data": resp.json()}
-        except httpx.ConnectError:
-            return {
-                "status": "error",
-                "detail": f"Cannot reach Antigravity at {self._base_url()}",
-            }
-        except Exception as exc:
-            return {"status": "error", "detail": str(exc)}
+        return await self._request("GET", "/api/agents")
 
     async def browser_action(
         self, action: str, params: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Control browser via Antigravity's Chrome extension."""
-        if err := self._check_enabled():
-            return err
-
         payload = {"action": action, **params}
-        try:
-            async with self._client() as client:
-                resp = await client.post("/api/browser", json=payload)
-                resp.raise_for_status()
-                return {"status": "ok", "data": resp.json()}
-        except httpx.ConnectError:
-            return {
-                "status": "error",
-                "detail": f"Cannot reach Antigravity at {self._base_url()}",
-            }
-        except Exception as exc:
-            return {"status": "error", "detail": str(exc)}
+        return await self._request("POST", "/api/browser", json=payload)
 
     async def check_health(self) -> Dict[str, Any]:
         """Check if Antigravity IDE API is reachable."""
@@ -1,16 +1,25 @@
 """Claude MCP service – interface with Claude Desktop MCP servers."""
 
 import asyncio
+import itertools
 import json
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
+import orjson
 
 from app.services.settings_service import get_settings_service
 
 logger = logging.getLogger(__name__)
 
+_MCP_PROTOCOL_VERSION = "2024-11-05"
+_STDIO_TIMEOUT_S = 30.0
+# Grace period after SIGTERM before the stdio server is killed
+_STDIO_STOP_TIMEOUT_S = 5.0
+# Longest single JSON-RPC message accepted from the stdio server
+_STDIO_LINE_LIMIT = 16 * 1024 * 1024
+
 
 class ClaudeMCPService:
     """
@@ -26,10 +35,22 @@ class ClaudeMCPService:
 
     def __init__(self) -> None:
         self._settings = get_settings_service()
+        self._cfg_cache: Optional[Tuple[Any, Dict[str, Any]]] = None
         self._stdio_proc: Optional[asyncio.subprocess.Process] = None
+        self._stdio_reader: Optional[asyncio.Task] = None
+        self._stdio_pending: Dict[int, asyncio.Future] = {}
+        self._stdio_ids = itertools.count(1)
+        self._stdio_start_lock: Optional[asyncio.Lock] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
 
     def _cfg(self) -> Dict[str, Any]:
-        return self._settings.get_integration_config("claude_mcp")
+        version = self._settings.version
+        if self._cfg_cache is None or self._cfg_cache[0] != version:
+            self._cfg_cache = (
+                version,
+                self._settings.get_integration_config("claude_mcp"),
+            )
+        return self._cfg_cache[1]
 
     def _is_enabled(self) -> bool:
         return self._cfg().get("enabled", False)
@@ -39,6 +60,22 @@ class ClaudeMCPService:
 
     # ── HTTP mode ──────────────────────────────────────────────
 
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client so tool calls reuse pooled connections."""
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                timeout=30.0,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=100),
+            )
+        return self._http_client
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client and stdio server (called on app shutdown)."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+        await self._stop_stdio()
+
     async def call_tool_http(
         self, tool_name: str, arguments: Dict[str, Any]
     ) -> Dict[str, Any]:
@@ -46,15 +83,151 @@ class ClaudeMCPService:
         endpoint = self._cfg().get("http_endpoint", "http://localhost:3000")
         url = f"{endpoint}/tools/{tool_name}"
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                resp = await client.post(url, json={"arguments": arguments})
-                resp.raise_for_status()
-                return resp.json()
+            resp = await self._get_http_client().post(
+                url,
+                content=orjson.dumps({"arguments": arguments}),
+                headers={"Content-Type": "application/json"},
+            )
+            resp.raise_for_status()
+            return orjson.loads(resp.content)
         except httpx.ConnectError:
             raise RuntimeError(f"MCP server not reachable at {endpoint}")
         except httpx.HTTPStatusError as exc:
             raise RuntimeError(f"MCP HTTP error: {exc.response.status_code}")
 
+    # ── stdio mode ─────────────────────────────────────────────
+
+    def _stdio_alive(self) -> bool:
+        # A dead reader means no response would ever resolve, so it counts too
+        return (
+            self._stdio_proc is not None
+            and self._stdio_proc.returncode is None
+            and self._stdio_reader is not None
+            and not self._stdio_reader.done()
+        )
+
+    async def _ensure_stdio(self) -> None:
+        """Start the MCP server once and run the initialize handshake."""
+        if self._stdio_alive():
+            return
+        if self._stdio_start_lock is None:
+            self._stdio_start_lock = asyncio.Lock()
+        async with self._stdio_start_lock:
+            if self._stdio_alive():
+                return
+            await self._stop_stdio()
+            cfg = self._cfg()
+            path = cfg.get("stdio_path", "")
+            try:
+                self._stdio_proc = await asyncio.create_subprocess_exec(
+                    path,
+                    *cfg.get("stdio_args", []),
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.DEVNULL,
+                    limit=_STDIO_LINE_LIMIT,
+                )
+            except (FileNotFoundError, PermissionError) as exc:
+                raise RuntimeError(f"MCP stdio server not found at {path}: {exc}")
+            self._stdio_reader = asyncio.ensure_future(
+                self._read_stdio(self._stdio_proc)
+            )
+            try:
+                await self._rpc(
+                    "initialize",
+                    {
+                        "protocolVersion": _MCP_PROTOCOL_VERSION,
+                        "capabilities": {},
+                        "clientInfo": {"name": "ai-home-hub", "version": "1.0"},
+                    },
+                )
+                await self._send(
+                    {"jsonrpc": "2.0", "method": "notifications/initialized"}
+                )
+            except Exception:
+                await self._stop_stdio()
+                raise
+            logger.info("MCP stdio server started (pid %s)", self._stdio_proc.pid)
+
+    async def _read_stdio(self, proc: asyncio.subprocess.Process) -> None:
+        """Resolve pending requests from the server's responses, by id."""
+        try:
+            async for line in proc.stdout:
+                try:
+                    msg = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue  # log noise on stdout
+                if not isinstance(msg, dict):
+                    continue  # valid JSON, but not a JSON-RPC message
+                future = self._stdio_pending.get(msg.get("id"))
+                if future is None or future.done():
+                    continue  # notification or server→client request
+                error = msg.get("error")
+                if error:
+                    future.set_exception(
+                        RuntimeError(
+                            f"MCP error {error.get('code')}: {error.get('message')}"
+                        )
+                    )
+                else:
+                    future.set_result(msg.get("result"))
+        except ValueError as exc:
+            logger.error("MCP stdio message exceeds line limit: %s", exc)
+        finally:
+            for future in self._stdio_pending.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("MCP stdio server exited"))
+
+    async def _send(self, message: Dict[str, Any]) -> None:
+        proc = self._stdio_proc
+        proc.stdin.write(orjson.dumps(message) + b"\n")
+        await proc.stdin.drain()
+
+    async def _rpc(self, method: str, params: Dict[str, Any]) -> Any:
+        """Send one JSON-RPC request and wait for its response."""
+        request_id = next(self._stdio_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._stdio_pending[request_id] = future
+        try:
+            await self._send(
+                {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+            )
+            return await asyncio.wait_for(future, timeout=_STDIO_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            raise RuntimeError(f"MCP stdio call '{method}' timed out")
+        except (BrokenPipeError, ConnectionResetError):
+            raise RuntimeError("MCP stdio server exited")
+        finally:
+            self._stdio_pending.pop(request_id, None)
+
+    async def _stop_stdio(self) -> None:
+        proc, self._stdio_proc = self._stdio_proc, None
+        if proc is not None and proc.returncode is None:
+            try:
+                proc.terminate()
+                await asyncio.wait_for(proc.wait(), timeout=_STDIO_STOP_TIMEOUT_S)
+            except ProcessLookupError:
+                pass
+            except asyncio.TimeoutError:
+                logger.warning("MCP stdio server ignored SIGTERM, killing it")
+                try:
+                    proc.kill()
+                except ProcessLookupError:
+                    pass
+                await proc.wait()
+        if self._stdio_reader is not None:
+            self._stdio_reader.cancel()
+            self._stdio_reader = None
+
+    async def call_tool_stdio(
+        self, tool_name: str, arguments: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Call an MCP tool over the persistent stdio connection."""
+        await self._ensure_stdio()
+        return await self._rpc(
+            "tools/call", {"name": tool_name, "arguments": arguments}
+        )
+
     # ── Unified tool caller ────────────────────────────────────
 
     async def call_tool(
@@ -72,20 +245,7 @@ class ClaudeMCPService:
 
         if connection_type == "http":
             return await self.call_tool_http(tool_name, arguments)
-        else:
-            # stdio: placeholder – full stdio MCP implementation requires
-            # starting the MCP server process and communicating over stdin/stdout
-            # using the MCP JSON-RPC protocol.
-            return {
-                "status": "not_implemented",
-                "detail": (
-                    "stdio MCP connection requires Claude Desktop to be running "
-                    "with MCP servers configured. HTTP connection type is recommended "
-                    "for direct API access."
-                ),
-                "tool": tool_name,
-                "arguments": arguments,
-            }
+        return await self.call_tool_stdio(tool_name, arguments)
 
     # ── Convenience wrappers ───────────────────────────────────
 
@@ -120,6 +280,7 @@ class ClaudeMCPService:
             "enabled": cfg.get("enabled", False),
             "connection_type": cfg.get("connection_type", "stdio"),
             "available_tools": self.get_available_tools(),
+            "stdio_running": self._stdio_alive(),
         }
 
 
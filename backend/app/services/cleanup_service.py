@@ -142,6 +142,11 @@ class CleanupService:
                     size = f.stat().st_size
                     f.unlink()
                     freed += size
+                    # Append-only message log of the same session
+                    log = f.with_suffix(".msgs.jsonl")
+                    if log.exists():
+                        freed += log.stat().st_size
+                        log.unlink()
                     count += 1
             except Exception as exc:
                 logger.debug("Failed to clean session %s: %s", f.name, exc)
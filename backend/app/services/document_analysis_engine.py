@@ -188,7 +188,7 @@ async def _parse_documents(
             },
         )
 
-        result = parser.parse_file(file_path)
+        result = await parser.parse_file_async(file_path)
 
         if "error" in result:
             documents_parsed_total.labels(status="error").inc()
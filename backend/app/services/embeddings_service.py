@@ -4,63 +4,74 @@ import asyncio
 import hashlib
 import logging
 import time
-from typing import Any, Dict, List, Optional
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import httpx
+import orjson
 
+from app.db.embeddings_cache import EmbeddingsCacheDB, get_embeddings_cache_db
 from app.services.settings_service import get_settings_service
 
 logger = logging.getLogger(__name__)
 
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _cache_key(text: str, model: str) -> str:
+    """Content address of an embedding: hash of the text and the embedding model."""
+    return hashlib.blake2b(
+        text.encode() + b"\0" + model.encode(), digest_size=16
+    ).hexdigest()
+
 
 class EmbeddingsService:
-    """Generate text embeddings using Ollama with an in-memory LRU cache."""
+    """Generate text embeddings using Ollama with a content-addressed cache.
+
+    Lookups go through an in-memory LRU first and then, when configured, a
+    persistent SQLite tier that survives restarts.  Vectors are held as
+    packed float32 ``array('f')`` buffers (4 bytes per dimension instead of
+    a boxed Python float); the list-returning API converts at the boundary.
+    """
 
     DEFAULT_MODEL = "nomic-embed-text"
     FALLBACK_MODEL = "llama3.2"
 
-    def __init__(self) -> None:
-        self._cache: Dict[str, tuple] = {}  # {text_hash: (embedding, timestamp)}
+    def __init__(self, persistent_cache: Optional[EmbeddingsCacheDB] = None) -> None:
+        # {content_key: (embedding, timestamp)}, least recently used first
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
         self._cache_max_size: int = 500
         self._cache_ttl_seconds: int = 3600  # 1 hour
         self._cache_hits: int = 0
         self._cache_misses: int = 0
+        self._persistent = persistent_cache
         self._active_model: Optional[str] = None  # tracks which model is in use
         self._status: str = "unknown"  # "ok", "degraded", "unavailable"
+        self._client: Optional[httpx.AsyncClient] = None
+        # Micro-batcher for concurrent single-text requests
+        self._batch_pending: List[Tuple[str, asyncio.Future]] = []
+        self._batch_timer: Optional[asyncio.TimerHandle] = None
+        self._batch_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._batch_tasks: Set[asyncio.Task] = set()
 
-    async def get_embedding(self, text: str) -> Optional[List[float]]:
-        """Get embedding with cache support. Falls back to generate_embedding on miss."""
-        if not text.strip():
-            return None
-
-        text_hash = hashlib.sha256(text.encode()).hexdigest()[:16]
-
-        # Cache hit check
-        if text_hash in self._cache:
-            embedding, cached_at = self._cache[text_hash]
-            if time.time() - cached_at < self._cache_ttl_seconds:
-                self._cache_hits += 1
-                return embedding
-            else:
-                # Expired – remove stale entry
-                del self._cache[text_hash]
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client so embedding calls reuse pooled connections."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=30.0,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=100),
+            )
+        return self._client
 
-        # Cache miss – fetch from Ollama
-        self._cache_misses += 1
-        embedding = await self._fetch_embedding_from_ollama(text)
+    async def aclose(self) -> None:
+        """Close the shared HTTP client (called on app shutdown)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
-        if embedding is not None:
-            # Evict oldest if full
-            if len(self._cache) >= self._cache_max_size:
-                oldest_key = min(self._cache, key=lambda k: self._cache[k][1])
-                del self._cache[oldest_key]
-
-            self._cache[text_hash] = (embedding, time.time())
-
-        return embedding
-
-    async def _fetch_embedding_from_ollama(self, text: str) -> Optional[List[float]]:
-        """Call Ollama embeddings API directly, with fallback to llama3.2."""
+    def _resolve_models(self) -> Tuple[str, str, List[str]]:
+        """Return (ollama_url, primary_model, models_to_try) from settings."""
         settings = get_settings_service().load()
         ollama_url = (
             settings.get("llm", {})
@@ -75,33 +86,135 @@ class EmbeddingsService:
         models_to_try = [primary_model]
         if self.FALLBACK_MODEL not in primary_model:
             models_to_try.append(self.FALLBACK_MODEL)
+        return ollama_url, primary_model, models_to_try
+
+    def _cache_model(self, primary_model: str) -> str:
+        """Model whose cached vectors lookups should use – the one answering now."""
+        if self._active_model in (primary_model, self.FALLBACK_MODEL):
+            return self._active_model
+        return primary_model
+
+    def _cache_lookup(self, key: str) -> Optional[array]:
+        """Return a fresh in-memory embedding for *key*, marking it recently used."""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        embedding, cached_at = entry
+        if time.time() - cached_at >= self._cache_ttl_seconds:
+            # Expired – remove stale entry
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return embedding
+
+    def _cache_store(self, key: str, embedding: array) -> None:
+        self._cache[key] = (embedding, time.time())
+        self._cache.move_to_end(key)
+        # Evict least recently used entries once full
+        while len(self._cache) > self._cache_max_size:
+            self._cache.popitem(last=False)
+
+    async def get_embedding(self, text: str) -> Optional[List[float]]:
+        """Get embedding with cache support; fetches from Ollama on a miss.
+
+        Misses are queued for up to ``embeddings_batch_window_ms`` so that
+        concurrent callers share one batched ``/api/embed`` request.
+        """
+        if not text.strip():
+            return None
+        llm = get_settings_service().load().get("llm", {})
+        window_ms = llm.get("embeddings_batch_window_ms", 10)
+        if window_ms <= 0:
+            return (await self.generate_embeddings_batch([text]))[0]
+
+        # Memory hits are answered immediately, without waiting for a window
+        model = self._cache_model(llm.get("embeddings_model", self.DEFAULT_MODEL))
+        cached = self._cache_lookup(_cache_key(text, model))
+        if cached is not None:
+            self._cache_hits += 1
+            return cached.tolist()
+
+        loop = asyncio.get_running_loop()
+        if self._batch_loop is not loop:
+            # Queue state belongs to a previous (closed) event loop
+            self._batch_pending = []
+            self._batch_timer = None
+            self._batch_loop = loop
+        future = loop.create_future()
+        self._batch_pending.append((text, future))
+        if len(self._batch_pending) >= llm.get("embeddings_batch_max_size", 64):
+            self._flush_batch()
+        elif self._batch_timer is None:
+            self._batch_timer = loop.call_later(window_ms / 1000, self._flush_batch)
+        return await future
+
+    def _flush_batch(self) -> None:
+        """Send the queued single-text requests as one batch."""
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+        pending, self._batch_pending = self._batch_pending, []
+        if not pending:
+            return
+        task = asyncio.ensure_future(self._run_batch(pending))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, pending: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            vectors = await self.generate_embeddings_batch(
+                [text for text, _ in pending]
+            )
+        except Exception as exc:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), vector in zip(pending, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+    async def _fetch_embeddings_from_ollama(
+        self, texts: List[str]
+    ) -> Optional[Tuple[str, List[List[float]]]]:
+        """Embed *texts* in one ``/api/embed`` call, with fallback to llama3.2.
+
+        Returns ``(model, vectors)`` with one vector per input text in the same
+        order, or None when every model failed.
+        """
+        ollama_url, primary_model, models_to_try = self._resolve_models()
 
         last_error = None
         for model in models_to_try:
             try:
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    resp = await client.post(
-                        f"{ollama_url}/api/embed",
-                        json={"model": model, "input": text},
-                    )
-                    resp.raise_for_status()
-                    data = resp.json()
-                    embedding = data.get("embeddings", [None])[0] or data.get(
-                        "embedding"
-                    )
-                    if embedding:
-                        if self._active_model != model:
-                            self._active_model = model
-                            if model != primary_model:
-                                logger.warning(
-                                    "Embeddings: primary model '%s' unavailable, using fallback '%s'",
-                                    primary_model,
-                                    model,
-                                )
-                                self._status = f"degraded: using fallback {model}"
-                            else:
-                                self._status = "ok"
-                        return embedding
+                resp = await self._get_client().post(
+                    f"{ollama_url}/api/embed",
+                    content=orjson.dumps(
+                        {
+                            "model": model,
+                            "input": texts[0] if len(texts) == 1 else texts,
+                        }
+                    ),
+                    headers=_JSON_HEADERS,
+                )
+                resp.raise_for_status()
+                data = orjson.loads(resp.content)
+                embeddings = data.get("embeddings") or (
+                    [data["embedding"]] if data.get("embedding") else None
+                )
+                if embeddings and len(embeddings) == len(texts):
+                    if self._active_model != model:
+                        self._active_model = model
+                        if model != primary_model:
+                            logger.warning(
+                                "Embeddings: primary model '%s' unavailable, using fallback '%s'",
+                                primary_model,
+                                model,
+                            )
+                            self._status = f"degraded: using fallback {model}"
+                        else:
+                            self._status = "ok"
+                    return model, embeddings
             except Exception as exc:
                 last_error = exc
                 logger.warning("Embedding model '%s' failed: %s", model, exc)
@@ -122,16 +235,91 @@ class EmbeddingsService:
         return await self.get_embedding(text)
 
     async def generate_embeddings_batch(
-        self, texts: List[str], concurrency: int = 8
+        self, texts: List[str], concurrency: int = 8, batch_size: int = 64
     ) -> List[Optional[List[float]]]:
-        """Generate embeddings for multiple texts in parallel with caching."""
+        """Generate embeddings for multiple texts with caching.
+
+        Results keep the order of *texts*; blank or failed texts yield None.
+        See generate_embeddings_packed for the lookup/batching details.
+        """
+        packed = await self.generate_embeddings_packed(texts, concurrency, batch_size)
+        return [vector.tolist() if vector is not None else None for vector in packed]
+
+    async def generate_embeddings_packed(
+        self, texts: List[str], concurrency: int = 8, batch_size: int = 64
+    ) -> List[Optional[array]]:
+        """Like generate_embeddings_batch, but return float32 ``array('f')`` buffers.
+
+        Texts are looked up by content key in memory, then in the persistent
+        tier. Remaining misses are deduplicated and sent to Ollama
+        ``/api/embed`` in batches of *batch_size* inputs, up to *concurrency*
+        batches at once. The returned buffers are shared with the cache and
+        must not be modified.
+        """
+        _, primary_model, _ = self._resolve_models()
+        model = self._cache_model(primary_model)
+
+        results: List[Optional[array]] = [None] * len(texts)
+        misses: Dict[str, List[int]] = {}  # text → positions in *texts*
+        for idx, text in enumerate(texts):
+            if not text.strip():
+                continue
+            cached = self._cache_lookup(_cache_key(text, model))
+            if cached is not None:
+                self._cache_hits += 1
+                results[idx] = cached
+            else:
+                misses.setdefault(text, []).append(idx)
+
+        if misses and self._persistent is not None:
+            keys = {_cache_key(text, model): text for text in misses}
+            try:
+                stored = await asyncio.to_thread(self._persistent.get_many, list(keys))
+            except Exception as exc:
+                logger.warning("Persistent embeddings cache read failed: %s", exc)
+                stored = {}
+            for key, embedding in stored.items():
+                self._cache_hits += 1
+                self._cache_store(key, embedding)
+                for idx in misses.pop(keys[key]):
+                    results[idx] = embedding
+
+        if not misses:
+            return results
+
+        pending = list(misses)
+        self._cache_misses += len(pending)
         semaphore = asyncio.Semaphore(concurrency)
 
-        async def _limited(text: str) -> Optional[List[float]]:
+        async def _limited(batch: List[str]) -> Optional[Tuple[str, List[List[float]]]]:
             async with semaphore:
-                return await self.get_embedding(text)
+                return await self._fetch_embeddings_from_ollama(batch)
 
-        return list(await asyncio.gather(*[_limited(t) for t in texts]))
+        batches = [
+            pending[i : i + batch_size] for i in range(0, len(pending), batch_size)
+        ]
+        fetched = await asyncio.gather(*[_limited(b) for b in batches])
+        new_entries: List[Tuple[str, array]] = []
+        for batch, outcome in zip(batches, fetched):
+            if outcome is None:
+                continue
+            # Vectors are keyed by the model that actually produced them
+            used_model, embeddings = outcome
+            for text, values in zip(batch, embeddings):
+                embedding = array("f", values)
+                key = _cache_key(text, used_model)
+                self._cache_store(key, embedding)
+                new_entries.append((key, embedding))
+                for idx in misses[text]:
+                    results[idx] = embedding
+
+        if new_entries and self._persistent is not None:
+            try:
+                await asyncio.to_thread(self._persistent.put_many, new_entries)
+            except Exception as exc:
+                logger.warning("Persistent embeddings cache write failed: %s", exc)
+
+        return results
 
     def get_cache_stats(self) -> Dict[str, Any]:
         """Return cache statistics."""
@@ -149,6 +337,11 @@ class EmbeddingsService:
         """Clear the embedding cache and return pre-clear stats."""
         stats = self.get_cache_stats()
         self._cache.clear()
+        if self._persistent is not None:
+            try:
+                self._persistent.clear()
+            except Exception as exc:
+                logger.warning("Persistent embeddings cache clear failed: %s", exc)
         self._cache_hits = 0
         self._cache_misses = 0
         return stats
@@ -161,5 +354,7 @@ _embeddings_service: Optional[EmbeddingsService] = None
 def get_embeddings_service() -> EmbeddingsService:
     global _embeddings_service
     if _embeddings_service is None:
-        _embeddings_service = EmbeddingsService()
+        _embeddings_service = EmbeddingsService(
+            persistent_cache=get_embeddings_cache_db()
+        )
     return _embeddings_service
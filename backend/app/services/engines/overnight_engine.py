@@ -76,20 +76,11 @@ async def run_kb_reindex(
     # Get existing file metadata from vector store to check mtime
     existing_meta: Dict[str, float] = {}
     try:
-        stats = vector_svc.get_stats(detailed=True)
-        top_sources = stats.get("top_sources", [])
-        # We need to check individual file mtimes stored in metadata
-        # Fetch existing metadatas to compare
-        if stats.get("total_chunks", 0) > 0:
-            result = vector_svc.collection.get(
-                limit=min(stats["total_chunks"], 50000),
-                include=["metadatas"],
-            )
-            for meta in result.get("metadatas") or []:
-                fp = meta.get("file_path", "")
-                mtime = meta.get("file_mtime", 0)
-                if fp and mtime:
-                    existing_meta[fp] = float(mtime)
+        indexed_files = await asyncio.to_thread(vector_svc.get_indexed_files)
+        for fp, meta in indexed_files.items():
+            mtime = meta.get("file_mtime", 0)
+            if mtime:
+                existing_meta[fp] = float(mtime)
     except Exception as exc:
         logger.warning("kb_reindex: failed to load existing metadata: %s", exc)
 
@@ -108,7 +99,7 @@ async def run_kb_reindex(
                 continue
 
             # Parse file
-            parsed = parser_svc.parse_file(fpath)
+            parsed = await parser_svc.parse_file_async(fpath)
             if not parsed.get("text"):
                 skipped += 1
                 continue
@@ -199,13 +190,13 @@ async def run_git_sweep(
         await progress_callback(progress, {"message": f"Kontroluji: {name}"})
 
         try:
-            # Get git status
-            status_data = await git_svc.status(project_path)
+            # Git status and the last 5 commits, fetched concurrently
+            status_data, commits = await asyncio.gather(
+                git_svc.status(project_path), git_svc.log(project_path, count=5)
+            )
             changes = status_data.get("changes", [])
             branch = status_data.get("branch", "unknown")
 
-            # Get last 5 commits
-            commits = await git_svc.log(project_path, count=5)
             last_commit_msg = commits[0]["subject"] if commits else "žádné commity"
             last_commit_date = commits[0]["when"] if commits else "N/A"
 
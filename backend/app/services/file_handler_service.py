@@ -9,6 +9,7 @@ Wraps file_parser_service and adds:
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from datetime import datetime, timezone
 from pathlib import Path
@@ -146,13 +147,15 @@ _CODE_MIME: Dict[str, str] = {
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
 
-def _parse_file(file_path: Path) -> Dict[str, Any]:
+async def _parse_file(file_path: Path) -> Dict[str, Any]:
     """Parse a file to raw text using the appropriate method."""
     ext = file_path.suffix.lower()
 
     if ext in _CODE_EXTENSIONS:
         try:
-            text = file_path.read_text(encoding="utf-8", errors="ignore")
+            text = await asyncio.to_thread(
+                file_path.read_text, encoding="utf-8", errors="ignore"
+            )
             return {
                 "text": text,
                 "metadata": {"language": ext.lstrip(".")},
@@ -164,7 +167,7 @@ def _parse_file(file_path: Path) -> Dict[str, Any]:
 
     from app.services.file_parser_service import get_file_parser_service
 
-    return get_file_parser_service().parse_file(file_path)
+    return await get_file_parser_service().parse_file_async(file_path)
 
 
 async def _generate_summary(text: str, filename: str) -> str:
@@ -246,7 +249,7 @@ class FileHandlerService:
         if not file_path.exists():
             return {"error": f"File not found: {path}"}
 
-        parsed = _parse_file(file_path)
+        parsed = await _parse_file(file_path)
         if "error" in parsed and not parsed.get("text"):
             return {"error": parsed["error"]}
 
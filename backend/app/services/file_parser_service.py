@@ -1,13 +1,76 @@
 """File parser service – extract text from various file formats with OCR support."""
 
+import asyncio
+import io
 import logging
+import multiprocessing
+import os
 import re
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
+# Formats whose parsing is CPU-bound Python and runs in worker processes.
+# Images, audio and video stay in-process: they shell out to tesseract/ffmpeg
+# or load a Whisper model, which must not be duplicated in every worker.
+_PROCESS_POOL_EXTENSIONS = {
+    ".pdf",
+    ".docx",
+    ".xlsx",
+    ".pptx",
+    ".epub",
+    ".html",
+    ".htm",
+    ".zip",
+}
+
+# Capped well below cpu_count – every worker holds a full parser in RAM
+_PARSER_POOL_MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+# Never fork: the server process is multi-threaded, and a child forked while
+# another thread holds a lock can deadlock.  forkserver where available.
+_PARSER_POOL_START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+_parser_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_parser_pool() -> ProcessPoolExecutor:
+    global _parser_pool
+    if _parser_pool is None:
+        _parser_pool = ProcessPoolExecutor(
+            max_workers=_PARSER_POOL_MAX_WORKERS,
+            mp_context=multiprocessing.get_context(_PARSER_POOL_START_METHOD),
+        )
+    return _parser_pool
+
+
+def shutdown_parser_pool() -> None:
+    """Stop the parser worker processes (called on app shutdown)."""
+    global _parser_pool
+    if _parser_pool is not None:
+        _parser_pool.shutdown(wait=False, cancel_futures=True)
+        _parser_pool = None
+
+
+def _xlsx_cell_text(cell: Any) -> str:
+    """Render a calamine cell like openpyxl would (1.0 → "1", empty → "")."""
+    if cell is None:
+        return ""
+    if isinstance(cell, float) and cell.is_integer():
+        return str(int(cell))
+    return str(cell)
+
+
+def _parse_file_entry(file_path: str) -> Dict[str, Any]:
+    """Worker-process entry point; top-level so it can be pickled."""
+    return FileParserService().parse_file(Path(file_path))
+
 
 class FileParserService:
     """Parse text content from various file formats including OCR for images."""
@@ -138,12 +201,65 @@ class FileParserService:
             logger.error("Failed to parse %s: %s", file_path, exc)
             return {"error": str(exc)}
 
+    async def parse_file_async(self, file_path: Path) -> Dict[str, Any]:
+        """Parse a file without blocking the event loop.
+
+        Document formats are parsed in a worker process so several files can
+        be parsed on separate cores; everything else runs in a thread.
+        """
+        if file_path.suffix.lower() in _PROCESS_POOL_EXTENSIONS:
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(
+                    _get_parser_pool(), _parse_file_entry, str(file_path)
+                )
+            except BrokenProcessPool as exc:
+                logger.warning("Parser process pool broken (%s) – using thread", exc)
+                shutdown_parser_pool()
+        return await asyncio.to_thread(self.parse_file, file_path)
+
     # ── PDF ──────────────────────────────────────────────────────
 
     def _parse_pdf(self, file_path: Path) -> Dict[str, Any]:
+        # PyMuPDF is optional (AGPL, not in requirements.txt); install it
+        # separately for faster extraction, otherwise PyPDF2 is used.
+        try:
+            import pymupdf
+        except ImportError:
+            return self._parse_pdf_pypdf2(file_path)
+
+        buf = io.StringIO()
+        metadata: Dict[str, Any] = {}
+
+        with pymupdf.open(file_path) as doc:
+            page_count = doc.page_count
+
+            if doc.metadata:
+                metadata = {
+                    "author": doc.metadata.get("author", ""),
+                    "title": doc.metadata.get("title", ""),
+                    "created": doc.metadata.get("creationDate", ""),
+                }
+
+            # Write page by page so only one page's text is alive at a time
+            for page in doc:
+                page_text = page.get_text("text")
+                if page_text:
+                    if buf.tell():
+                        buf.write("\n\n")
+                    buf.write(page_text)
+
+        return {
+            "text": buf.getvalue(),
+            "metadata": metadata,
+            "page_count": page_count,
+        }
+
+    def _parse_pdf_pypdf2(self, file_path: Path) -> Dict[str, Any]:
+        """Pure-Python fallback used when PyMuPDF is not installed."""
         import PyPDF2
 
-        text_parts = []
+        buf = io.StringIO()
         metadata: Dict[str, Any] = {}
 
         with open(file_path, "rb") as f:
@@ -160,10 +276,12 @@ class FileParserService:
             for page in reader.pages:
                 page_text = page.extract_text()
                 if page_text:
-                    text_parts.append(page_text)
+                    if buf.tell():
+                        buf.write("\n\n")
+                    buf.write(page_text)
 
         return {
-            "text": "\n\n".join(text_parts),
+            "text": buf.getvalue(),
             "metadata": metadata,
             "page_count": page_count,
         }
@@ -204,6 +322,43 @@ class FileParserService:
     # ── XLSX ─────────────────────────────────────────────────────
 
     def _parse_xlsx(self, file_path: Path) -> Dict[str, Any]:
+        try:
+            from python_calamine import CalamineWorkbook
+        except ImportError:
+            return self._parse_xlsx_openpyxl(file_path)
+
+        wb = CalamineWorkbook.from_path(str(file_path))
+        sheet_names = list(wb.sheet_names)
+        text_parts = []
+
+        for sheet_name in sheet_names:
+            text_parts.append(f"=== Sheet: {sheet_name} ===")
+
+            for row in wb.get_sheet_by_name(sheet_name).to_python():
+                # Text cells (the bulk of most sheets) skip the helper call;
+                # a list comprehension is what str.join would build anyway
+                row_text = " | ".join(
+                    [
+                        cell if cell.__class__ is str else _xlsx_cell_text(cell)
+                        for cell in row
+                    ]
+                )
+                if row_text.strip():
+                    text_parts.append(row_text)
+
+        metadata = {
+            "sheets": sheet_names,
+            "sheet_count": len(sheet_names),
+        }
+
+        return {
+            "text": "\n".join(text_parts),
+            "metadata": metadata,
+            "page_count": len(sheet_names),
+        }
+
+    def _parse_xlsx_openpyxl(self, file_path: Path) -> Dict[str, Any]:
+        """Pure-Python fallback used when python-calamine is not installed."""
         import openpyxl
 
         wb = openpyxl.load_workbook(file_path, data_only=True)
@@ -1,61 +1,286 @@
 """Filesystem service – secure file operations with whitelist enforcement."""
 
 import asyncio
+import bisect
 import fnmatch
 import logging
+import math
+import mmap
 import os
+import re
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import orjson
 
 from app.services.settings_service import get_settings_service
 
 logger = logging.getLogger(__name__)
 
+# Characters per chunk yielded by read_file_stream
+_STREAM_CHUNK_CHARS = 64 * 1024
+
+# File-walk/grep work gets its own threads so it cannot starve the default
+# executor used by asyncio.to_thread elsewhere (parsers, DB calls)
+_IO_POOL = ThreadPoolExecutor(
+    max_workers=min(32, (os.cpu_count() or 1) * 4), thread_name_prefix="fs-io"
+)
+
+# Files per _search_python work item handed to _IO_POOL
+_GREP_SHARD_FILES = 32
+
+_RG_TIMEOUT_S = 30.0
+# Longest single --json event accepted from rg (a hit in a minified file is one line)
+_RG_LINE_LIMIT = 4 * 1024 * 1024
+
+
+# Characters that keep a search pattern off the literal fast path: regex
+# syntax, and line breaks (a literal never spans the lines it is matched on)
+_REGEX_META = frozenset(".^$*+?{}[]\\|()\r\n")
+
+
+def _literal_needle(pattern: str) -> Optional[bytes]:
+    """UTF-8 bytes of *pattern* if it is a plain literal (no regex syntax)."""
+    if not pattern or any(c in _REGEX_META for c in pattern):
+        return None
+    return pattern.encode()
+
+
+def _grep_file(
+    filepath: Path,
+    compiled: "re.Pattern[str]",
+    needle: Optional[bytes],
+    limit: int,
+) -> List[Dict[str, Any]]:
+    """Return up to *limit* lines of *filepath* matching *compiled*.
+
+    Every line is matched on its own, as decoded text, so patterns behave as
+    in a line-by-line search (``$`` before ``\\r\\n``, Unicode ``\\w``, no
+    match spanning lines). For a plain-literal pattern, *needle* lets the
+    file be memory-mapped and scanned with ``find`` instead; only the lines
+    containing it are decoded and confirmed.
+    """
+    if needle is None:
+        results: List[Dict[str, Any]] = []
+        with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
+            for i, line in enumerate(f, 1):
+                if compiled.search(line):
+                    results.append(
+                        {"file": str(filepath), "line": i, "content": line.rstrip()}
+                    )
+                    if len(results) >= limit:
+                        break
+        return results
+    return _grep_mmap(filepath, compiled, needle, limit)
+
+
+def _grep_mmap(
+    filepath: Path, compiled: "re.Pattern[str]", needle: bytes, limit: int
+) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    with open(filepath, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return results  # empty files cannot be mmapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            pos = counted = 0
+            lineno = 1
+            while len(results) < limit:
+                start = mm.find(needle, pos)
+                if start == -1:
+                    break
+                lineno += mm[counted:start].count(b"\n")
+                counted = start
+                line_start = mm.rfind(b"\n", 0, start) + 1
+                line_end = mm.find(b"\n", start)
+                if line_end == -1:
+                    line_end = size
+                line = mm[line_start:line_end].decode("utf-8", errors="ignore")
+                if compiled.search(line):
+                    results.append(
+                        {
+                            "file": str(filepath),
+                            "line": lineno,
+                            "content": line.rstrip(),
+                        }
+                    )
+                pos = line_end + 1  # continue on the next line
+    return results
+
+
+async def _iter_text_chunks(
+    p: Path, encoding: str, chunk_size: int
+) -> AsyncIterator[str]:
+    f = await asyncio.to_thread(open, p, "r", encoding=encoding)
+    try:
+        while True:
+            chunk = await asyncio.to_thread(f.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        f.close()
+
+
+def _copy_file(src: Path, dst: Path) -> None:
+    """Copy data + metadata like shutil.copy2, in-kernel where possible.
+
+    os.copy_file_range (Linux) lets the filesystem copy or reflink without
+    the data passing through userspace; elsewhere shutil.copy2 already uses
+    the platform fast path (fcopyfile on macOS).
+    """
+    if dst.is_dir():
+        dst = dst / src.name
+    if dst.exists() and os.path.samefile(src, dst):
+        raise shutil.SameFileError(f"{src} and {dst} are the same file")
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining <= 0:
+                shutil.copystat(src, dst)
+                return
+        except OSError as exc:
+            # Cross-device copies on older kernels, unsupported filesystems
+            logger.debug("copy_file_range failed, falling back: %s", exc)
+    shutil.copy2(src, dst)
+
+
+def _scan_directory(p: Path) -> List[Dict[str, Any]]:
+    """List *p* with os.scandir, reusing the type info from the directory read."""
+    with os.scandir(p) as it:
+        items = list(it)
+    items.sort(key=lambda e: e.name)
+
+    entries = []
+    for item in items:
+        try:
+            stat = item.stat()
+            is_dir = item.is_dir()
+            entries.append(
+                {
+                    "name": item.name,
+                    "type": "dir" if is_dir else "file",
+                    "size": stat.st_size if item.is_file() else None,
+                    "modified": stat.st_mtime,
+                    "path": item.path,
+                }
+            )
+        except OSError:
+            pass  # permission denied or dangling symlink
+    return entries
+
+
+def _combine_globs(patterns: Iterable[str]) -> "re.Pattern[str]":
+    translated = [fnmatch.translate(p) for p in patterns]
+    # An empty alternation would match everything; (?!) never matches
+    return re.compile("|".join(translated) if translated else "(?!)")
+
+
+class _AccessRules:
+    """Whitelist roots and blacklist globs, resolved/compiled once per config."""
+
+    def __init__(self, allowed: Tuple[str, ...], blacklist: Tuple[str, ...]) -> None:
+        self.key = (allowed, blacklist)
+        roots = [str(Path(d).resolve()) for d in allowed]
+        self.roots = tuple(roots)
+        # Sorted, with roots nested inside another root dropped: in a
+        # prefix-free sorted list the only candidate prefix of a path is its
+        # bisect predecessor
+        prefixes: List[str] = []
+        for prefix in sorted({r if r.endswith(os.sep) else r + os.sep for r in roots}):
+            if not (prefixes and prefix.startswith(prefixes[-1])):
+                prefixes.append(prefix)
+        self._prefixes = prefixes
+        self._blacklist = tuple(blacklist)
+        # One alternation per subject, so the hot check is a single C-level
+        # match on the full path and one on the file name
+        self._blacklist_path_re = _combine_globs(f"*{p}" for p in blacklist)
+        self._blacklist_name_re = _combine_globs(blacklist)
+
+    def is_under_root(self, resolved: str) -> bool:
+        probe = resolved + os.sep  # lets a root itself match its own prefix
+        idx = bisect.bisect_right(self._prefixes, probe)
+        return idx > 0 and probe.startswith(self._prefixes[idx - 1])
+
+    def is_blacklisted(self, resolved: str, name: str) -> bool:
+        return bool(
+            self._blacklist_path_re.match(resolved)
+            or self._blacklist_name_re.match(name)
+        )
+
+    def blacklisted(self, resolved: str, name: str) -> Optional[str]:
+        """Return the first blacklist pattern matching the path, if any."""
+        if not self.is_blacklisted(resolved, name):
+            return None
+        for pattern in self._blacklist:
+            if fnmatch.fnmatch(resolved, f"*{pattern}") or fnmatch.fnmatch(
+                name, pattern
+            ):
+                return pattern
+        return None
+
 
 class FilesystemService:
     def __init__(self) -> None:
         self._settings = get_settings_service()
+        self._cfg_cache: Optional[Tuple[Any, Dict[str, Any]]] = None
+        self._rules: Optional[_AccessRules] = None
 
     def _cfg(self) -> Dict[str, Any]:
-        return self._settings.get_filesystem_config()
-
-    def _allowed_dirs(self) -> List[str]:
-        return self._cfg().get("allowed_directories", [])
-
-    def _blacklist_patterns(self) -> List[str]:
-        return self._cfg().get("blacklist_patterns", [])
+        version = self._settings.version
+        if self._cfg_cache is None or self._cfg_cache[0] != version:
+            self._cfg_cache = (version, self._settings.get_filesystem_config())
+        return self._cfg_cache[1]
+
+    def _access_rules(self) -> _AccessRules:
+        """Return the compiled rules, rebuilding them only when the config changed."""
+        cfg = self._cfg()
+        key = (
+            tuple(cfg.get("allowed_directories", [])),
+            tuple(cfg.get("blacklist_patterns", [])),
+        )
+        if self._rules is None or self._rules.key != key:
+            self._rules = _AccessRules(*key)
+        return self._rules
 
     # ── Security ───────────────────────────────────────────────
 
     def _assert_allowed(self, path: str) -> Path:
         """Raise PermissionError if `path` is outside the whitelist."""
         p = Path(path).resolve()
-        allowed = self._allowed_dirs()
+        rules = self._access_rules()
 
         # If no whitelist configured, reject all (safe default)
-        if not allowed:
+        if not rules.roots:
             raise PermissionError(
                 "No allowed_directories configured. "
                 "Add directories to the whitelist in Settings → Security."
             )
 
-        for d in allowed:
-            try:
-                p.relative_to(Path(d).resolve())
-                # Path is under this allowed dir – now check blacklist
-                for pattern in self._blacklist_patterns():
-                    if fnmatch.fnmatch(str(p), f"*{pattern}") or fnmatch.fnmatch(
-                        p.name, pattern
-                    ):
-                        raise PermissionError(
-                            f"Path matches blacklist pattern: {pattern}"
-                        )
-                return p
-            except ValueError:
-                continue  # Not under this allowed dir, try next
-
-        raise PermissionError(
-            f"Path '{path}' is not in the allowed directories whitelist."
+        resolved = str(p)
+        if not rules.is_under_root(resolved):
+            raise PermissionError(
+                f"Path '{path}' is not in the allowed directories whitelist."
+            )
+        pattern = rules.blacklisted(resolved, p.name)
+        if pattern is not None:
+            raise PermissionError(f"Path matches blacklist pattern: {pattern}")
+        return p
+
+    @staticmethod
+    def _fast_allowed(rules: _AccessRules, resolved: str) -> bool:
+        """String-only whitelist/blacklist check for already resolved paths."""
+        return rules.is_under_root(resolved) and not rules.is_blacklisted(
+            resolved, os.path.basename(resolved)
         )
 
     # ── Read operations ────────────────────────────────────────
@@ -66,31 +291,30 @@ class FilesystemService:
         if not p.is_file():
             raise FileNotFoundError(f"Not a file: {path}")
 
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, lambda: p.read_text(encoding=encoding))
+        return await asyncio.to_thread(p.read_text, encoding=encoding)
+
+    def read_file_stream(
+        self,
+        path: str,
+        encoding: str = "utf-8",
+        chunk_size: int = _STREAM_CHUNK_CHARS,
+    ) -> AsyncIterator[str]:
+        """Validate `path` and return an async iterator over its text chunks.
+
+        Checks run eagerly so callers get PermissionError/FileNotFoundError
+        before they start streaming a response.
+        """
+        p = self._assert_allowed(path)
+        if not p.is_file():
+            raise FileNotFoundError(f"Not a file: {path}")
+        return _iter_text_chunks(p, encoding, chunk_size)
 
     async def list_directory(self, path: str) -> List[Dict[str, Any]]:
         """List directory contents."""
         p = self._assert_allowed(path)
         if not p.is_dir():
             raise NotADirectoryError(f"Not a directory: {path}")
-
-        entries = []
-        for item in sorted(p.iterdir()):
-            try:
-                stat = item.stat()
-                entries.append(
-                    {
-                        "name": item.name,
-                        "type": "dir" if item.is_dir() else "file",
-                        "size": stat.st_size if item.is_file() else None,
-                        "modified": stat.st_mtime,
-                        "path": str(item),
-                    }
-                )
-            except PermissionError:
-                pass
-        return entries
+        return await asyncio.to_thread(_scan_directory, p)
 
     # ── Write operations ───────────────────────────────────────
 
@@ -98,10 +322,7 @@ class FilesystemService:
         """Write content to a file (creates it if it doesn't exist)."""
         p = self._assert_allowed(path)
         p.parent.mkdir(parents=True, exist_ok=True)
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(
-            None, lambda: p.write_text(content, encoding=encoding)
-        )
+        await asyncio.to_thread(p.write_text, content, encoding=encoding)
         return f"Written {len(content)} characters to {path}"
 
     async def delete_file(self, path: str) -> str:
@@ -124,20 +345,14 @@ class FilesystemService:
         """Move or rename a file."""
         src_p = self._assert_allowed(src)
         dst_p = self._assert_allowed(dst)
-        import shutil
-
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, lambda: shutil.move(str(src_p), str(dst_p)))
+        await asyncio.to_thread(shutil.move, str(src_p), str(dst_p))
         return f"Moved {src} → {dst}"
 
     async def copy_file(self, src: str, dst: str) -> str:
         """Copy a file."""
         src_p = self._assert_allowed(src)
         dst_p = self._assert_allowed(dst)
-        import shutil
-
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, lambda: shutil.copy2(str(src_p), str(dst_p)))
+        await asyncio.to_thread(_copy_file, src_p, dst_p)
         return f"Copied {src} → {dst}"
 
     # ── Search ─────────────────────────────────────────────────
@@ -168,16 +383,18 @@ class FilesystemService:
         proc = await asyncio.create_subprocess_exec(
             *args,
             stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=_RG_LINE_LIMIT,
         )
-        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=30.0)
-        import json
-
-        results = []
-        for line in stdout.decode().splitlines():
-            try:
-                obj = json.loads(line)
-                if obj.get("type") == "match":
+        results: List[Dict[str, Any]] = []
+
+        async def _collect() -> None:
+            # Parse events as rg emits them and stop reading at max_results
+            async for line in proc.stdout:
+                try:
+                    obj = orjson.loads(line)
+                    if obj.get("type") != "match":
+                        continue
                     data = obj["data"]
                     results.append(
                         {
@@ -186,48 +403,97 @@ class FilesystemService:
                             "content": data["lines"]["text"].rstrip(),
                         }
                     )
-                    if len(results) >= max_results:
-                        break
-            except Exception:
-                pass
+                except (ValueError, KeyError, TypeError):
+                    continue
+                if len(results) >= max_results:
+                    return
+
+        try:
+            await asyncio.wait_for(_collect(), timeout=_RG_TIMEOUT_S)
+        except ValueError as exc:
+            # Line longer than _RG_LINE_LIMIT – keep what was collected so far
+            logger.warning("rg output line too long, search truncated: %s", exc)
+        finally:
+            if proc.returncode is None:
+                try:
+                    proc.terminate()
+                except ProcessLookupError:
+                    pass
+            await proc.wait()
         return results
 
     async def _search_python(
         self, root: Path, pattern: str, file_pattern: Optional[str], max_results: int
     ) -> List[Dict[str, Any]]:
-        """Pure-Python grep fallback (no subprocess)."""
-        import re
-
-        loop = asyncio.get_event_loop()
+        """Pure-Python grep fallback (no subprocess).
 
-        def _do_search():
-            results = []
-            try:
-                compiled = re.compile(pattern)
-            except re.error:
-                compiled = re.compile(re.escape(pattern))
-
-            for filepath in root.rglob(file_pattern or "*"):
-                if not filepath.is_file():
-                    continue
+        The walk hands shards of files to _IO_POOL as it goes, so opening and
+        paging in files overlaps across threads.  Results are the first
+        max_results hits in walk order regardless of thread timing: work stops
+        only for shards past the point where the finished shards before it
+        already hold max_results hits.
+        """
+        rules = self._access_rules()
+        try:
+            compiled = re.compile(pattern)
+            needle = _literal_needle(pattern)
+        except re.error:
+            compiled = re.compile(re.escape(pattern))
+            needle = None
+
+        lock = threading.Lock()
+        finished: Dict[int, int] = {}  # shard index -> hit count
+        prefix_end = 0  # shards [0, prefix_end) are all finished
+        prefix_hits = 0
+        cutoff = math.inf  # shards with a higher index are not needed
+
+        def _finish(index: int, hits: int) -> None:
+            nonlocal prefix_end, prefix_hits, cutoff
+            with lock:
+                finished[index] = hits
+                while prefix_end in finished and prefix_hits < max_results:
+                    prefix_hits += finished.pop(prefix_end)
+                    prefix_end += 1
+                if prefix_hits >= max_results:
+                    cutoff = min(cutoff, prefix_end - 1)
+
+        def _grep_shard(index: int, shard: List[Path]) -> List[Dict[str, Any]]:
+            results: List[Dict[str, Any]] = []
+            for filepath in shard:
+                if index > cutoff or len(results) >= max_results:
+                    break
                 try:
-                    with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
-                        for i, line in enumerate(f, 1):
-                            if compiled.search(line):
-                                results.append(
-                                    {
-                                        "file": str(filepath),
-                                        "line": i,
-                                        "content": line.rstrip(),
-                                    }
-                                )
-                                if len(results) >= max_results:
-                                    return results
+                    hits = _grep_file(
+                        filepath, compiled, needle, max_results - len(results)
+                    )
                 except Exception:
-                    pass
+                    continue
+                results.extend(hits)
+            _finish(index, len(results))
             return results
 
-        return await loop.run_in_executor(None, _do_search)
+        def _dispatch() -> List[Future]:
+            futures: List[Future] = []
+            shard: List[Path] = []
+            for filepath in root.rglob(file_pattern or "*"):
+                if len(futures) > cutoff:
+                    break
+                if not filepath.is_file():
+                    continue
+                if not self._fast_allowed(rules, os.path.realpath(filepath)):
+                    continue
+                shard.append(filepath)
+                if len(shard) >= _GREP_SHARD_FILES:
+                    futures.append(_IO_POOL.submit(_grep_shard, len(futures), shard))
+                    shard = []
+            if shard and len(futures) <= cutoff:
+                futures.append(_IO_POOL.submit(_grep_shard, len(futures), shard))
+            return futures
+
+        futures = await asyncio.get_running_loop().run_in_executor(_IO_POOL, _dispatch)
+        shard_results = await asyncio.gather(*map(asyncio.wrap_future, futures))
+        # Merge in walk order so results stay stable for the same tree
+        return [hit for hits in shard_results for hit in hits][:max_results]
 
     # ── Info ───────────────────────────────────────────────────
 
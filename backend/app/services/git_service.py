@@ -1,76 +1,572 @@
-"""Git service – run git operations via subprocess."""
+"""Git service – run git operations via subprocess (reads via libgit2 if available)."""
 
 import asyncio
+import functools
 import logging
-from typing import Any, Dict, List, Optional
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import IO, Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+try:
+    import pygit2
+except ImportError:  # optional – the git CLI is used instead
+    pygit2 = None
+
+from app.utils.subprocess_utils import parse_output, wait_or_kill
 
 logger = logging.getLogger(__name__)
 
+# Actions that only read repository state and may run concurrently; every
+# other action mutates the repo and is serialized per repository
+READ_ONLY_ACTIONS = frozenset({"status", "log", "diff", "branches", "conflicts"})
+
+_READ_CHUNK = 64 * 1024
+
+# Open pygit2 repository handles kept by _Libgit2Repos
+_LG2_MAX_REPOS = 16
+
+# multi_status(): git status calls in flight at once
+_MULTI_STATUS_CONCURRENCY = 16
+
+
+def _parse_branch_header(header: str) -> str:
+    """Branch name from a porcelain ``## ...`` line (``HEAD`` when detached)."""
+    info = header[3:] if header.startswith("## ") else header
+    for prefix in ("No commits yet on ", "Initial commit on "):
+        if info.startswith(prefix):
+            return info[len(prefix) :]
+    if info.startswith("HEAD (no branch)"):
+        return "HEAD"  # same as `git rev-parse --abbrev-ref HEAD`
+    # "main...origin/main [ahead 1]" → "main"
+    return info.split("...", 1)[0].split(" ", 1)[0]
+
+
+def _parse_status(output: str) -> Dict[str, Any]:
+    """Parse ``git status --porcelain=v1 --branch`` output."""
+    header, _, body = output.partition("\n")
+    branch = _parse_branch_header(header)
+    changes: List[Dict[str, str]] = []
+    for line in body.splitlines():
+        if len(line) >= 3:
+            xy = line[:2]
+            filepath = line[3:]
+            changes.append({"status": xy, "file": filepath})
+    return {"branch": branch, "changes": changes, "clean": len(changes) == 0}
+
+
+def _parse_log(raw: bytes) -> List[Dict[str, str]]:
+    """Parse ``git log -z --format=%H%x1f%s%x1f%an%x1f%ar`` output."""
+    return [
+        {"hash": p[0][:8], "subject": p[1], "author": p[2], "when": p[3]}
+        for record in raw.decode(errors="replace").split("\0")
+        if len(p := record.split("\x1f")) == 4
+    ]
+
+
+def _stat_key(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_ino)
+
+
+def _head_key(repo_path: str) -> Optional[Tuple[int, int]]:
+    """Change token for ``.git/HEAD`` (None if it can't be stat'ed)."""
+    return _stat_key(os.path.join(repo_path, ".git", "HEAD"))
+
+
+def _heads_key(repo_path: str) -> Optional[Tuple[Any, ...]]:
+    """Change token for the local branch refs (loose dirs + packed-refs)."""
+    git_dir = os.path.join(repo_path, ".git")
+    heads = os.path.join(git_dir, "refs", "heads")
+    if not os.path.isdir(heads):
+        return None
+    # Branches like feature/x live in sub-directories, whose mtimes change
+    # without touching refs/heads itself
+    dirs = [_stat_key(d) for d, _, _ in os.walk(heads)]
+    return (tuple(dirs), _stat_key(os.path.join(git_dir, "packed-refs")))
+
+
+# ── Reading refs straight from .git ─────────────────────────
+# HEAD and local branch names are plain files; reading them needs no
+# subprocess at all.  Anything unusual (worktrees, ambiguous short names,
+# unreadable files) returns None and the caller falls back to git.
+
+
+def _read_head_branch(repo_path: str) -> Optional[str]:
+    """Branch named by ``.git/HEAD`` ("HEAD" when detached), like rev-parse."""
+    try:
+        with open(os.path.join(repo_path, ".git", "HEAD"), encoding="utf-8") as fh:
+            head = fh.read().strip()
+    except (OSError, UnicodeDecodeError):
+        return None
+    if head.startswith("ref: refs/heads/"):
+        return head[len("ref: refs/heads/") :]
+    if len(head) in (40, 64) and all(c in "0123456789abcdef" for c in head):
+        return "HEAD"
+    return None
+
+
+def _packed_refs(git_dir: str) -> List[str]:
+    try:
+        with open(os.path.join(git_dir, "packed-refs"), encoding="utf-8") as fh:
+            lines = fh.read().splitlines()
+    except FileNotFoundError:
+        return []
+    # "<sha> <refname>"; "#" header and "^<sha>" peeled-tag lines are skipped
+    return [
+        line.split(" ", 1)[1]
+        for line in lines
+        if line and line[0] not in "#^" and " " in line
+    ]
+
+
+def _read_local_branches(repo_path: str) -> Optional[List[str]]:
+    """Sorted short names of refs/heads/* (loose + packed), or None."""
+    git_dir = os.path.join(repo_path, ".git")
+    heads = os.path.join(git_dir, "refs", "heads")
+    if not os.path.isdir(heads):
+        return None
+    try:
+        packed = _packed_refs(git_dir)
+    except (OSError, UnicodeDecodeError):
+        return None
+    names = {r[len("refs/heads/") :] for r in packed if r.startswith("refs/heads/")}
+    for dirpath, _, files in os.walk(heads):
+        rel = os.path.relpath(dirpath, heads)
+        for name in files:
+            if not name.endswith(".lock"):
+                names.add(name if rel == "." else f"{rel}/{name}".replace(os.sep, "/"))
+    # %(refname:short) prints "heads/x" when x is also a tag/remote/top ref
+    others = set(packed)
+    for name in names:
+        for ref in (f"refs/{name}", f"refs/tags/{name}", f"refs/remotes/{name}"):
+            if ref in others or os.path.exists(os.path.join(git_dir, ref)):
+                return None
+    return sorted(names)
+
+
+# ── libgit2 read path (optional) ─────────────────────────────
+# With pygit2 installed, status/log/current_branch read the repository
+# in-process instead of forking git; writes always go through the CLI.
+
+
+def _relative_date(timestamp: int, now: Optional[float] = None) -> str:
+    """Format like git's ``%ar`` (e.g. "3 hours ago", "1 year, 2 months ago")."""
+
+    def _n(value: int, unit: str) -> str:
+        return f"{value} {unit}" + ("" if value == 1 else "s")
+
+    diff = int((time.time() if now is None else now) - timestamp)
+    if diff < 0:
+        return "in the future"
+    if diff < 90:
+        return _n(diff, "second") + " ago"
+    diff = (diff + 30) // 60
+    if diff < 90:
+        return _n(diff, "minute") + " ago"
+    diff = (diff + 30) // 60
+    if diff < 36:
+        return _n(diff, "hour") + " ago"
+    diff = (diff + 12) // 24
+    if diff < 14:
+        return _n(diff, "day") + " ago"
+    if diff < 70:
+        return _n((diff + 3) // 7, "week") + " ago"
+    if diff < 365:
+        return _n((diff + 15) // 30, "month") + " ago"
+    if diff < 1825:
+        total_months = (diff * 12 * 2 + 365) // (365 * 2)
+        years, months = divmod(total_months, 12)
+        if months:
+            return f"{_n(years, 'year')}, {_n(months, 'month')} ago"
+        return _n(years, "year") + " ago"
+    return _n((diff + 183) // 365, "year") + " ago"
+
+
+def _xy_code(flags: int) -> Optional[str]:
+    """Porcelain ``XY`` code for a libgit2 status bitmask (None = skip)."""
+    if flags & pygit2.GIT_STATUS_IGNORED:
+        return None
+    if flags & pygit2.GIT_STATUS_CONFLICTED:
+        return "UU"
+    x = " "
+    for flag, code in (
+        (pygit2.GIT_STATUS_INDEX_NEW, "A"),
+        (pygit2.GIT_STATUS_INDEX_MODIFIED, "M"),
+        (pygit2.GIT_STATUS_INDEX_DELETED, "D"),
+        (pygit2.GIT_STATUS_INDEX_RENAMED, "R"),
+        (pygit2.GIT_STATUS_INDEX_TYPECHANGE, "T"),
+    ):
+        if flags & flag:
+            x = code
+            break
+    if x == " " and flags & pygit2.GIT_STATUS_WT_NEW:
+        return "??"
+    y = " "
+    for flag, code in (
+        (pygit2.GIT_STATUS_WT_MODIFIED, "M"),
+        (pygit2.GIT_STATUS_WT_DELETED, "D"),
+        (pygit2.GIT_STATUS_WT_RENAMED, "R"),
+        (pygit2.GIT_STATUS_WT_TYPECHANGE, "T"),
+    ):
+        if flags & flag:
+            y = code
+            break
+    return None if x == y == " " else x + y
+
+
+def _head_branch(repo: Any) -> str:
+    if repo.head_is_unborn:
+        target = repo.references["HEAD"].target
+        return target[len("refs/heads/") :] if target.startswith("refs/") else target
+    if repo.head_is_detached:
+        return "HEAD"
+    return repo.head.shorthand
+
+
+def _staged_renames(repo: Any, status: Dict[str, int]) -> Dict[str, str]:
+    """Map new → old path of renames staged in the index.
+
+    ``repo.status()`` has no rename detection and reports them as a delete
+    plus an add; the porcelain output this replaces shows ``R  old -> new``.
+    Only diffed when the status holds both an added and a deleted path.
+    """
+    seen = 0
+    for flags in status.values():
+        seen |= flags
+    wanted = pygit2.GIT_STATUS_INDEX_NEW | pygit2.GIT_STATUS_INDEX_DELETED
+    if seen & wanted != wanted or repo.head_is_unborn:
+        return {}
+    diff = repo.index.diff_to_tree(repo.head.peel(pygit2.Tree))
+    diff.find_similar()
+    return {
+        delta.new_file.path: delta.old_file.path
+        for delta in diff.deltas
+        if delta.status == pygit2.GIT_DELTA_RENAMED
+    }
+
+
+def _lg2_status(repo: Any) -> Dict[str, Any]:
+    status = repo.status(untracked_files="normal")
+    renames = _staged_renames(repo, status)
+    renamed_from = set(renames.values())
+    changes: List[Dict[str, str]] = []
+    for path, flags in sorted(status.items()):
+        if path in renamed_from:
+            continue  # reported with its new path
+        xy = _xy_code(flags)
+        if xy is None:
+            continue
+        old = renames.get(path)
+        if old is not None:
+            changes.append({"status": "R" + xy[1], "file": f"{old} -> {path}"})
+        else:
+            changes.append({"status": xy, "file": path})
+    return {
+        "branch": _head_branch(repo),
+        "changes": changes,
+        "clean": len(changes) == 0,
+    }
+
+
+def _lg2_log(repo: Any, count: int) -> List[Dict[str, str]]:
+    if repo.head_is_unborn:
+        return []
+    commits: List[Dict[str, str]] = []
+    now = time.time()
+    for commit in repo.walk(repo.head.target, pygit2.GIT_SORT_TIME):
+        if len(commits) >= count:
+            break
+        # %s = first paragraph of the message folded onto one line
+        subject = " ".join(commit.message.split("\n\n", 1)[0].split())
+        commits.append(
+            {
+                "hash": str(commit.id)[:8],
+                "subject": subject,
+                "author": commit.author.name,
+                "when": _relative_date(commit.author.time, now),
+            }
+        )
+    return commits
+
+
+class _Libgit2Repos:
+    """Open pygit2 repositories, reused across calls.
+
+    libgit2 repository handles are not safe for concurrent use, so each is
+    guarded by its own lock; calls run in worker threads. Each handle keeps
+    file descriptors and mmaps of the object database, so only the
+    _LG2_MAX_REPOS most recently used stay open.
+    """
+
+    def __init__(self) -> None:
+        self._repos: "OrderedDict[str, Tuple[Any, threading.Lock]]" = OrderedDict()
+        self._guard = threading.Lock()
+
+    def _open(self, repo_path: str) -> Optional[Tuple[Any, threading.Lock]]:
+        key = os.path.realpath(repo_path)
+        evicted = None
+        with self._guard:
+            entry = self._repos.get(key)
+            if entry is None:
+                try:
+                    repo = pygit2.Repository(key)
+                except (pygit2.GitError, KeyError):
+                    return None
+                entry = self._repos[key] = (repo, threading.Lock())
+                if len(self._repos) > _LG2_MAX_REPOS:
+                    evicted = self._repos.popitem(last=False)[1]
+            else:
+                self._repos.move_to_end(key)
+        if evicted is not None:
+            old_repo, old_lock = evicted
+            with old_lock:  # wait for a call still using it
+                old_repo.free()
+        return entry
+
+    def call(self, repo_path: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run *fn(repo, *args)*; raises LookupError if the repo can't be opened."""
+        entry = self._open(repo_path)
+        if entry is None:
+            raise LookupError(repo_path)
+        repo, lock = entry
+        with lock:
+            return fn(repo, *args)
+
+
+# ── run_action table helpers ─────────────────────────────────
+
+_ActionEntry = Tuple[
+    Callable[..., Awaitable[Any]],
+    Callable[[Dict[str, Any]], Tuple[Any, ...]],
+    Callable[[Any], Dict[str, Any]],
+]
+
+
+def _repo(params: Dict[str, Any]) -> str:
+    return params.get("repo_path", ".")
+
+
+def _repo_args(params: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (_repo(params),)
+
+
+def _repo_branch_args(params: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (_repo(params), params.get("branch"))
+
+
+def _ok_data(key: Optional[str] = None) -> Callable[[Any], Dict[str, Any]]:
+    if key is None:
+        return lambda result: {"status": "ok", "data": result}
+    return lambda result: {"status": "ok", "data": {key: result}}
+
+
+def _ok_detail(result: Any) -> Dict[str, Any]:
+    return {"status": "ok", "detail": result}
+
 
 class GitService:
     """Wrapper around the git CLI for common repository operations."""
 
+    def __init__(self) -> None:
+        # Entries vanish once no task holds the lock
+        self._repo_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = (
+            weakref.WeakValueDictionary()
+        )
+        # realpath → (change token, value); see current_branch/list_branches
+        self._branch_cache: Dict[str, Tuple[Any, str]] = {}
+        self._branches_cache: Dict[str, Tuple[Any, List[str]]] = {}
+        self._lg2 = _Libgit2Repos() if pygit2 is not None else None
+        # action → (method, params → call args, result → response)
+        self._actions: Dict[str, _ActionEntry] = {
+            "status": (self.status, _repo_args, _ok_data()),
+            "log": (
+                self.log,
+                lambda p: (_repo(p), int(p.get("count", 10))),
+                _ok_data("commits"),
+            ),
+            "diff": (
+                self.diff,
+                lambda p: (_repo(p), p.get("staged", False)),
+                _ok_data("diff"),
+            ),
+            "commit": (
+                self.commit_all,
+                lambda p: (_repo(p), p["message"]),
+                _ok_detail,
+            ),
+            "push": (self.push, _repo_branch_args, _ok_detail),
+            "pull": (self.pull, _repo_branch_args, _ok_detail),
+            "create_branch": (
+                self.create_branch,
+                lambda p: (_repo(p), p["branch"]),
+                _ok_detail,
+            ),
+            "checkout": (
+                self.checkout,
+                lambda p: (_repo(p), p["branch"]),
+                _ok_detail,
+            ),
+            "fetch": (self.fetch, _repo_args, _ok_detail),
+            "stash": (self.stash, _repo_args, _ok_detail),
+            "stash_pop": (self.stash_pop, _repo_args, _ok_detail),
+            "branches": (self.list_branches, _repo_args, _ok_data("branches")),
+            "conflicts": (
+                self.detect_conflicts,
+                _repo_args,
+                _ok_data("conflicts"),
+            ),
+        }
+
+    async def _lg2_read(self, repo_path: str, fn: Callable[..., Any], *args: Any):
+        """Run a libgit2 read in a thread; None means "use the CLI instead"."""
+        if self._lg2 is None:
+            return None
+        try:
+            return await asyncio.to_thread(self._lg2.call, repo_path, fn, *args)
+        except Exception as exc:
+            logger.debug(
+                "libgit2 read failed for %s, using git CLI: %s", repo_path, exc
+            )
+            return None
+
+    def _invalidate_branch_cache(self, repo_path: str) -> None:
+        key = os.path.realpath(repo_path)
+        self._branch_cache.pop(key, None)
+        self._branches_cache.pop(key, None)
+
+    def _repo_lock(self, repo_path: str) -> asyncio.Lock:
+        key = os.path.realpath(repo_path)
+        lock = self._repo_locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._repo_locks[key] = lock
+        return lock
+
     async def _run(self, *args: str, cwd: Optional[str] = None) -> str:
         """Run a git command and return stdout, raising on non-zero exit."""
+        return (await self._run_bytes(*args, cwd=cwd)).decode().strip()
+
+    async def _run_bytes(
+        self, *args: str, cwd: Optional[str] = None, stdout: Optional[IO] = None
+    ) -> bytes:
+        """Run a git command and return its raw stdout.
+
+        Output is read in 64 KiB chunks into a single bytearray (stderr is
+        drained concurrently so neither pipe can fill up and stall git).  With
+        *stdout* – an open binary file – git writes straight to it and b"" is
+        returned.
+        """
         proc = await asyncio.create_subprocess_exec(
             "git",
             *args,
             cwd=cwd,
-            stdout=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE if stdout is None else stdout,
             stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
         )
-        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=60.0)
+
+        async def _read_stdout() -> bytearray:
+            buf = bytearray()
+            if proc.stdout is not None:
+                while chunk := await proc.stdout.read(_READ_CHUNK):
+                    buf += chunk
+            return buf
+
+        async def _collect() -> Tuple[bytearray, bytes]:
+            out, err = await asyncio.gather(_read_stdout(), proc.stderr.read())
+            await proc.wait()
+            return out, err
+
+        out, err = await wait_or_kill(proc, _collect(), timeout=60.0)
         if proc.returncode != 0:
-            raise RuntimeError(stderr.decode().strip() or f"git {args[0]} failed")
-        return stdout.decode().strip()
+            raise RuntimeError(err.decode().strip() or f"git {args[0]} failed")
+        return bytes(out)
 
     # ── Read operations ────────────────────────────────────────
 
     async def status(self, repo_path: str) -> Dict[str, Any]:
-        """Return current git status as structured data."""
-        output = await self._run("status", "--porcelain=v1", cwd=repo_path)
-        branch = await self._run("rev-parse", "--abbrev-ref", "HEAD", cwd=repo_path)
-        changes: List[Dict[str, str]] = []
-        for line in output.splitlines():
-            if len(line) >= 3:
-                xy = line[:2]
-                filepath = line[3:]
-                changes.append({"status": xy, "file": filepath})
-        return {"branch": branch, "changes": changes, "clean": len(changes) == 0}
+        """Return current git status as structured data.
+
+        One ``git status --branch`` call yields both the branch (from the
+        ``## `` header line) and the changed files.
+        """
+        result = await self._lg2_read(repo_path, _lg2_status)
+        if result is not None:
+            return result
+        output = await self._run("status", "--porcelain=v1", "--branch", cwd=repo_path)
+        return await parse_output(_parse_status, output)
 
     async def log(self, repo_path: str, count: int = 10) -> List[Dict[str, str]]:
         """Return recent commit log entries."""
-        fmt = "%H\x1f%s\x1f%an\x1f%ar"
-        output = await self._run("log", f"-{count}", f"--format={fmt}", cwd=repo_path)
-        commits = []
-        for line in output.splitlines():
-            parts = line.split("\x1f")
-            if len(parts) == 4:
-                commits.append(
-                    {
-                        "hash": parts[0][:8],
-                        "subject": parts[1],
-                        "author": parts[2],
-                        "when": parts[3],
-                    }
-                )
-        return commits
-
-    async def diff(self, repo_path: str, staged: bool = False) -> str:
-        """Return git diff output."""
+        commits = await self._lg2_read(repo_path, _lg2_log, count)
+        if commits is not None:
+            return commits
+        # -z: NUL between records, \x1f between fields – unambiguous, and one
+        # decode + C-level splits instead of a per-line Python loop
+        raw = await self._run_bytes(
+            "log", "-z", f"-{count}", "--format=%H%x1f%s%x1f%an%x1f%ar", cwd=repo_path
+        )
+        return await parse_output(_parse_log, raw)
+
+    async def diff(
+        self, repo_path: str, staged: bool = False, output_path: Optional[str] = None
+    ) -> str:
+        """Return git diff output.
+
+        With *output_path* git writes the diff straight into that file (no
+        copy through Python) and the path is returned instead.
+        """
         args = ["diff", "--stat"]
         if staged:
             args.append("--cached")
-        return await self._run(*args, cwd=repo_path)
+        if output_path is None:
+            return await self._run(*args, cwd=repo_path)
+        with open(output_path, "wb") as fh:
+            await self._run_bytes(*args, cwd=repo_path, stdout=fh)
+        return output_path
 
     async def current_branch(self, repo_path: str) -> str:
-        """Return the current branch name."""
-        return await self._run("rev-parse", "--abbrev-ref", "HEAD", cwd=repo_path)
+        """Return the current branch name.
+
+        Read from ``.git/HEAD`` directly and cached until that file changes,
+        which a stat() detects far more cheaply than spawning git.
+        """
+        key = os.path.realpath(repo_path)
+        token = _head_key(repo_path)
+        cached = self._branch_cache.get(key)
+        if token is not None and cached is not None and cached[0] == token:
+            return cached[1]
+        branch = _read_head_branch(repo_path)
+        if branch is None:
+            branch = await self._lg2_read(repo_path, _head_branch)
+        if branch is None:
+            branch = await self._run("rev-parse", "--abbrev-ref", "HEAD", cwd=repo_path)
+        if token is not None:
+            self._branch_cache[key] = (token, branch)
+        return branch
 
     async def list_branches(self, repo_path: str) -> List[str]:
-        """Return list of local branches."""
-        output = await self._run("branch", "--format=%(refname:short)", cwd=repo_path)
-        return [b.strip() for b in output.splitlines() if b.strip()]
+        """Return list of local branches (cached until the branch refs change)."""
+        key = os.path.realpath(repo_path)
+        token = _heads_key(repo_path)
+        cached = self._branches_cache.get(key)
+        if token is not None and cached is not None and cached[0] == token:
+            return list(cached[1])
+        branches = await asyncio.to_thread(_read_local_branches, repo_path)
+        if branches is None:
+            output = await self._run(
+                "branch", "--format=%(refname:short)", cwd=repo_path
+            )
+            branches = [b.strip() for b in output.splitlines() if b.strip()]
+        if token is not None:
+            self._branches_cache[key] = (token, branches)
+        return list(branches)
 
     async def detect_conflicts(self, repo_path: str) -> List[str]:
         """Return list of files with merge conflicts."""
@@ -107,19 +603,31 @@ class GitService:
         args = ["pull"]
         if branch:
             args += ["origin", branch]
-        return await self._run(*args, cwd=repo_path)
+        try:
+            return await self._run(*args, cwd=repo_path)
+        finally:
+            self._invalidate_branch_cache(repo_path)
 
     async def create_branch(self, repo_path: str, branch_name: str) -> str:
         """Create and checkout a new branch."""
-        return await self._run("checkout", "-b", branch_name, cwd=repo_path)
+        try:
+            return await self._run("checkout", "-b", branch_name, cwd=repo_path)
+        finally:
+            self._invalidate_branch_cache(repo_path)
 
     async def checkout(self, repo_path: str, branch_name: str) -> str:
         """Checkout an existing branch."""
-        return await self._run("checkout", branch_name, cwd=repo_path)
+        try:
+            return await self._run("checkout", branch_name, cwd=repo_path)
+        finally:
+            self._invalidate_branch_cache(repo_path)
 
     async def fetch(self, repo_path: str) -> str:
         """Fetch from all remotes."""
-        return await self._run("fetch", "--all", cwd=repo_path)
+        try:
+            return await self._run("fetch", "--all", cwd=repo_path)
+        finally:
+            self._invalidate_branch_cache(repo_path)
 
     async def stash(self, repo_path: str) -> str:
         """Stash uncommitted changes."""
@@ -131,50 +639,56 @@ class GitService:
 
     # ── Generic action dispatcher ──────────────────────────────
 
+    async def run_actions(
+        self, actions: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """Run several actions concurrently; results keep the input order.
+
+        Read-only actions overlap freely; write actions on the same repo are
+        still applied one at a time (see run_action).
+        """
+        results = await asyncio.gather(
+            *(self.run_action(action, params) for action, params in actions),
+            return_exceptions=True,
+        )
+        return [
+            (
+                {"status": "error", "detail": str(result)}
+                if isinstance(result, BaseException)
+                else result
+            )
+            for result in results
+        ]
+
+    async def multi_status(self, repo_paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """``run_action("status")`` for many repositories, keyed by path.
+
+        The calls overlap, at most _MULTI_STATUS_CONCURRENCY at a time; each
+        is I/O-bound, so one event loop keeps up with the subprocesses.
+        """
+        paths = list(dict.fromkeys(repo_paths))
+        sem = asyncio.Semaphore(_MULTI_STATUS_CONCURRENCY)
+
+        async def one(path: str) -> Dict[str, Any]:
+            async with sem:
+                return await self.run_action("status", {"repo_path": path})
+
+        results = await asyncio.gather(*(one(path) for path in paths))
+        return dict(zip(paths, results))
+
     async def run_action(self, action: str, params: Dict[str, Any]) -> Dict[str, Any]:
-        repo_path = params.get("repo_path", ".")
+        if action in READ_ONLY_ACTIONS:
+            return await self._dispatch(action, params)
+        async with self._repo_lock(_repo(params)):
+            return await self._dispatch(action, params)
+
+    async def _dispatch(self, action: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        entry = self._actions.get(action)
+        if entry is None:
+            return {"status": "error", "detail": f"Unknown action: {action}"}
+        method, build_args, wrap = entry
         try:
-            if action == "status":
-                data = await self.status(repo_path)
-                return {"status": "ok", "data": data}
-            elif action == "log":
-                commits = await self.log(repo_path, int(params.get("count", 10)))
-                return {"status": "ok", "data": {"commits": commits}}
-            elif action == "diff":
-                diff = await self.diff(repo_path, params.get("staged", False))
-                return {"status": "ok", "data": {"diff": diff}}
-            elif action == "commit":
-                result = await self.commit_all(repo_path, params["message"])
-                return {"status": "ok", "detail": result}
-            elif action == "push":
-                result = await self.push(repo_path, params.get("branch"))
-                return {"status": "ok", "detail": result}
-            elif action == "pull":
-                result = await self.pull(repo_path, params.get("branch"))
-                return {"status": "ok", "detail": result}
-            elif action == "create_branch":
-                result = await self.create_branch(repo_path, params["branch"])
-                return {"status": "ok", "detail": result}
-            elif action == "checkout":
-                result = await self.checkout(repo_path, params["branch"])
-                return {"status": "ok", "detail": result}
-            elif action == "fetch":
-                result = await self.fetch(repo_path)
-                return {"status": "ok", "detail": result}
-            elif action == "stash":
-                result = await self.stash(repo_path)
-                return {"status": "ok", "detail": result}
-            elif action == "stash_pop":
-                result = await self.stash_pop(repo_path)
-                return {"status": "ok", "detail": result}
-            elif action == "branches":
-                branches = await self.list_branches(repo_path)
-                return {"status": "ok", "data": {"branches": branches}}
-            elif action == "conflicts":
-                conflicts = await self.detect_conflicts(repo_path)
-                return {"status": "ok", "data": {"conflicts": conflicts}}
-            else:
-                return {"status": "error", "detail": f"Unknown action: {action}"}
+            return wrap(await method(*build_args(params)))
         except asyncio.TimeoutError:
             return {"status": "error", "detail": "Git operation timed out"}
         except RuntimeError as exc:
@@ -185,11 +699,6 @@ class GitService:
             return {"status": "error", "detail": "git CLI not found"}
 
 
-_git_service: Optional[GitService] = None
-
-
+@functools.cache
 def get_git_service() -> GitService:
-    global _git_service
-    if _git_service is None:
-        _git_service = GitService()
-    return _git_service
+    return GitService()
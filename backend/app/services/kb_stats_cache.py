@@ -46,28 +46,14 @@ def _write_cache(data: Dict[str, Any]) -> None:
 
 def compute_stats() -> Dict[str, Any]:
     """Compute fresh KB stats from VectorStoreService."""
-    from app.services.vector_store_service import get_vector_store_service, CHROMA_DIR
+    from app.services.vector_store_service import (
+        get_storage_usage,
+        get_vector_store_service,
+    )
 
     vs = get_vector_store_service()
     stats = vs.get_stats(detailed=True)
-
-    # Calculate storage size
-    storage_mb = 0.0
-    last_indexed = None
-    if CHROMA_DIR.exists():
-        total_size = 0
-        latest_mtime = 0.0
-        for f in CHROMA_DIR.rglob("*"):
-            if f.is_file():
-                st = f.stat()
-                total_size += st.st_size
-                if f.suffix in (".bin", ".parquet") and st.st_mtime > latest_mtime:
-                    latest_mtime = st.st_mtime
-        storage_mb = round(total_size / (1024 * 1024), 1)
-        if latest_mtime > 0:
-            last_indexed = datetime.fromtimestamp(
-                latest_mtime, tz=timezone.utc
-            ).isoformat()
+    storage_mb, last_indexed = get_storage_usage()
 
     return {
         "computed_at": datetime.now(timezone.utc).isoformat(),
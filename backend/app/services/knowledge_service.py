@@ -102,7 +102,7 @@ async def _fetch_local_files(source: Dict[str, Any]) -> List[Dict[str, Any]]:
                 text = file_path.read_text(encoding="utf-8", errors="ignore")
                 if len(text) > _MAX_FILE_SIZE:
                     text = text[:_MAX_FILE_SIZE]
-                if not text.strip():
+                if not text or text.isspace():
                     continue
                 results.append(
                     {
@@ -149,7 +149,7 @@ async def _fetch_urls(source: Dict[str, Any]) -> List[Dict[str, Any]]:
 
                 if len(text) > _MAX_FILE_SIZE:
                     text = text[:_MAX_FILE_SIZE]
-                if not text.strip():
+                if not text:
                     continue
 
                 # Derive a short name from URL
@@ -232,7 +232,7 @@ async def initialize_kb(
         if not chunks:
             continue
 
-        embeddings = await embeddings_svc.generate_embeddings_batch(chunks)
+        embeddings = await embeddings_svc.generate_embeddings_packed(chunks)
         valid_items = [
             (chunk, emb, idx)
             for idx, (chunk, emb) in enumerate(zip(chunks, embeddings))
@@ -1,11 +1,21 @@
 """LLM service – Ollama integration with circuit breaker, retry, and structured errors."""
 
 import asyncio
+import functools
 import json
 import logging
 import time
 from datetime import datetime
-from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+from typing import (
+    Any,
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
 
 import httpx
 from tenacity import (
@@ -113,6 +123,40 @@ def _llm_unavailable_response(
     )
 
 
+# ── Shared HTTP client ───────────────────────────────────────
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Keep-alive client shared by all Ollama calls (one per event loop).
+
+    Timeouts are passed per request; see _timeout().
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(180.0, connect=5.0),
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+        )
+        _client_loop = loop
+    return _client
+
+
+def _timeout(seconds: float) -> httpx.Timeout:
+    return httpx.Timeout(seconds, connect=5.0)
+
+
+async def aclose_client() -> None:
+    """Close the shared Ollama client (called on app shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
 # Retry decorator for raw Ollama HTTP calls.
 # Retries on transient errors (connect, timeout) but NOT on 4xx client errors.
 @retry(
@@ -124,17 +168,143 @@ def _llm_unavailable_response(
 async def _call_ollama_with_retry(
     ollama_url: str, payload: dict, timeout: float
 ) -> str:
-    """Make a single non-streaming call to Ollama with tenacity retry."""
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        resp = await client.post(f"{ollama_url}/api/chat", json=payload)
+    """Make a single chat call to Ollama with tenacity retry.
+
+    With ``payload["stream"]`` set the NDJSON reply is parsed line by line as
+    it arrives instead of waiting for Ollama to buffer the whole generation.
+    """
+    return await _chat_batcher.submit(
+        payload.get("model", ""), lambda: _post_chat(ollama_url, payload, timeout)
+    )
+
+
+async def _post_chat(ollama_url: str, payload: dict, timeout: float) -> str:
+    client = _get_client()
+    url = f"{ollama_url}/api/chat"
+    if not payload.get("stream"):
+        resp = await client.post(url, json=payload, timeout=_timeout(timeout))
         resp.raise_for_status()
         data = resp.json()
         return data.get("message", {}).get("content", "")
 
+    parts: List[str] = []
+    async with client.stream(
+        "POST", url, json=payload, timeout=_timeout(timeout)
+    ) as resp:
+        resp.raise_for_status()
+        async for line in resp.aiter_lines():
+            if not line.strip():
+                continue
+            try:
+                chunk = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            token = chunk.get("message", {}).get("content", "")
+            if token:
+                parts.append(token)
+            if chunk.get("done"):
+                break
+    return "".join(parts)
+
+
+# ── Chat request coalescing ──────────────────────────────────
+
+_CHAT_BATCH_WINDOW_S = 0.02
+_CHAT_BATCH_MAX = 8
+
+
+class _ChatBatcher:
+    """Coalesces chat calls that arrive within a short window.
+
+    Ollama has no batch chat endpoint, so a batch is released as parallel
+    requests on the shared keep-alive client – ordered by model, so Ollama's
+    FIFO scheduler runs same-model prompts back to back instead of swapping
+    models in between.
+    """
+
+    def __init__(self) -> None:
+        self._pending: List[
+            Tuple[str, Callable[[], Awaitable[str]], asyncio.Future]
+        ] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def submit(self, model: str, call: Callable[[], Awaitable[str]]) -> str:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Fresh event loop (tests, reload): drop state bound to the old one
+            self._pending = []
+            self._timer = None
+            self._loop = loop
+        future = loop.create_future()
+        self._pending.append((model, call, future))
+        if len(self._pending) >= _CHAT_BATCH_MAX:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(_CHAT_BATCH_WINDOW_S, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        pending.sort(key=lambda item: item[0])  # stable: FIFO within a model
+        for _, call, future in pending:
+            if future.done():  # caller already gave up
+                continue
+            task = asyncio.ensure_future(call())
+            task.add_done_callback(functools.partial(_settle, future))
+            future.add_done_callback(
+                lambda f, t=task: t.cancel() if f.cancelled() else None
+            )
+
+
+def _settle(future: asyncio.Future, task: asyncio.Task) -> None:
+    if future.done():
+        return
+    if task.cancelled():
+        future.cancel()
+    elif task.exception() is not None:
+        future.set_exception(task.exception())
+    else:
+        future.set_result(task.result())
+
+
+_chat_batcher = _ChatBatcher()
+
 
 class LLMService:
     def __init__(self) -> None:
         self._settings = get_settings_service()
+        self._cache_version: Any = None
+        self._cache: Dict[Any, Any] = {}
+
+    def _cached(self, key: Any, build: Callable[[], Any]) -> Any:
+        """Return *build()* memoized until the settings version changes."""
+        version = self._settings.version
+        if version != self._cache_version:
+            self._cache = {}
+            self._cache_version = version
+        try:
+            return self._cache[key]
+        except KeyError:
+            value = self._cache[key] = build()
+            return value
+
+    def _llm_config(self, profile: Optional[str] = None) -> Dict[str, Any]:
+        # Callers adjust the returned dict (e.g. the resolved model), so copy it
+        return dict(
+            self._cached(
+                ("llm", profile),
+                lambda: self._settings.get_llm_config(profile=profile),
+            )
+        )
+
+    def _system_prompt(self, mode: str) -> str:
+        return self._cached(
+            ("prompt", mode), lambda: self._settings.get_system_prompt(mode)
+        )
 
     async def generate(
         self,
@@ -145,6 +315,7 @@ class LLMService:
         history: Optional[List[Dict[str, str]]] = None,
         model_override: Optional[str] = None,
         for_overnight: bool = False,
+        stream: bool = True,
     ) -> Tuple[str, Dict[str, Any]]:
         """
         Generate a response using Ollama or fall back to stub.
@@ -154,10 +325,12 @@ class LLMService:
         *model_override* overrides the model from profile/settings for this request.
         *for_overnight* signals batch/overnight context → keep_alive=0 so the
         model is unloaded from RAM immediately after the call.
+        *stream* reads the Ollama reply as NDJSON while it is generated; pass
+        False to request a single buffered response instead.
 
         Returns (reply_text, meta_dict).
         """
-        cfg = self._settings.get_llm_config(profile=profile)
+        cfg = self._llm_config(profile)
         cfg["model"] = resolve_model(
             profile or "general", model_override or cfg.get("model")
         )
@@ -168,7 +341,12 @@ class LLMService:
 
         if provider == "ollama":
             reply, meta = await self._generate_ollama(
-                message, mode, history or [], cfg, keep_alive=keep_alive
+                message,
+                mode,
+                history or [],
+                cfg,
+                keep_alive=keep_alive,
+                stream=stream,
             )
         else:
             reply, meta = self._generate_stub(message, mode, context_file_ids or [])
@@ -195,6 +373,7 @@ class LLMService:
         history: List[Dict[str, str]],
         cfg: Dict[str, Any],
         keep_alive: int | str | None = None,
+        stream: bool = True,
     ) -> Tuple[str, Dict[str, Any]]:
         ollama_url = cfg.get("ollama_url", "http://localhost:11434").rstrip("/")
         model = cfg.get("model", "llama3.2")
@@ -211,16 +390,8 @@ class LLMService:
                 retry_after_s=int(cb.recovery_timeout),
             )
 
-        system_prompt = (
-            get_date_context() + "\n" + self._settings.get_system_prompt(mode)
-        )
-
-        # 5H-3: Add structured output hints based on message content
-        system_prompt = self._add_structured_hints(system_prompt, message)
-
-        messages: List[Dict[str, str]] = [{"role": "system", "content": system_prompt}]
-        messages.extend(history)
-        messages.append({"role": "user", "content": message})
+        # 5H-3: structured output hints based on message content
+        messages = self._build_messages(mode, history, message, structured_hints=True)
 
         # Token management – trim if approaching context limit
         from app.utils.token_utils import (
@@ -260,7 +431,7 @@ class LLMService:
             "model": model,
             "messages": messages,
             "options": options,
-            "stream": False,
+            "stream": stream,
         }
         if keep_alive is not None:
             payload["keep_alive"] = keep_alive
@@ -310,8 +481,10 @@ class LLMService:
                 # 5H-2: Language detection and auto-translation
                 meta_base["language_detected"] = "cs"
                 meta_base["auto_translated"] = False
-                settings = self._settings.load()
-                auto_translate = settings.get("auto_translate_to_czech", True)
+                auto_translate = self._cached(
+                    "auto_translate",
+                    lambda: self._settings.load().get("auto_translate_to_czech", True),
+                )
 
                 if auto_translate and self._looks_english(reply):
                     meta_base["language_detected"] = "en"
@@ -328,7 +501,7 @@ class LLMService:
                             {"role": "user", "content": f"Přelož do češtiny: {reply}"},
                         ],
                         "options": options,
-                        "stream": False,
+                        "stream": stream,
                     }
                     if keep_alive is not None:
                         translate_payload["keep_alive"] = keep_alive
@@ -403,6 +576,31 @@ class LLMService:
                 "error": str(exc),
             }
 
+    def _build_messages(
+        self,
+        mode: str,
+        history: List[Dict[str, str]],
+        message: str,
+        structured_hints: bool = False,
+    ) -> List[Dict[str, str]]:
+        """Chat messages laid out so Ollama can reuse its prompt cache.
+
+        Ollama only skips prefill for a byte-identical prompt prefix, so the
+        per-mode system prompt opens every request unchanged.  What varies per
+        call – date/time and formatting hints – goes into a system message just
+        before the new user turn, after the (cacheable) history.
+        """
+        context = get_date_context().rstrip()
+        if structured_hints:
+            context = self._add_structured_hints(context, message)
+        messages: List[Dict[str, str]] = [
+            {"role": "system", "content": self._system_prompt(mode)}
+        ]
+        messages.extend(history)
+        messages.append({"role": "system", "content": context})
+        messages.append({"role": "user", "content": message})
+        return messages
+
     @staticmethod
     def _add_structured_hints(system_prompt: str, message: str) -> str:
         """Add formatting hints to system prompt based on message keywords."""
@@ -477,12 +675,9 @@ class LLMService:
         Falls back to a single stub yield if Ollama is unavailable.
         *for_overnight* triggers keep_alive=0 so the model is unloaded after the call.
         """
-        cfg = self._settings.get_llm_config(profile=profile)
+        cfg = self._llm_config(profile)
         ollama_url = cfg.get("ollama_url", "http://localhost:11434").rstrip("/")
         model = resolve_model(profile or "general", model_override or cfg.get("model"))
-        system_prompt = (
-            get_date_context() + "\n" + self._settings.get_system_prompt(mode)
-        )
         cb = get_ollama_circuit_breaker()
 
         # Circuit breaker: fast-fail if Ollama has been failing repeatedly
@@ -499,9 +694,7 @@ class LLMService:
             )
             return
 
-        messages: List[Dict[str, str]] = [{"role": "system", "content": system_prompt}]
-        messages.extend(history or [])
-        messages.append({"role": "user", "content": message})
+        messages = self._build_messages(mode, history or [], message)
 
         options: Dict[str, Any] = {}
         if cfg.get("temperature") is not None:
@@ -532,23 +725,25 @@ class LLMService:
 
         try:
             async with asyncio.timeout(timeout_val):
-                async with httpx.AsyncClient(timeout=timeout_val) as client:
-                    async with client.stream(
-                        "POST", f"{ollama_url}/api/chat", json=payload
-                    ) as resp:
-                        resp.raise_for_status()
-                        async for line in resp.aiter_lines():
-                            if not line.strip():
-                                continue
-                            try:
-                                chunk = json.loads(line)
-                            except json.JSONDecodeError:
-                                continue
-                            if chunk.get("done"):
-                                break
-                            token = chunk.get("message", {}).get("content", "")
-                            if token:
-                                yield token
+                async with _get_client().stream(
+                    "POST",
+                    f"{ollama_url}/api/chat",
+                    json=payload,
+                    timeout=_timeout(timeout_val),
+                ) as resp:
+                    resp.raise_for_status()
+                    async for line in resp.aiter_lines():
+                        if not line.strip():
+                            continue
+                        try:
+                            chunk = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        if chunk.get("done"):
+                            break
+                        token = chunk.get("message", {}).get("content", "")
+                        if token:
+                            yield token
             # Success – reset circuit breaker
             await cb.record_success()
         except asyncio.TimeoutError:
@@ -571,39 +766,39 @@ class LLMService:
 
     async def check_ollama_health(self) -> Dict[str, Any]:
         """Check if Ollama is running and return available models."""
-        cfg = self._settings.get_llm_config()
+        cfg = self._llm_config()
         ollama_url = cfg.get("ollama_url", "http://localhost:11434").rstrip("/")
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                resp = await client.get(f"{ollama_url}/api/tags")
-                resp.raise_for_status()
-                data = resp.json()
-                models = [m["name"] for m in data.get("models", [])]
-                return {"status": "ok", "models": models, "url": ollama_url}
+            resp = await _get_client().get(
+                f"{ollama_url}/api/tags", timeout=_timeout(5.0)
+            )
+            resp.raise_for_status()
+            data = resp.json()
+            models = [m["name"] for m in data.get("models", [])]
+            return {"status": "ok", "models": models, "url": ollama_url}
         except Exception as exc:
             return {"status": "unavailable", "error": str(exc), "url": ollama_url}
 
+    async def aclose(self) -> None:
+        """Close the shared Ollama client (called on app shutdown)."""
+        await aclose_client()
+
 
 async def unload_model(model_name: str) -> None:
     """Explicitně uvolní model z Ollama RAM (keep_alive=0)."""
     try:
         cfg = get_settings_service().get_llm_config()
         ollama_url = cfg.get("ollama_url", "http://localhost:11434").rstrip("/")
-        async with httpx.AsyncClient(timeout=10) as client:
-            await client.post(
-                f"{ollama_url}/api/generate",
-                json={"model": model_name, "keep_alive": 0, "prompt": ""},
-            )
+        await _get_client().post(
+            f"{ollama_url}/api/generate",
+            json={"model": model_name, "keep_alive": 0, "prompt": ""},
+            timeout=_timeout(10.0),
+        )
         logger.info("Unloaded model %s from Ollama RAM", model_name)
     except Exception:
         pass  # ignoruj chyby při unload
 
 
-_llm_service: Optional[LLMService] = None
-
-
+@functools.cache
 def get_llm_service() -> LLMService:
-    global _llm_service
-    if _llm_service is None:
-        _llm_service = LLMService()
-    return _llm_service
+    return LLMService()
@@ -1,97 +1,478 @@
 """Mac OS service – AppleScript automation and system control."""
 
 import asyncio
+import functools
 import logging
+import re
 import shlex
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.utils.subprocess_utils import (
+    communicate_or_kill,
+    kill_process_group,
+    parse_output,
+)
 
 logger = logging.getLogger(__name__)
 
+_SESSION_RESULT_RE = re.compile(r"__(OK|ERR)__(.*)", re.DOTALL)
+
+
+# One translate() pass instead of a replace() copy per special character
+_APPLESCRIPT_ESCAPES = str.maketrans(
+    {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t"}
+)
+
+
+def _applescript_literal(value: str) -> str:
+    """Quote *value* as a single-line AppleScript string literal."""
+    return f'"{value.translate(_APPLESCRIPT_ESCAPES)}"'
+
+
+def _split_app_list(raw: str) -> List[str]:
+    return [a.strip() for a in raw.split(",") if a.strip()]
+
+
+class _OsaSessionError(RuntimeError):
+    """The ``osascript -i`` child broke the request/reply protocol."""
+
+
+def _parse_session_reply(lines: List[str]) -> str:
+    """Extract the wrapped result from ``osascript -i`` output.
+
+    The REPL echoes values as ``=> "…"`` (quoted, with escapes).  A reply
+    without the wrapper's marker means the session is not behaving as
+    expected and raises _OsaSessionError.
+    """
+    text = "\n".join(lines).strip()
+    match = _SESSION_RESULT_RE.search(text)
+    if match is None:
+        raise _OsaSessionError(f"Unexpected osascript session reply: {text[:200]!r}")
+    status, payload = match.groups()
+    if payload.endswith('"'):
+        payload = payload[:-1].replace('\\"', '"').replace("\\\\", "\\")
+    payload = payload.strip()
+    if status == "ERR":
+        raise RuntimeError(payload or "AppleScript error")
+    return payload
+
+
+# ── Native IOKit calls (PyObjC) ────────────────────────────────
+# Battery and display sleep go straight to IOKit in-process when PyObjC is
+# installed; otherwise the pmset subprocess is used.
+
+_IOKIT_FUNCTIONS = [
+    ("IOPSCopyPowerSourcesInfo", b"@"),
+    ("IOPSCopyPowerSourcesList", b"@@"),
+    ("IOPSGetPowerSourceDescription", b"@@@"),
+    ("IOServiceMatching", b"@*"),
+    ("IOServiceGetMatchingService", b"II@"),
+    ("IORegistryEntrySetCFProperty", b"iI@@"),
+    ("IOObjectRelease", b"iI"),
+]
+
+_iokit: Optional[Dict[str, Any]] = None
+
+
+def _load_iokit() -> Dict[str, Any]:
+    """Return the IOKit functions loaded through PyObjC ({} if unavailable)."""
+    global _iokit
+    if _iokit is None:
+        _iokit = {}
+        try:
+            import objc
+            from Foundation import NSBundle
+        except ImportError:
+            return _iokit
+        bundle = NSBundle.bundleWithIdentifier_("com.apple.framework.IOKit")
+        if bundle is not None:
+            try:
+                objc.loadBundleFunctions(bundle, _iokit, _IOKIT_FUNCTIONS)
+            except Exception as exc:
+                logger.debug("IOKit bindings unavailable: %s", exc)
+                _iokit = {}
+    return _iokit
+
+
+def _native_battery_status() -> Optional[Dict[str, Any]]:
+    """Read the internal battery via IOPowerSources; None if not available.
+
+    PyObjC/IOKit errors are logged and also yield None, so the caller falls
+    back to pmset.
+    """
+    iokit = _load_iokit()
+    if not iokit:
+        return None
+    try:
+        return _read_internal_battery(iokit)
+    except Exception as exc:
+        logger.warning("IOKit battery query failed, using pmset: %s", exc)
+        return None
+
+
+def _read_internal_battery(iokit: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    info = iokit["IOPSCopyPowerSourcesInfo"]()
+    for source in iokit["IOPSCopyPowerSourcesList"](info) or []:
+        desc = iokit["IOPSGetPowerSourceDescription"](info, source) or {}
+        if desc.get("Type") != "InternalBattery":
+            continue
+        current = desc.get("Current Capacity") or 0
+        maximum = desc.get("Max Capacity") or 100
+        percent = round(current * 100 / maximum) if maximum else 0
+        charging = bool(desc.get("Is Charging"))
+        power_source = desc.get("Power Source State", "")
+        state = "charging" if charging else "discharging"
+        return {
+            "raw": f"{power_source}; {percent}%; {state}",
+            "percent": percent,
+            "charging": charging,
+            "power_source": power_source,
+        }
+    return None
+
+
+def _native_sleep_display() -> bool:
+    """Ask the display wrangler to idle; False if IOKit/the service is missing.
+
+    PyObjC/IOKit errors are logged and also yield False, so the caller falls
+    back to pmset.
+    """
+    iokit = _load_iokit()
+    if not iokit:
+        return False
+    try:
+        return _request_display_idle(iokit)
+    except Exception as exc:
+        logger.warning("IOKit display sleep failed, using pmset: %s", exc)
+        return False
+
+
+def _request_display_idle(iokit: Dict[str, Any]) -> bool:
+    service = iokit["IOServiceGetMatchingService"](
+        0, iokit["IOServiceMatching"](b"IODisplayWrangler")
+    )
+    if not service:
+        return False
+    try:
+        return (
+            iokit["IORegistryEntrySetCFProperty"](service, "IORequestIdle", True) == 0
+        )
+    finally:
+        iokit["IOObjectRelease"](service)
+
+
+# ── run_action table helpers ─────────────────────────────────
+
+_ActionEntry = Tuple[
+    Callable[..., Awaitable[Any]],
+    Callable[[Dict[str, Any]], Tuple[Any, ...]],
+    Callable[[Any], Dict[str, Any]],
+]
+
+
+def _no_args(params: Dict[str, Any]) -> Tuple[Any, ...]:
+    return ()
+
+
+def _ok_detail(result: Any) -> Dict[str, Any]:
+    return {"status": "ok", "detail": result}
+
 
 class MacOSService:
     """Native Mac control via AppleScript and shell commands."""
 
+    # Fixed script bodies; user values arrive as ``argv`` so they are never
+    # spliced into AppleScript source (no escaping, no injection).
+    SAFARI_OPEN_SCRIPT = """on run argv
+    tell application "Safari" to open location (item 1 of argv)
+end run"""
+
+    FINDER_OPEN_SCRIPT = """on run argv
+    tell application "Finder" to open (POSIX file (item 1 of argv))
+end run"""
+
+    MAIL_SEND_SCRIPT = """on run argv
+    tell application "Mail"
+        set newMessage to make new outgoing message with properties ¬
+            {subject:(item 2 of argv), content:(item 3 of argv), visible:true}
+        tell newMessage
+            make new to recipient with properties {address:(item 1 of argv)}
+        end tell
+        send newMessage
+    end tell
+end run"""
+
+    CALENDAR_EVENT_SCRIPT = """on run argv
+    tell application "Calendar"
+        tell calendar 1
+            make new event with properties ¬
+                {summary:(item 1 of argv), start date:date (item 2 of argv)}
+        end tell
+    end tell
+end run"""
+
+    QUIT_APP_SCRIPT = """on run argv
+    tell application (item 1 of argv) to quit
+end run"""
+
+    NOTIFICATION_SCRIPT = """on run argv
+    if item 3 of argv is "" then
+        display notification (item 2 of argv) with title (item 1 of argv)
+    else
+        display notification (item 2 of argv) with title (item 1 of argv) ¬
+            subtitle (item 3 of argv)
+    end if
+end run"""
+
+    # Runs a script (item 1) with the remaining items as its argv inside the
+    # persistent interpreter and tags the outcome so it can be told apart from
+    # REPL chatter.
+    _SESSION_WRAPPER = """on run argv
+    try
+        set r to run script (item 1 of argv) with parameters (rest of argv)
+        try
+            set r to r as text
+        on error
+            set r to ""
+        end try
+        return "__OK__" & r
+    on error errMsg
+        return "__ERR__" & errMsg
+    end try
+end run"""
+    _SESSION_WRAPPER_LITERAL = _applescript_literal(_SESSION_WRAPPER)
+
+    _APPLESCRIPT_TIMEOUT_S = 30.0
+
+    def __init__(self) -> None:
+        self._osa_proc: Optional[asyncio.subprocess.Process] = None
+        self._osa_lock = asyncio.Lock()
+        self._osa_seq = 0
+        self._osa_disabled = False
+        # action → (method, params → call args, result → response)
+        self._actions: Dict[str, _ActionEntry] = {
+            "safari_open": (self.safari_open, lambda p: (p["url"],), _ok_detail),
+            "finder_open": (
+                self.finder_open_folder,
+                lambda p: (p["path"],),
+                _ok_detail,
+            ),
+            "volume_set": (
+                self.set_volume,
+                lambda p: (int(p.get("level", 50)),),
+                _ok_detail,
+            ),
+            "sleep_display": (self.sleep_display, _no_args, _ok_detail),
+            "open_app": (
+                self.open_application,
+                lambda p: (p["app_name"],),
+                _ok_detail,
+            ),
+            "quit_app": (self.quit_app, lambda p: (p["app_name"],), _ok_detail),
+            "list_apps": (
+                self.list_running_apps,
+                _no_args,
+                lambda apps: {"status": "ok", "data": {"apps": apps}},
+            ),
+            "battery": (
+                self.get_battery_status,
+                _no_args,
+                lambda batt: {"status": "ok", "data": batt},
+            ),
+            "notification": (
+                self.show_notification,
+                lambda p: (
+                    p.get("title", "AI Hub"),
+                    p.get("message", ""),
+                    p.get("subtitle", ""),
+                ),
+                _ok_detail,
+            ),
+            "mail_send": (
+                self.mail_send,
+                lambda p: (p["to"], p["subject"], p.get("body", "")),
+                _ok_detail,
+            ),
+        }
+
     # ── AppleScript helper ─────────────────────────────────────
 
-    async def _run_applescript(self, script: str) -> str:
-        """Execute an AppleScript and return stdout."""
+    async def _run_applescript(
+        self, script: str, *args: str, timeout: Optional[float] = None
+    ) -> str:
+        """Execute an AppleScript and return stdout.
+
+        *args* are passed to the script's ``on run argv`` handler.  Scripts run
+        in one long-lived ``osascript -i`` child; if that cannot be started, or
+        once it has timed out, hit EOF or answered off-protocol, calls fall back
+        to a one-shot ``osascript -e``.  The failing call itself is not retried,
+        since its script may already have run. *timeout* defaults to
+        _APPLESCRIPT_TIMEOUT_S.
+        """
+        if timeout is None:
+            timeout = self._APPLESCRIPT_TIMEOUT_S
+        if not self._osa_disabled:
+            async with self._osa_lock:
+                try:
+                    proc = await self._ensure_osa()
+                except OSError as exc:
+                    logger.debug("Persistent osascript unavailable: %s", exc)
+                    self._osa_disabled = True
+                else:
+                    return await self._osa_exchange(proc, script, args, timeout)
+        return await self._run_applescript_once(script, *args, timeout=timeout)
+
+    async def _run_applescript_once(
+        self, script: str, *args: str, timeout: float
+    ) -> str:
         proc = await asyncio.create_subprocess_exec(
             "osascript",
             "-e",
             script,
+            *args,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
         )
-        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=30.0)
+        stdout, stderr = await communicate_or_kill(proc, timeout=timeout)
         if proc.returncode != 0:
             raise RuntimeError(stderr.decode().strip() or "AppleScript error")
         return stdout.decode().strip()
 
+    async def _ensure_osa(self) -> asyncio.subprocess.Process:
+        """Return the running ``osascript -i`` child, (re)starting it if needed."""
+        proc = self._osa_proc
+        if proc is not None and proc.returncode is None:
+            return proc
+        self._osa_proc = await asyncio.create_subprocess_exec(
+            "osascript",
+            "-i",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        return self._osa_proc
+
+    async def _osa_exchange(
+        self,
+        proc: asyncio.subprocess.Process,
+        script: str,
+        args: Tuple[str, ...],
+        timeout: float,
+    ) -> str:
+        """Send one script to the interactive child and read until its sentinel."""
+        self._osa_seq += 1
+        sentinel = f"__END_{self._osa_seq}__"
+        params = ", ".join(_applescript_literal(v) for v in (script, *args))
+        request = (
+            f"run script {self._SESSION_WRAPPER_LITERAL} "
+            f"with parameters {{{params}}}\n"
+            f'"{sentinel}"\n'
+        )
+
+        async def _read_reply() -> List[str]:
+            lines: List[str] = []
+            while True:
+                raw = await proc.stdout.readline()
+                if not raw:
+                    raise _OsaSessionError("osascript session exited unexpectedly")
+                line = raw.decode(errors="replace").rstrip("\r\n")
+                if sentinel in line:
+                    return lines
+                lines.append(line)
+
+        try:
+            proc.stdin.write(request.encode())
+            await proc.stdin.drain()
+            lines = await asyncio.wait_for(_read_reply(), timeout=timeout)
+        except (asyncio.TimeoutError, _OsaSessionError, OSError) as exc:
+            await self._disable_osa(exc or "timeout")
+            raise
+        except BaseException:
+            # A caller's cancellation: the child may still owe (part of) this
+            # reply, which the next call would read as its own.  Drop it; the
+            # next call respawns.
+            await self._stop_osa()
+            raise
+
+        try:
+            return _parse_session_reply(lines)
+        except _OsaSessionError as exc:
+            await self._disable_osa(exc)
+            raise
+
+    async def _disable_osa(self, reason: object) -> None:
+        """Stop the session for good, e.g. when the REPL buffers piped output.
+
+        Later calls use one-shot ``osascript -e`` instead of stalling on it.
+        """
+        logger.warning("Persistent osascript disabled: %s", reason)
+        self._osa_disabled = True
+        await self._stop_osa()
+
+    async def _stop_osa(self) -> None:
+        proc, self._osa_proc = self._osa_proc, None
+        if proc is None or proc.returncode is not None:
+            return
+        kill_process_group(proc)
+        await proc.wait()
+
+    async def aclose(self) -> None:
+        """Stop the persistent osascript child (called on app shutdown)."""
+        await self._stop_osa()
+
     async def _run_shell(self, *args: str) -> str:
         """Execute a shell command and return stdout."""
         proc = await asyncio.create_subprocess_exec(
             *args,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
         )
-        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=30.0)
+        stdout, stderr = await communicate_or_kill(proc, timeout=30.0)
         if proc.returncode != 0:
             raise RuntimeError(stderr.decode().strip() or f"Command failed: {args[0]}")
         return stdout.decode().strip()
 
+    async def run_script(
+        self, script: str, *args: str, timeout: Optional[float] = None
+    ) -> str:
+        """Run an ``on run argv`` AppleScript on behalf of another service.
+
+        Shares the persistent osascript session used by the actions here. Pass
+        *timeout* rather than wrapping the call in ``asyncio.wait_for``: an
+        overrun then restarts the session instead of cancelling mid-reply.
+        """
+        return await self._run_applescript(script, *args, timeout=timeout)
+
     # ── Applications ───────────────────────────────────────────
 
     async def safari_open(self, url: str) -> str:
         """Open a URL in Safari."""
-        script = f'tell application "Safari" to open location "{url}"'
-        await self._run_applescript(script)
+        await self._run_applescript(self.SAFARI_OPEN_SCRIPT, url)
         return f"Opened {url} in Safari"
 
     async def finder_open_folder(self, path: str) -> str:
         """Open a folder in Finder."""
-        script = f'tell application "Finder" to open POSIX file "{path}"'
-        await self._run_applescript(script)
+        await self._run_applescript(self.FINDER_OPEN_SCRIPT, path)
         return f"Opened {path} in Finder"
 
     async def mail_send(self, to: str, subject: str, body: str) -> str:
         """Send an email via Mail.app."""
-        script = f"""
-            tell application "Mail"
-                set newMessage to make new outgoing message with properties {{
-                    subject: "{subject}",
-                    content: "{body}",
-                    visible: true
-                }}
-                tell newMessage
-                    make new to recipient with properties {{address: "{to}"}}
-                end tell
-                send newMessage
-            end tell
-        """
-        await self._run_applescript(script)
+        await self._run_applescript(self.MAIL_SEND_SCRIPT, to, subject, body)
         return f"Email sent to {to}"
 
     async def calendar_create_event(
         self, title: str, start_iso: str, duration_minutes: int = 60
     ) -> str:
         """Create a Calendar event."""
-        script = f"""
-            tell application "Calendar"
-                tell calendar 1
-                    make new event with properties {{
-                        summary: "{title}",
-                        start date: date "{start_iso}"
-                    }}
-                end tell
-            end tell
-        """
-        await self._run_applescript(script)
+        await self._run_applescript(self.CALENDAR_EVENT_SCRIPT, title, start_iso)
         return f"Calendar event '{title}' created"
 
     async def quit_app(self, app_name: str) -> str:
         """Quit a running application."""
-        script = f'tell application "{app_name}" to quit'
-        await self._run_applescript(script)
+        await self._run_applescript(self.QUIT_APP_SCRIPT, app_name)
         return f"Quit {app_name}"
 
     async def open_application(self, app_name: str) -> str:
@@ -110,11 +491,15 @@ class MacOSService:
 
     async def sleep_display(self) -> str:
         """Put the display to sleep."""
-        await self._run_shell("pmset", "displaysleepnow")
+        if not await asyncio.to_thread(_native_sleep_display):
+            await self._run_shell("pmset", "displaysleepnow")
         return "Display sleeping"
 
     async def get_battery_status(self) -> Dict[str, Any]:
         """Return battery level and charging status."""
+        status = await asyncio.to_thread(_native_battery_status)
+        if status is not None:
+            return status
         output = await self._run_shell("pmset", "-g", "batt")
         return {"raw": output}
 
@@ -130,7 +515,7 @@ class MacOSService:
         """List currently running Mac applications."""
         script = 'tell application "System Events" to get name of (processes where background only is false)'
         result = await self._run_applescript(script)
-        return [a.strip() for a in result.split(",") if a.strip()]
+        return await parse_output(_split_app_list, result)
 
     # ── Notifications ──────────────────────────────────────────
 
@@ -138,48 +523,19 @@ class MacOSService:
         self, title: str, message: str, subtitle: str = ""
     ) -> str:
         """Show a macOS notification banner."""
-        subtitle_part = f', subtitle:"{subtitle}"' if subtitle else ""
-        script = f'display notification "{message}"{subtitle_part} with title "{title}"'
-        await self._run_applescript(script)
+        await self._run_applescript(self.NOTIFICATION_SCRIPT, title, message, subtitle)
         return "Notification shown"
 
     # ── Generic action dispatcher ──────────────────────────────
 
     async def run_action(self, action: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """Dispatch a named action with params."""
+        entry = self._actions.get(action)
+        if entry is None:
+            return {"status": "error", "detail": f"Unknown action: {action}"}
+        method, build_args, wrap = entry
         try:
-            if action == "safari_open":
-                result = await self.safari_open(params["url"])
-            elif action == "finder_open":
-                result = await self.finder_open_folder(params["path"])
-            elif action == "volume_set":
-                result = await self.set_volume(int(params.get("level", 50)))
-            elif action == "sleep_display":
-                result = await self.sleep_display()
-            elif action == "open_app":
-                result = await self.open_application(params["app_name"])
-            elif action == "quit_app":
-                result = await self.quit_app(params["app_name"])
-            elif action == "list_apps":
-                apps = await self.list_running_apps()
-                return {"status": "ok", "data": {"apps": apps}}
-            elif action == "battery":
-                batt = await self.get_battery_status()
-                return {"status": "ok", "data": batt}
-            elif action == "notification":
-                result = await self.show_notification(
-                    params.get("title", "AI Hub"),
-                    params.get("message", ""),
-                    params.get("subtitle", ""),
-                )
-            elif action == "mail_send":
-                result = await self.mail_send(
-                    params["to"], params["subject"], params.get("body", "")
-                )
-            else:
-                return {"status": "error", "detail": f"Unknown action: {action}"}
-
-            return {"status": "ok", "detail": result}
+            return wrap(await method(*build_args(params)))
         except asyncio.TimeoutError:
             return {"status": "error", "detail": "AppleScript timed out"}
         except RuntimeError as exc:
@@ -188,11 +544,6 @@ class MacOSService:
             return {"status": "error", "detail": f"Missing required param: {exc}"}
 
 
-_macos_service: Optional[MacOSService] = None
-
-
+@functools.cache
 def get_macos_service() -> MacOSService:
-    global _macos_service
-    if _macos_service is None:
-        _macos_service = MacOSService()
-    return _macos_service
+    return MacOSService()
@@ -1,7 +1,9 @@
 """Notification service – push notifications via ntfy.sh."""
 
+import asyncio
+import functools
 import logging
-from typing import Optional
+from typing import Dict, List, Optional, Set, Tuple
 
 import httpx
 
@@ -9,10 +11,53 @@ from app.services.settings_service import get_settings_service
 
 logger = logging.getLogger(__name__)
 
+# Strong references to in-flight background sends so they are not GC'd
+_background_tasks: Set["asyncio.Task[bool]"] = set()
+
+_COALESCE_WINDOW_S = 0.2
+
+
+def _resolve(future: "asyncio.Future[bool]", task: "asyncio.Task[bool]") -> None:
+    if not future.done():
+        future.set_result(not task.cancelled() and task.result())
+
 
 class NotificationService:
     def __init__(self) -> None:
         self._settings = get_settings_service()
+        self._client: Optional[httpx.AsyncClient] = None
+        # send_nowait() coalescing: (title, priority, tags) → (messages, future)
+        self._pending: Dict[
+            Tuple[str, str, Tuple[str, ...]], Tuple[List[str], "asyncio.Future[bool]"]
+        ] = {}
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._coalesce_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client so notifications reuse the ntfy connection."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=5.0,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Send what send_nowait() still holds, then close the shared HTTP client.
+
+        Called on app shutdown, so notifications waiting in the coalescing
+        window – or already being posted – are not lost.
+        """
+        loop = asyncio.get_running_loop()
+        if self._flush_timer is not None and self._coalesce_loop is loop:
+            self._flush_timer.cancel()
+            self._flush()
+        in_flight = [t for t in _background_tasks if t.get_loop() is loop]
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def send(
         self,
@@ -43,32 +88,76 @@ class NotificationService:
             headers["Tags"] = ",".join(tags)
 
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                resp = await client.post(url, content=message.encode(), headers=headers)
-                resp.raise_for_status()
-                return True
+            resp = await self._get_client().post(
+                url, content=message.encode(), headers=headers
+            )
+            resp.raise_for_status()
+            return True
         except Exception as exc:
             logger.warning("Notification failed: %s", exc)
             return False
 
-    async def notify_task_complete(
+    def send_nowait(
+        self,
+        title: str,
+        message: str,
+        priority: str = "default",
+        tags: Optional[list] = None,
+    ) -> "asyncio.Future[bool]":
+        """Queue a notification and return a future for its outcome immediately.
+
+        Notifications with the same title/priority/tags arriving within
+        ``_COALESCE_WINDOW_S`` are merged into one POST (duplicate messages
+        collapse, the rest are joined line by line), so a burst of task
+        completions costs one ntfy round-trip instead of N.  Await the returned
+        future only if the outcome matters.
+        """
+        loop = asyncio.get_running_loop()
+        if self._coalesce_loop is not loop:
+            self._pending = {}
+            self._flush_timer = None
+            self._coalesce_loop = loop
+        key = (title, priority, tuple(tags or ()))
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = ([], loop.create_future())
+        if message not in batch[0]:
+            batch[0].append(message)
+        if self._flush_timer is None:
+            self._flush_timer = loop.call_later(_COALESCE_WINDOW_S, self._flush)
+        return batch[1]
+
+    def _flush(self) -> None:
+        self._flush_timer = None
+        pending, self._pending = self._pending, {}
+        for (title, priority, tags), (messages, future) in pending.items():
+            task = asyncio.ensure_future(
+                self.send(title, "\n".join(messages), priority, list(tags) or None)
+            )
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+            task.add_done_callback(functools.partial(_resolve, future))
+
+    def notify_task_complete(
         self, task_name: str, result: str = "completed"
-    ) -> bool:
-        return await self.send(
+    ) -> "asyncio.Future[bool]":
+        return self.send_nowait(
             title=f"Task {result}",
             message=f"'{task_name}' {result}",
             tags=["white_check_mark"],
         )
 
-    async def notify_agent_complete(self, agent_id: str, agent_type: str) -> bool:
-        return await self.send(
+    def notify_agent_complete(
+        self, agent_id: str, agent_type: str
+    ) -> "asyncio.Future[bool]":
+        return self.send_nowait(
             title="Agent finished",
             message=f"{agent_type} agent {agent_id[:8]} completed",
             tags=["robot"],
         )
 
-    async def notify_error(self, context: str, error: str) -> bool:
-        return await self.send(
+    def notify_error(self, context: str, error: str) -> "asyncio.Future[bool]":
+        return self.send_nowait(
             title="Error",
             message=f"{context}: {error}",
             priority="high",
@@ -76,11 +165,6 @@ class NotificationService:
         )
 
 
-_notification_service: Optional[NotificationService] = None
-
-
+@functools.cache
 def get_notification_service() -> NotificationService:
-    global _notification_service
-    if _notification_service is None:
-        _notification_service = NotificationService()
-    return _notification_service
+    return NotificationService()
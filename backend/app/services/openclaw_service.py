@@ -1,13 +1,20 @@
 """OpenClaw service – Mac computer control automation."""
 
 import asyncio
-import base64
 import logging
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Dict, Optional, Set
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+try:
+    from pybase64 import b64encode as _b64encode  # SIMD encoder
+except ImportError:  # optional – stdlib is fine, just slower on big images
+    from base64 import b64encode as _b64encode
 
 from app.models.schemas import OpenClawActionResponse
+from app.services.macos_service import get_macos_service
 from app.services.settings_service import get_settings_service
+from app.utils.subprocess_utils import run_in_thread as _spawn
 
 logger = logging.getLogger(__name__)
 
@@ -22,118 +29,170 @@ KNOWN_ACTIONS: Set[str] = {
     "find_element",
 }
 
+# Known legacy actions with no implementation behind them yet
+_NOT_IMPLEMENTED_ACTIONS = frozenset(
+    {"start_whatsapp_agent", "restart_telegram_agent", "run_workflow"}
+)
+
+# Read size for screenshot encoding – a multiple of 3, so every chunk encodes
+# to base64 without padding and the pieces can simply be concatenated
+_B64_CHUNK = 3 * 21 * 1024
+
+# screencapture -R x,y,w,h; missing keys fall back to a full-HD rectangle
+_REGION_DEFAULTS = {"x": 0, "y": 0, "width": 1920, "height": 1080}
+_REGION_KEYS = itemgetter("x", "y", "width", "height")
+
+# Screenshot formats → MIME type; jpg is written by screencapture itself,
+# webp is converted from a PNG capture by cwebp
+_SCREENSHOT_MIME = {"png": "image/png", "jpg": "image/jpeg", "webp": "image/webp"}
+_WEBP_QUALITY = "80"
+
+
+def _region_arg(region: Dict[str, int]) -> str:
+    return ",".join(map(str, _REGION_KEYS({**_REGION_DEFAULTS, **region})))
+
+
+def _encode_file_b64(path: str) -> Optional[str]:
+    """Base64 of the file at *path*, or None if it does not exist.
+
+    Reads and encodes in fixed chunks, so the raw image is never held in
+    memory next to its encoding.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    encoded = bytearray()
+    with f:
+        while chunk := f.read(_B64_CHUNK):
+            encoded += _b64encode(chunk)
+    return encoded.decode("ascii")
+
 
 class OpenClawService:
     """Mac computer control via OpenClaw CLI and system utilities."""
 
+    # Run in MacOSService's persistent osascript session (no interpreter start
+    # per keystroke/click); values arrive as argv, never spliced into source.
+    CLICK_SCRIPT = """on run argv
+    tell application "System Events" to ¬
+        click at {(item 1 of argv) as integer, (item 2 of argv) as integer}
+end run"""
+
+    TYPE_TEXT_SCRIPT = """on run argv
+    tell application "System Events" to keystroke (item 1 of argv)
+end run"""
+
     def __init__(self) -> None:
         self._settings = get_settings_service()
+        self._binary_cache: Optional[Tuple[Any, str]] = None
 
     def _binary(self) -> str:
-        cfg = self._settings.get_integration_config("openclaw")
-        return cfg.get("binary_path", "openclaw")
+        # Resolved once per settings version instead of on every subprocess
+        version = self._settings.version
+        if self._binary_cache is None or self._binary_cache[0] != version:
+            cfg = self._settings.get_integration_config("openclaw")
+            self._binary_cache = (version, cfg.get("binary_path", "openclaw"))
+        return self._binary_cache[1]
 
     async def _run_binary(self, *args: str) -> str:
         """Run the OpenClaw binary with arguments."""
-        proc = await asyncio.create_subprocess_exec(
-            self._binary(),
-            *args,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=30.0)
+        proc = await _spawn([self._binary(), *args], timeout=30.0)
         if proc.returncode != 0:
-            raise RuntimeError(stderr.decode().strip() or "OpenClaw error")
-        return stdout.decode().strip()
+            raise RuntimeError(proc.stderr.decode().strip() or "OpenClaw error")
+        return proc.stdout.decode().strip()
 
     # ── Screenshot ─────────────────────────────────────────────
 
     async def screenshot(
-        self, output_path: Optional[str] = None, region: Optional[Dict[str, int]] = None
+        self,
+        output_path: Optional[str] = None,
+        region: Optional[Dict[str, int]] = None,
+        fmt: str = "png",
     ) -> Dict[str, Any]:
         """
         Take a screenshot.
         Falls back to screencapture (built-in macOS) if OpenClaw is unavailable.
+        *fmt* is ``png``, ``jpg`` or ``webp`` – the lossy ones are several
+        times smaller to encode and ship.
         """
+        output_path = await self._capture(output_path, region, fmt)
+
+        # Encode as base64 for API response (off the event loop – Retina
+        # screenshots run to several MB)
+        data = await asyncio.to_thread(_encode_file_b64, output_path)
+        if data is not None:
+            return {"status": "ok", "path": output_path, "format": fmt, "base64": data}
+        return {"status": "error", "detail": "Screenshot failed"}
+
+    async def screenshot_bytes(
+        self, fmt: str = "jpg", region: Optional[Dict[str, int]] = None
+    ) -> Tuple[bytes, str]:
+        """Take a screenshot and return ``(image bytes, MIME type)`` – no base64."""
+        path = await self._capture(None, region, fmt)
+        try:
+            data = await asyncio.to_thread(Path(path).read_bytes)
+        except FileNotFoundError:
+            raise RuntimeError("Screenshot failed") from None
+        return data, _SCREENSHOT_MIME[fmt]
+
+    async def _capture(
+        self, output_path: Optional[str], region: Optional[Dict[str, int]], fmt: str
+    ) -> str:
+        """Run screencapture into *output_path* and return the path."""
+        if fmt not in _SCREENSHOT_MIME:
+            raise ValueError(f"Unsupported screenshot format: {fmt}")
         if output_path is None:
-            output_path = "/tmp/ai-hub-screenshot.png"
+            output_path = f"/tmp/ai-hub-screenshot.{fmt}"
 
-        args = ["screencapture", "-x"]
+        # screencapture cannot write WebP: capture PNG and convert with cwebp
+        capture_path = f"{output_path}.png" if fmt == "webp" else output_path
+        args = ["screencapture", "-x", "-t", "png" if fmt == "webp" else fmt]
         if region:
-            x = region.get("x", 0)
-            y = region.get("y", 0)
-            w = region.get("width", 1920)
-            h = region.get("height", 1080)
-            args += ["-R", f"{x},{y},{w},{h}"]
-        args.append(output_path)
-
-        proc = await asyncio.create_subprocess_exec(
-            *args,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        await asyncio.wait_for(proc.communicate(), timeout=10.0)
+            args += ["-R", _region_arg(region)]
+        args.append(capture_path)
 
-        # Encode as base64 for API response
-        p = Path(output_path)
-        if p.exists():
-            data = base64.b64encode(p.read_bytes()).decode()
-            return {"status": "ok", "path": output_path, "base64": data}
-        return {"status": "error", "detail": "Screenshot failed"}
+        await _spawn(args, timeout=10.0)
+
+        if fmt == "webp":
+            try:
+                proc = await _spawn(
+                    ["cwebp", "-quiet", "-q", _WEBP_QUALITY, capture_path]
+                    + ["-o", output_path],
+                    timeout=10.0,
+                )
+            finally:
+                Path(capture_path).unlink(missing_ok=True)
+            if proc.returncode != 0:
+                raise RuntimeError(proc.stderr.decode().strip() or "cwebp failed")
+        return output_path
 
     # ── Mouse / keyboard ───────────────────────────────────────
 
     async def click_at(self, x: int, y: int) -> str:
         """Simulate a mouse click at (x, y). Uses cliclick if available."""
         try:
-            proc = await asyncio.create_subprocess_exec(
-                "cliclick",
-                f"c:{x},{y}",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            await asyncio.wait_for(proc.communicate(), timeout=5.0)
+            await _spawn(["cliclick", f"c:{x},{y}"], timeout=5.0)
             return f"Clicked at ({x}, {y})"
         except FileNotFoundError:
             # cliclick not installed – use AppleScript
-            script = f'tell application "System Events" to click at {{{x}, {y}}}'
-            proc = await asyncio.create_subprocess_exec(
-                "osascript",
-                "-e",
-                script,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
+            await get_macos_service().run_script(
+                self.CLICK_SCRIPT, str(x), str(y), timeout=5.0
             )
-            await asyncio.wait_for(proc.communicate(), timeout=5.0)
             return f"Clicked at ({x}, {y}) via AppleScript"
 
     async def type_text(self, text: str) -> str:
         """Simulate keyboard typing via AppleScript."""
-        script = f'tell application "System Events" to keystroke "{text}"'
-        proc = await asyncio.create_subprocess_exec(
-            "osascript",
-            "-e",
-            script,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        await asyncio.wait_for(proc.communicate(), timeout=10.0)
+        await get_macos_service().run_script(self.TYPE_TEXT_SCRIPT, text, timeout=10.0)
         return f"Typed {len(text)} characters"
 
     # ── Application control ────────────────────────────────────
 
     async def open_application(self, app_name: str) -> str:
         """Launch a Mac application."""
-        proc = await asyncio.create_subprocess_exec(
-            "open",
-            "-a",
-            app_name,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        _, stderr = await asyncio.wait_for(proc.communicate(), timeout=10.0)
+        proc = await _spawn(["open", "-a", app_name], timeout=10.0)
         if proc.returncode != 0:
-            raise RuntimeError(stderr.decode().strip())
+            raise RuntimeError(proc.stderr.decode().strip())
         return f"Opened {app_name}"
 
     # ── Legacy action runner ───────────────────────────────────
@@ -147,7 +206,7 @@ class OpenClawService:
                 data={},
             )
         # Legacy actions not yet wired to real implementations
-        if action in ("start_whatsapp_agent", "restart_telegram_agent", "run_workflow"):
+        if action in _NOT_IMPLEMENTED_ACTIONS:
             return OpenClawActionResponse(
                 status="not_implemented",
                 detail="Action defined but not yet implemented. Use /api/integrations/openclaw instead.",
@@ -165,41 +224,98 @@ class OpenClawService:
         self, action: str, params: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Async dispatcher for all OpenClaw actions."""
-        try:
-            if action == "screenshot":
-                return await self.screenshot(
-                    params.get("output_path"),
-                    params.get("region"),
-                )
-            elif action == "click_at":
-                result = await self.click_at(int(params["x"]), int(params["y"]))
-                return {"status": "ok", "detail": result}
-            elif action == "type_text":
-                result = await self.type_text(params["text"])
-                return {"status": "ok", "detail": result}
-            elif action == "open_application":
-                result = await self.open_application(params["app_name"])
-                return {"status": "ok", "detail": result}
-            elif action in (
-                "start_whatsapp_agent",
-                "restart_telegram_agent",
-                "run_workflow",
-            ):
+        handler = _DISPATCH.get(action)
+        if handler is None:
+            if action in _NOT_IMPLEMENTED_ACTIONS:
                 return {
                     "status": "not_implemented",
                     "detail": "Action defined but not yet implemented",
                 }
-            else:
-                return {"status": "error", "detail": f"Unknown action: {action}"}
+            return {"status": "error", "detail": f"Unknown action: {action}"}
+        try:
+            return await handler(self, params)
         except asyncio.TimeoutError:
             return {"status": "error", "detail": "Action timed out"}
         except FileNotFoundError:
             return {"status": "error", "detail": "Required tool not found"}
         except KeyError as exc:
             return {"status": "error", "detail": f"Missing required param: {exc}"}
-        except RuntimeError as exc:
+        except (RuntimeError, ValueError) as exc:
             return {"status": "error", "detail": str(exc)}
 
+    async def run_actions_async(
+        self, actions: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Run several actions concurrently; results keep the input order.
+
+        Each item is ``{"action", "params", "depends_on"}``.  An action with
+        ``depends_on`` (index of an earlier item) starts only after that one
+        finished, and is skipped if it failed – so screenshot → click → type
+        chains stay ordered while independent actions overlap.
+        """
+        tasks: List[asyncio.Task] = []
+        for i, spec in enumerate(actions):
+            dep = spec.get("depends_on")
+            if dep is not None and not (isinstance(dep, int) and 0 <= dep < i):
+                coro = _error("depends_on must be the index of an earlier action")
+            else:
+                coro = self._run_after(
+                    tasks[dep] if dep is not None else None,
+                    dep,
+                    spec.get("action", ""),
+                    spec.get("params") or {},
+                )
+            tasks.append(asyncio.ensure_future(coro))
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return [
+            (
+                {"status": "error", "detail": str(result)}
+                if isinstance(result, BaseException)
+                else result
+            )
+            for result in results
+        ]
+
+    async def _run_after(
+        self,
+        prerequisite: Optional["asyncio.Task[Dict[str, Any]]"],
+        index: Optional[int],
+        action: str,
+        params: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        if prerequisite is not None:
+            await asyncio.wait([prerequisite])
+            if (
+                prerequisite.exception() is not None
+                or prerequisite.result().get("status") != "ok"
+            ):
+                return {
+                    "status": "error",
+                    "detail": f"Skipped: action {index} did not succeed",
+                }
+        return await self.run_action_async(action, params)
+
+
+async def _error(detail: str) -> Dict[str, Any]:
+    return {"status": "error", "detail": detail}
+
+
+async def _ok_detail(aw: Awaitable[str]) -> Dict[str, Any]:
+    return {"status": "ok", "detail": await aw}
+
+
+# action → handler(service, params); built once, looked up per call
+_DISPATCH: Dict[
+    str, Callable[[OpenClawService, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+] = {
+    "screenshot": lambda svc, p: svc.screenshot(
+        p.get("output_path"), p.get("region"), p.get("format", "png")
+    ),
+    "click_at": lambda svc, p: _ok_detail(svc.click_at(int(p["x"]), int(p["y"]))),
+    "type_text": lambda svc, p: _ok_detail(svc.type_text(p["text"])),
+    "open_application": lambda svc, p: _ok_detail(svc.open_application(p["app_name"])),
+}
+
 
 _openclaw_service: Optional[OpenClawService] = None
 
@@ -1648,18 +1648,25 @@ class ResidentAgent(BackgroundService):
                     from app.services.git_service import GitService
 
                     git_svc = GitService()
-                    for name, project in projects.items():
-                        path = (
+                    paths = {
+                        name: (
                             project
                             if isinstance(project, str)
                             else project.get("path", "")
                         )
-                        if path:
-                            try:
-                                status = await git_svc.status(path)
-                                git_statuses[name] = status
-                            except Exception:
-                                git_statuses[name] = {"error": "failed to get status"}
+                        for name, project in projects.items()
+                    }
+                    paths = {name: path for name, path in paths.items() if path}
+                    statuses = await asyncio.gather(
+                        *(git_svc.status(path) for path in paths.values()),
+                        return_exceptions=True,
+                    )
+                    for name, status in zip(paths, statuses):
+                        git_statuses[name] = (
+                            {"error": "failed to get status"}
+                            if isinstance(status, BaseException)
+                            else status
+                        )
             except Exception as exc:
                 logger.debug("Resident periodic git check failed: %s", exc)
 
@@ -1,18 +1,89 @@
-"""Session service – persists conversation history as JSON files."""
+"""Session service – persists conversation history as JSON files.
+
+Each session is a metadata file ``{id}.json`` plus an append-only message log
+``{id}.msgs.jsonl`` (one JSON object per line).  Sessions written before the
+log existed keep their messages inline under ``"messages"`` in the metadata
+file; those are read as the start of the history.
+"""
 
 import asyncio
-import json
 import logging
+import os
+import threading
 import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+
+from app.utils.file_utils import atomic_write_bytes
 
 logger = logging.getLogger(__name__)
 
 SESSIONS_DIR = Path(__file__).parent.parent.parent / "data" / "sessions"
 
+# Same layout json.dump(indent=2, ensure_ascii=False) produced
+_JSON_OPTS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+_Stamp = Tuple[int, int]
+
+
+def _stamp(path: Path) -> Optional[_Stamp]:
+    """(mtime_ns, size) of *path*, or None if it does not exist."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class _FileCache:
+    """LRU of parsed files, each entry valid while the file's stamp matches.
+
+    Keyed by path, so a changed SESSIONS_DIR never serves stale entries.
+    Thread-safe – routes call the service from worker threads.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self._maxsize = maxsize
+        self._entries: "OrderedDict[Path, Tuple[_Stamp, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: Path, stamp: Optional[_Stamp]) -> Any:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != stamp:
+                return None
+            self._entries.move_to_end(path)
+            return entry[1]
+
+    def put(self, path: Path, stamp: Optional[_Stamp], value: Any) -> None:
+        with self._lock:
+            self._entries[path] = (stamp, value)
+            self._entries.move_to_end(path)
+            if len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def restamp(self, path: Path, old: Optional[_Stamp], new: Optional[_Stamp]) -> None:
+        """Carry an entry over a change that did not alter its content."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == old:
+                self._entries[path] = (new, entry[1])
+
+    def pop(self, path: Path) -> None:
+        with self._lock:
+            self._entries.pop(path, None)
+
+
+# Parsed metadata files and message logs of recently used sessions
+_meta_cache = _FileCache(64)
+_log_cache = _FileCache(64)
+_append_lock = threading.Lock()
+
 
 class SessionService:
     def __init__(self) -> None:
@@ -20,13 +91,13 @@ class SessionService:
 
     # ── Session lifecycle ─────────────────────────────────────
 
-    def create_session(self) -> str:
+    def create_session(self, session_id: Optional[str] = None) -> str:
         """Create a new session and return its ID."""
-        session_id = str(uuid.uuid4())[:8]
+        session_id = session_id or str(uuid.uuid4())[:8]
         data = {
             "session_id": session_id,
             "created_at": _now(),
-            "messages": [],
+            "preview": "",
             "artifacts": [],
             "active_agents": [],
         }
@@ -36,42 +107,56 @@ class SessionService:
     def session_exists(self, session_id: str) -> bool:
         return self._path(session_id).exists()
 
-    def list_sessions(self) -> List[Dict[str, Any]]:
-        """Return metadata for all sessions, sorted by modification time (newest first)."""
-        result = []
-        for f in sorted(
-            SESSIONS_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True
-        ):
-            try:
-                data = self._read_raw(f.stem)
-                messages = data.get("messages", [])
+    async def list_sessions(self) -> List[Dict[str, Any]]:
+        """Return metadata for all sessions, sorted by modification time (newest first).
 
-                # Find first user message for preview
-                preview = ""
-                for msg in messages:
-                    if msg.get("role") == "user":
-                        content = msg.get("content", "").strip()
-                        preview = content[:50]
-                        break
+        The directory listing and each file's stat + parse run in worker
+        threads, so a slow disk never blocks the event loop.
+        """
+        files = await asyncio.to_thread(list, SESSIONS_DIR.glob("*.json"))
+        summaries = await asyncio.gather(
+            *(asyncio.to_thread(self._session_summary, f) for f in files)
+        )
+        result = [s for s in summaries if s is not None]
+        result.sort(key=lambda s: s["updated_at"], reverse=True)
+        return result
 
-                result.append(
-                    {
-                        "session_id": data["session_id"],
-                        "created_at": data.get("created_at", ""),
-                        "updated_at": f.stat().st_mtime,
-                        "message_count": len(messages),
-                        "preview": preview + ("..." if len(preview) == 50 else ""),
-                    }
+    def _session_summary(self, f: Path) -> Optional[Dict[str, Any]]:
+        """list_sessions() entry for one session file, or None if unreadable."""
+        try:
+            updated_at = f.stat().st_mtime
+            data = self._read_raw(f.stem)
+
+            preview = data.get("preview")
+            if preview is None:
+                # Sessions created before the preview was stored in metadata
+                preview = next(
+                    (
+                        _preview(msg.get("content", ""))
+                        for msg in self._messages(f.stem, data)
+                        if msg.get("role") == "user"
+                    ),
+                    "",
                 )
-            except Exception as e:
-                logger.warning("Failed to load session %s: %s", f, e)
-                continue
-        return result
+
+            return {
+                "session_id": data["session_id"],
+                "created_at": data.get("created_at", ""),
+                "updated_at": updated_at,
+                "message_count": self._message_count(f.stem, data),
+                "preview": preview + ("..." if len(preview) == 50 else ""),
+            }
+        except Exception as e:
+            logger.warning("Failed to load session %s: %s", f, e)
+            return None
 
     def delete_session(self, session_id: str) -> bool:
         p = self._path(session_id)
         if p.exists():
             p.unlink()
+            self._log_path(session_id).unlink(missing_ok=True)
+            _meta_cache.pop(p)
+            _log_cache.pop(self._log_path(session_id))
             return True
         return False
 
@@ -80,11 +165,13 @@ class SessionService:
     def save_message(
         self, session_id: str, role: str, content: str, meta: Optional[Dict] = None
     ) -> None:
-        """Append a message to the session history."""
+        """Append a message to the session history.
+
+        Only the new line is written to the message log – the history is
+        never re-read or re-serialized.
+        """
         if not self.session_exists(session_id):
-            self.create_session()
-            # Re-read to ensure the session file is at the right path
-        data = self._read(session_id)
+            self.create_session(session_id)
         message: Dict[str, Any] = {
             "role": role,
             "content": content,
@@ -92,16 +179,32 @@ class SessionService:
         }
         if meta:
             message["meta"] = meta
-        data["messages"].append(message)
-        self._write(session_id, data)
+        line = orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS) + b"\n"
+        log_path, meta_path = self._log_path(session_id), self._path(session_id)
+        with _append_lock:
+            log_before, meta_before = _stamp(log_path), _stamp(meta_path)
+            with open(log_path, "ab") as f:
+                f.write(line)
+            # Keep the metadata file's mtime as "last activity" for listing/cleanup
+            os.utime(meta_path)
+            # Write through: a cached log that was current just gets the message
+            cached = _log_cache.get(log_path, log_before)
+            if cached is not None:
+                cached.append(message)
+                _log_cache.put(log_path, _stamp(log_path), cached)
+            _meta_cache.restamp(meta_path, meta_before, _stamp(meta_path))
+        if role == "user":
+            data = self._read(session_id)
+            if data.get("preview") == "":
+                # One-off metadata rewrite so list_sessions() never scans messages
+                data["preview"] = _preview(content)
+                self._write(session_id, data)
 
     def load_history(self, session_id: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Return the last `limit` messages."""
         if not self.session_exists(session_id):
             return []
-        data = self._read(session_id)
-        messages = data.get("messages", [])
-        return messages[-limit:]
+        return self._messages(session_id, self._read(session_id), last=limit)
 
     def get_history_for_llm(
         self,
@@ -119,7 +222,7 @@ class SessionService:
             return []
 
         data = self._read(session_id)
-        messages = data.get("messages", [])
+        messages = self._messages(session_id, data)
         all_msgs = [{"role": m["role"], "content": m["content"]} for m in messages]
         total = len(all_msgs)
 
@@ -220,7 +323,7 @@ class SessionService:
         if self.session_exists(session_id):
             data = self._read(session_id)
             data["history_summary"] = summary
-            data["history_summary_msg_count"] = len(data.get("messages", []))
+            data["history_summary_msg_count"] = len(self._messages(session_id, data))
             self._write(session_id, data)
 
         return summary
@@ -251,16 +354,18 @@ class SessionService:
         if not self.session_exists(session_id):
             return
         data = self._read(session_id)
-        if artifact_id not in data.get("artifacts", []):
-            data.setdefault("artifacts", []).append(artifact_id)
+        artifacts = data.get("artifacts", [])
+        if artifact_id not in artifacts:
+            data["artifacts"] = [*artifacts, artifact_id]
             self._write(session_id, data)
 
     def attach_agent(self, session_id: str, agent_id: str) -> None:
         if not self.session_exists(session_id):
             return
         data = self._read(session_id)
-        if agent_id not in data.get("active_agents", []):
-            data.setdefault("active_agents", []).append(agent_id)
+        agents = data.get("active_agents", [])
+        if agent_id not in agents:
+            data["active_agents"] = [*agents, agent_id]
             self._write(session_id, data)
 
     # ── Session stats & cleanup (4G) ────────────────────────────
@@ -275,7 +380,9 @@ class SessionService:
                 "oldest_session": None,
                 "newest_session": None,
             }
-        total_size = sum(f.stat().st_size for f in files)
+        total_size = sum(f.stat().st_size for f in files) + sum(
+            f.stat().st_size for f in SESSIONS_DIR.glob("*.msgs.jsonl")
+        )
         sorted_files = sorted(files, key=lambda p: p.stat().st_mtime)
         oldest_mtime = sorted_files[0].stat().st_mtime
         newest_mtime = sorted_files[-1].stat().st_mtime
@@ -304,6 +411,9 @@ class SessionService:
                 if f.stat().st_mtime < cutoff:
                     session_id = f.stem
                     f.unlink()
+                    self._log_path(session_id).unlink(missing_ok=True)
+                    _meta_cache.pop(f)
+                    _log_cache.pop(self._log_path(session_id))
                     deleted_count += 1
                     deleted_ids.append(session_id)
             except Exception as exc:
@@ -331,7 +441,7 @@ class SessionService:
         ):
             try:
                 data = self._read_raw(f.stem)
-                messages = data.get("messages", [])
+                messages = self._messages(f.stem, data)
                 last_activity = None
                 if messages:
                     last_activity = messages[-1].get("timestamp")
@@ -341,7 +451,7 @@ class SessionService:
                         "created_at": data.get("created_at", ""),
                         "message_count": len(messages),
                         "last_activity": last_activity or data.get("created_at", ""),
-                        "size_bytes": f.stat().st_size,
+                        "size_bytes": f.stat().st_size + self._log_size(f.stem),
                     }
                 )
             except Exception as exc:
@@ -353,23 +463,97 @@ class SessionService:
     def _path(self, session_id: str) -> Path:
         return SESSIONS_DIR / f"{session_id}.json"
 
+    def _log_path(self, session_id: str) -> Path:
+        return SESSIONS_DIR / f"{session_id}.msgs.jsonl"
+
+    def _log_size(self, session_id: str) -> int:
+        try:
+            return self._log_path(session_id).stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def _messages(
+        self, session_id: str, data: Dict[str, Any], last: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Inline (pre-log) messages from *data* followed by the message log.
+
+        With *last*, only the final *last* messages are returned.
+        """
+        inline = data.get("messages", [])
+        logged = self._logged_messages(session_id)
+        if not last:
+            return inline + logged
+        if len(logged) >= last:
+            return logged[-last:]
+        return (inline + logged)[-last:]
+
+    def _message_count(self, session_id: str, data: Dict[str, Any]) -> int:
+        """len(_messages()) without parsing – or caching – an uncached log.
+
+        Every appended message is one newline-terminated line; a line cut
+        short by a crash has no newline and is not counted.
+        """
+        inline = len(data.get("messages", []))
+        path = self._log_path(session_id)
+        stamp = _stamp(path)
+        if stamp is None:
+            return inline
+        cached = _log_cache.get(path, stamp)
+        if cached is not None:
+            return inline + len(cached)
+        return inline + path.read_bytes().count(b"\n")
+
+    def _logged_messages(self, session_id: str) -> List[Dict[str, Any]]:
+        """Parsed message log (cached; callers must not mutate the list)."""
+        path = self._log_path(session_id)
+        stamp = _stamp(path)
+        if stamp is None:
+            return []
+        cached = _log_cache.get(path, stamp)
+        if cached is not None:
+            return cached
+        logged = []
+        for line in path.read_bytes().splitlines():
+            try:
+                logged.append(orjson.loads(line))
+            except orjson.JSONDecodeError:
+                # e.g. a line cut short by a crash mid-append
+                logger.warning("Skipping corrupt message in session %s", session_id)
+        _log_cache.put(path, stamp, logged)
+        return logged
+
     def _read(self, session_id: str) -> Dict[str, Any]:
-        with open(self._path(session_id), "r", encoding="utf-8") as f:
-            return json.load(f)
+        """Parsed metadata file, cached while the file is unchanged.
+
+        Returns a shallow copy, so top-level keys can be set freely before
+        _write(); nested lists and dicts are shared – replace, don't mutate.
+        """
+        path = self._path(session_id)
+        cached = _meta_cache.get(path, _stamp(path))
+        if cached is None:
+            stamp = _stamp(path)
+            cached = orjson.loads(path.read_bytes())
+            _meta_cache.put(path, stamp, cached)
+        return dict(cached)
 
     def _read_raw(self, session_id: str) -> Dict[str, Any]:
-        with open(SESSIONS_DIR / f"{session_id}.json", "r", encoding="utf-8") as f:
-            return json.load(f)
+        return orjson.loads((SESSIONS_DIR / f"{session_id}.json").read_bytes())
 
     def _write(self, session_id: str, data: Dict[str, Any]) -> None:
-        with open(self._path(session_id), "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        path = self._path(session_id)
+        atomic_write_bytes(path, orjson.dumps(data, option=_JSON_OPTS))
+        # Only cached once written, and as a copy the caller cannot change
+        _meta_cache.put(path, _stamp(path), dict(data))
 
 
 def _now() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def _preview(content: str) -> str:
+    return content.strip()[:50]
+
+
 _session_service = SessionService()
 
 
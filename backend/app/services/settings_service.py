@@ -1,15 +1,22 @@
 """Settings service – reads/writes backend/data/settings.json."""
 
-import json
+import copy
 import logging
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+
+from app.utils.file_utils import atomic_write_bytes
 
 logger = logging.getLogger(__name__)
 
 DATA_DIR = Path(__file__).parent.parent.parent / "data"
 SETTINGS_FILE = DATA_DIR / "settings.json"
 
+# Same layout json.dump(indent=2, ensure_ascii=False) produced
+_JSON_OPTS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
 DEFAULT_SETTINGS: Dict[str, Any] = {
     "llm": {
         "provider": "ollama",
@@ -20,6 +27,10 @@ DEFAULT_SETTINGS: Dict[str, Any] = {
         "ollama_url": "http://localhost:11434",
         "base_url": "http://localhost:11434",
         "embeddings_model": "nomic-embed-text",
+        # Single-text embedding requests arriving within this window are sent
+        # to Ollama as one /api/embed batch (0 disables micro-batching)
+        "embeddings_batch_window_ms": 10,
+        "embeddings_batch_max_size": 64,
         "default_params": {
             "temperature": 0.3,
             "top_p": 0.9,
@@ -39,6 +50,7 @@ DEFAULT_SETTINGS: Dict[str, Any] = {
             "enabled": False,
             "connection_type": "stdio",
             "stdio_path": "/Applications/Claude.app/Contents/Resources/mcp-server",
+            "stdio_args": [],
             "available_tools": ["github", "filesystem", "brave-search", "puppeteer"],
         },
         "vscode": {
@@ -489,16 +501,50 @@ class SettingsService:
 
     def __init__(self) -> None:
         DATA_DIR.mkdir(parents=True, exist_ok=True)
+        self._save_count = 0
+        # Merged settings from the last read, valid while _cache_key matches
+        self._cache: Optional[Dict[str, Any]] = None
+        self._cache_key: Optional[Tuple[Any, ...]] = None
+
+    @property
+    def version(self) -> Tuple[int, int, int]:
+        """Token that changes on every save() and on external edits of the file.
+
+        Lets hot paths cache derived config and re-read only when it changes,
+        at the cost of one stat() instead of a full load().  The size catches
+        edits that land within the filesystem's mtime granularity.
+        """
+        try:
+            st = SETTINGS_FILE.stat()
+        except OSError:
+            return (self._save_count, 0, 0)
+        return (self._save_count, st.st_mtime_ns, st.st_size)
 
     def load(self) -> Dict[str, Any]:
-        """Load settings, returning defaults merged with stored values."""
+        """Load settings, returning defaults merged with stored values.
+
+        Returns a copy of the memoized result, so callers may mutate it.
+        """
+        return copy.deepcopy(self._merged())
+
+    def _merged(self) -> Dict[str, Any]:
+        """Defaults merged with the stored file, memoized per version.
+
+        The file is only re-read and re-merged when version changes.  The
+        dict is shared: read from it, or copy the part you hand out.
+        """
+        key = (SETTINGS_FILE, self.version)
+        if self._cache is not None and key == self._cache_key:
+            return self._cache
+
         if not SETTINGS_FILE.exists():
             self.save(DEFAULT_SETTINGS)
+            key = (SETTINGS_FILE, self.version)
             result = _deep_copy(DEFAULT_SETTINGS)
         else:
-            with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
-                stored = json.load(f)
+            stored = orjson.loads(SETTINGS_FILE.read_bytes())
             result = _deep_merge(DEFAULT_SETTINGS, stored)
+        self._cache, self._cache_key = result, key
 
         # Refresh guardrail singleton from loaded settings
         try:
@@ -510,10 +556,27 @@ class SettingsService:
 
         return result
 
+    def _section(self, key: str, default: Any = None) -> Any:
+        """Copy of one top-level settings entry, without copying the rest."""
+        return copy.deepcopy(self._merged().get(key, default))
+
     def save(self, settings: Dict[str, Any]) -> None:
-        """Persist settings to disk."""
-        with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-            json.dump(settings, f, indent=2, ensure_ascii=False)
+        """Persist settings to disk.
+
+        Only values that differ from DEFAULT_SETTINGS are written; load()
+        merges the defaults back in, so the result reads the same.  Values
+        the user has set stay pinned even when they equal the current
+        default: anything already in the file, plus anything this save
+        changes, so a later change to DEFAULT_SETTINGS doesn't move them.
+        """
+        pinned: Dict[str, Any] = {}
+        if SETTINGS_FILE.exists():
+            stored = orjson.loads(SETTINGS_FILE.read_bytes())
+            previous = _deep_merge(DEFAULT_SETTINGS, stored)
+            pinned = _deep_merge(stored, _diff_from_defaults(previous, settings))
+        overrides = _diff_from_defaults(DEFAULT_SETTINGS, settings, pinned)
+        atomic_write_bytes(SETTINGS_FILE, orjson.dumps(overrides, option=_JSON_OPTS))
+        self._save_count += 1
 
         # Refresh guardrail singleton after save
         try:
@@ -547,7 +610,7 @@ class SettingsService:
 
     def get_system_prompt(self, mode: str) -> str:
         """Return the system prompt for the given mode, with optional custom append."""
-        settings = self.load()
+        settings = self._merged()
         prompts = settings.get("system_prompts", {})
         prompt = prompts.get(
             mode, prompts.get("general", "You are a helpful assistant.")
@@ -567,7 +630,7 @@ class SettingsService:
         of llm.default_params so that only the keys the profile specifies are
         overridden.
         """
-        settings = self.load()
+        settings = self._merged()
         llm_cfg = settings.get("llm", DEFAULT_SETTINGS["llm"])
 
         # Resolve ollama URL (support both field names)
@@ -622,7 +685,7 @@ class SettingsService:
 
     def is_feature_enabled(self, feature_name: str) -> bool:
         """Check if a feature/integration is enabled. Experimental features default to False."""
-        s = self.load()
+        s = self._merged()
         # Check experimental_features first
         exp = s.get("integrations", {}).get("experimental_features", {})
         if feature_name in exp:
@@ -635,24 +698,24 @@ class SettingsService:
 
     def get_agent_config(self, agent_type: str) -> dict:
         """Return guardrail config for a given agent type."""
-        agents_cfg = self.load().get("agents", {})
+        agents_cfg = self._merged().get("agents", {})
         configs = agents_cfg.get("configs", {})
         default = {"max_steps": 8, "step_timeout_s": 30, "max_total_tokens": 8000}
-        return configs.get(agent_type, default)
+        return copy.deepcopy(configs.get(agent_type, default))
 
     def get_integration_config(self, name: str) -> Dict[str, Any]:
-        integrations = self.load().get("integrations", {})
-        return integrations.get(name, {})
+        integrations = self._merged().get("integrations", {})
+        return copy.deepcopy(integrations.get(name, {}))
 
     def get_filesystem_config(self) -> Dict[str, Any]:
-        return self.load().get("filesystem", DEFAULT_SETTINGS["filesystem"])
+        return self._section("filesystem", DEFAULT_SETTINGS["filesystem"])
 
     def get_notification_config(self) -> Dict[str, Any]:
-        return self.load().get("notifications", DEFAULT_SETTINGS["notifications"])
+        return self._section("notifications", DEFAULT_SETTINGS["notifications"])
 
     def get_custom_profiles(self) -> Dict[str, Any]:
         """Return all custom profiles (both built-in and user-defined)."""
-        return self.load().get(
+        return self._section(
             "custom_profiles", DEFAULT_SETTINGS.get("custom_profiles", {})
         )
 
@@ -679,14 +742,14 @@ class SettingsService:
         return True
 
     def get_quick_actions(self) -> list:
-        return self.load().get("quick_actions", [])
+        return self._section("quick_actions", [])
 
     def get_job_settings(self) -> Dict[str, Any]:
-        return self.load().get("job_settings", DEFAULT_SETTINGS["job_settings"])
+        return self._section("job_settings", DEFAULT_SETTINGS["job_settings"])
 
     def warn_if_unconfigured(self) -> None:
         """Log actionable warnings for settings that need first-time configuration."""
-        s = self.load()
+        s = self._merged()
 
         allowed = s.get("filesystem", {}).get("allowed_directories", [])
         if not allowed:
@@ -718,19 +781,51 @@ class SettingsService:
 
 
 def _deep_copy(obj: Any) -> Any:
-    return json.loads(json.dumps(obj))
+    return copy.deepcopy(obj)
 
 
 def _deep_merge(base: Dict, override: Dict) -> Dict:
-    result = _deep_copy(base)
+    """Return *base* with *override* merged in, recursing into nested dicts.
+
+    Only the dicts along overridden paths are copied; untouched subtrees are
+    shared with *base*, so copy the result before mutating it in place.
+    """
+    result = dict(base)
     for key, value in override.items():
-        if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-            result[key] = _deep_merge(result[key], value)
+        current = result.get(key)
+        if isinstance(current, dict) and isinstance(value, dict):
+            result[key] = _deep_merge(current, value)
         else:
             result[key] = value
     return result
 
 
+def _diff_from_defaults(
+    defaults: Dict, settings: Dict, pinned: Optional[Dict] = None
+) -> Dict:
+    """The part of *settings* that _deep_merge(defaults, ·) needs to rebuild it.
+
+    Keys present in *pinned* are kept even when they equal the default.
+    """
+    pinned = pinned or {}
+    diff: Dict[str, Any] = {}
+    for key, value in settings.items():
+        default = defaults.get(key, _MISSING)
+        pin = pinned.get(key, _MISSING)
+        if isinstance(value, dict) and isinstance(default, dict):
+            sub = _diff_from_defaults(
+                default, value, pin if isinstance(pin, dict) else None
+            )
+            if sub:
+                diff[key] = sub
+        elif value != default or pin is not _MISSING:
+            diff[key] = value
+    return diff
+
+
+_MISSING = object()
+
+
 # Shared singleton
 _settings_service = SettingsService()
 
@@ -1,11 +1,16 @@
 """Skills service – CRUD operations for agent skills stored in backend/data/skills.json."""
 
-import json
 import logging
 import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import orjson
+
+from app.utils.file_utils import atomic_write_bytes
 
 logger = logging.getLogger(__name__)
 
@@ -96,9 +101,39 @@ DEFAULT_SKILLS: List[Dict[str, Any]] = [
 ]
 
 
+@dataclass
+class _SkillsIndex:
+    """Parsed skills.json plus lookup tables, valid while *stamp* matches."""
+
+    stamp: Tuple[int, int]
+    skills: List[Dict[str, Any]]
+    by_id: Dict[str, Dict[str, Any]]
+    # tag → skills carrying it, in file order
+    by_tag: Dict[str, List[Dict[str, Any]]]
+    # id → lowercased "name\0description" for list(search=...)
+    search_text: Dict[str, str]
+
+    @classmethod
+    def build(
+        cls, stamp: Tuple[int, int], skills: List[Dict[str, Any]]
+    ) -> "_SkillsIndex":
+        by_tag: Dict[str, List[Dict[str, Any]]] = {}
+        for s in skills:
+            for t in dict.fromkeys(s.get("tags", [])):
+                by_tag.setdefault(t, []).append(s)
+        search_text = {
+            s["id"]: f"{s.get('name', '')}\0{s.get('description', '')}".lower()
+            for s in skills
+        }
+        return cls(stamp, skills, {s["id"]: s for s in skills}, by_tag, search_text)
+
+
 class SkillsService:
     def __init__(self) -> None:
         DATA_DIR.mkdir(parents=True, exist_ok=True)
+        self._index: Optional[_SkillsIndex] = None
+        self._bulk_depth = 0
+        self._bulk_dirty = False
 
     def _ensure_file(self) -> None:
         """Create skills.json with default skills if it does not exist."""
@@ -108,14 +143,57 @@ class SkillsService:
                 "Created skills.json with %d default skills", len(DEFAULT_SKILLS)
             )
 
+    def _indexed(self) -> _SkillsIndex:
+        """Skills and their id/tag indices, re-parsed only when the file changes.
+
+        The returned lists and dicts are shared – copy before mutating.
+        """
+        try:
+            st = SKILLS_FILE.stat()
+        except FileNotFoundError:
+            self._ensure_file()
+            st = SKILLS_FILE.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+        index = self._index
+        if index is None or index.stamp != stamp:
+            skills = orjson.loads(SKILLS_FILE.read_bytes())
+            index = self._index = _SkillsIndex.build(stamp, skills)
+        return index
+
     def _read(self) -> List[Dict[str, Any]]:
-        self._ensure_file()
-        with open(SKILLS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return self._indexed().skills
 
     def _write(self, skills: List[Dict[str, Any]]) -> None:
-        with open(SKILLS_FILE, "w", encoding="utf-8") as f:
-            json.dump(skills, f, indent=2, ensure_ascii=False)
+        atomic_write_bytes(
+            SKILLS_FILE, orjson.dumps(skills, option=orjson.OPT_INDENT_2)
+        )
+        # Index what was just written instead of parsing it back on next read
+        st = SKILLS_FILE.stat()
+        self._index = _SkillsIndex.build((st.st_mtime_ns, st.st_size), skills)
+
+    def _commit(self, skills: List[Dict[str, Any]]) -> None:
+        """Persist *skills* now, or at the end of the enclosing bulk() block."""
+        if self._bulk_depth == 0:
+            self._write(skills)
+            return
+        # Keep the file's stamp so reads inside the block see the pending list
+        self._index = _SkillsIndex.build(self._indexed().stamp, skills)
+        self._bulk_dirty = True
+
+    @contextmanager
+    def bulk(self) -> Iterator["SkillsService"]:
+        """Group create/update/delete calls into a single skills.json write.
+
+        Blocks nest; the file is written once when the outermost one exits.
+        """
+        self._bulk_depth += 1
+        try:
+            yield self
+        finally:
+            self._bulk_depth -= 1
+            if self._bulk_depth == 0 and self._bulk_dirty:
+                self._bulk_dirty = False
+                self._write(self._index.skills)
 
     def list(
         self,
@@ -123,33 +201,25 @@ class SkillsService:
         search: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """Return all skills, optionally filtered by tag and/or search query."""
-        skills = self._read()
-        if tag:
-            skills = [s for s in skills if tag in s.get("tags", [])]
+        index = self._indexed()
+        skills = index.by_tag.get(tag, []) if tag else index.skills
         if search:
             q = search.lower()
-            skills = [
-                s
-                for s in skills
-                if q in s.get("name", "").lower()
-                or q in s.get("description", "").lower()
-            ]
-        return skills
+            text = index.search_text
+            skills = [s for s in skills if q in text[s["id"]]]
+        return list(skills)
 
     def get(self, skill_id: str) -> Optional[Dict[str, Any]]:
         """Return a single skill by ID."""
-        for s in self._read():
-            if s["id"] == skill_id:
-                return s
-        return None
+        return self._indexed().by_id.get(skill_id)
 
     def create(self, skill: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new skill and return it."""
-        skills = self._read()
+        skills = list(self._read())
         skill["id"] = str(uuid.uuid4())
         skill["created_at"] = datetime.now(timezone.utc).isoformat()
         skills.append(skill)
-        self._write(skills)
+        self._commit(skills)
         logger.info("Created skill %s: %s", skill["id"], skill.get("name"))
         return skill
 
@@ -157,42 +227,34 @@ class SkillsService:
         self, skill_id: str, updates: Dict[str, Any]
     ) -> Optional[Dict[str, Any]]:
         """Update a skill by ID. Returns updated skill or None if not found."""
-        skills = self._read()
-        for i, s in enumerate(skills):
-            if s["id"] == skill_id:
-                updates.pop("id", None)
-                updates.pop("created_at", None)
-                skills[i] = {**s, **updates}
-                self._write(skills)
-                logger.info("Updated skill %s", skill_id)
-                return skills[i]
-        return None
+        index = self._indexed()
+        s = index.by_id.get(skill_id)
+        if s is None:
+            return None
+        updates.pop("id", None)
+        updates.pop("created_at", None)
+        updated = {**s, **updates}
+        self._commit([updated if x is s else x for x in index.skills])
+        logger.info("Updated skill %s", skill_id)
+        return updated
 
     def delete(self, skill_id: str) -> bool:
         """Delete a skill by ID. Returns True if found and deleted."""
-        skills = self._read()
-        original_len = len(skills)
-        skills = [s for s in skills if s["id"] != skill_id]
-        if len(skills) < original_len:
-            self._write(skills)
-            logger.info("Deleted skill %s", skill_id)
-            return True
-        return False
+        index = self._indexed()
+        if skill_id not in index.by_id:
+            return False
+        self._commit([s for s in index.skills if s["id"] != skill_id])
+        logger.info("Deleted skill %s", skill_id)
+        return True
 
     def get_tags(self) -> List[str]:
         """Return a sorted list of unique tags across all skills."""
-        skills = self._read()
-        tags = set()
-        for s in skills:
-            for t in s.get("tags", []):
-                tags.add(t)
-        return sorted(tags)
+        return sorted(self._indexed().by_tag)
 
     def get_by_ids(self, skill_ids: List[str]) -> List[Dict[str, Any]]:
-        """Return skills matching a list of IDs."""
-        skills = self._read()
-        id_set = set(skill_ids)
-        return [s for s in skills if s["id"] in id_set]
+        """Return skills matching a list of IDs, in the order requested."""
+        by_id = self._indexed().by_id
+        return [by_id[i] for i in dict.fromkeys(skill_ids) if i in by_id]
 
 
 # Shared singleton
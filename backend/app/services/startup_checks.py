@@ -110,7 +110,7 @@ async def check_chromadb() -> str:
             ids=["startup_probe"],
             documents=["startup validation probe"],
         )
-        results = test_col.get(ids=["startup_probe"])
+        results = test_col.get(ids=["startup_probe"], include=[])
         if not results or not results.get("ids"):
             raise RuntimeError("ChromaDB read-back returned empty result")
         client.delete_collection("startup-test")
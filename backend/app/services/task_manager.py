@@ -2,9 +2,12 @@
 
 import asyncio
 import logging
+import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timezone
-from typing import Any, Callable, Coroutine, Dict, Optional
+from itertools import chain
+from typing import Any, Callable, Coroutine, Dict, Optional, Set
 
 logger = logging.getLogger(__name__)
 
@@ -15,8 +18,17 @@ STATUS_COMPLETED = "completed"
 STATUS_FAILED = "failed"
 STATUS_CANCELLED = "cancelled"
 
+# Finished tasks kept for status queries; the oldest are dropped beyond this
+MAX_COMPLETED_TASKS = 1000
+
+# Progress updates within this window go out as one task_update broadcast
+PROGRESS_BROADCAST_DELAY_S = 0.05
+
 
 class TaskRecord:
+    # to_dict() snapshot, dropped whenever a public field is assigned
+    _dict: Optional[Dict[str, Any]] = None
+
     def __init__(
         self, task_id: str, name: str, task_type: str, params: Dict[str, Any]
     ) -> None:
@@ -33,25 +45,38 @@ class TaskRecord:
         self.updated_at = _now()
         self._asyncio_task: Optional[asyncio.Task] = None
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        if not name.startswith("_"):
+            object.__setattr__(self, "_dict", None)
+        object.__setattr__(self, name, value)
+
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "task_id": self.task_id,
-            "name": self.name,
-            "task_type": self.task_type,
-            "status": self.status,
-            "progress": self.progress,
-            "message": self.message,
-            "result": self.result,
-            "created_at": self.created_at,
-            "updated_at": self.updated_at,
-        }
+        """The task as a dict; shared until the record changes, so read-only."""
+        if self._dict is None:
+            self._dict = {
+                "task_id": self.task_id,
+                "name": self.name,
+                "task_type": self.task_type,
+                "status": self.status,
+                "progress": self.progress,
+                "message": self.message,
+                "result": self.result,
+                "created_at": self.created_at,
+                "updated_at": self.updated_at,
+            }
+        return self._dict
 
 
 class TaskManager:
     def __init__(self) -> None:
+        # Pending/running tasks; finished ones move to the bounded _completed
         self._tasks: Dict[str, TaskRecord] = {}
+        self._completed: "OrderedDict[str, TaskRecord]" = OrderedDict()
         # Lazy import to avoid circular dependency
         self._broadcast_fn: Optional[Callable] = None
+        # task_id → scheduled progress flush, and the flushes in flight
+        self._flush_handles: Dict[str, asyncio.TimerHandle] = {}
+        self._flush_tasks: Set[asyncio.Task] = set()
 
     def set_broadcast(self, fn: Callable) -> None:
         """Register a coroutine function for broadcasting WebSocket messages."""
@@ -101,29 +126,71 @@ class TaskManager:
                 logger.error("Task %s failed: %s", task_id, exc)
             finally:
                 record.updated_at = _now()
+                # The final state supersedes any progress still waiting to go out
+                handle = self._flush_handles.pop(task_id, None)
+                if handle is not None:
+                    handle.cancel()
                 await self._broadcast(record)
 
+        def _done(_: asyncio.Task) -> None:
+            # Also reached for tasks cancelled before _runner started, whose
+            # coroutine was never awaited (close() is a no-op otherwise)
+            coro.close()
+            self._retire(task_id)
+
         record._asyncio_task = asyncio.create_task(_runner())
+        record._asyncio_task.add_done_callback(_done)
         logger.info("Task %s (%s) created", task_id, name)
         return task_id
 
     async def update_progress(
         self, task_id: str, progress: int, message: Optional[str] = None
     ) -> None:
-        """Update task progress from within the running coroutine."""
+        """Update task progress from within the running coroutine.
+
+        Clients only need the latest value, so updates are coalesced into at
+        most one broadcast per PROGRESS_BROADCAST_DELAY_S per task.
+        """
         record = self._tasks.get(task_id)
         if record:
             record.progress = min(max(progress, 0), 99)  # 100 reserved for completion
             record.message = message
             record.updated_at = _now()
-            await self._broadcast(record)
+            if task_id not in self._flush_handles:
+                self._flush_handles[task_id] = asyncio.get_running_loop().call_later(
+                    PROGRESS_BROADCAST_DELAY_S, self._flush_progress, task_id
+                )
 
-    def get_status(self, task_id: str) -> Optional[Dict[str, Any]]:
+    def _flush_progress(self, task_id: str) -> None:
+        self._flush_handles.pop(task_id, None)
         record = self._tasks.get(task_id)
+        if record is None:
+            return
+        task = asyncio.create_task(self._broadcast(record))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    def _retire(self, task_id: str) -> None:
+        """Move a finished task to the completed map, evicting the oldest."""
+        record = self._tasks.pop(task_id, None)
+        if record is None:
+            return
+        if record.status in (STATUS_PENDING, STATUS_RUNNING):
+            # Cancelled before _runner got to record it
+            record.status = STATUS_CANCELLED
+            record.message = "Task was cancelled"
+        self._completed[task_id] = record
+        while len(self._completed) > MAX_COMPLETED_TASKS:
+            self._completed.popitem(last=False)
+
+    def get_status(self, task_id: str) -> Optional[Dict[str, Any]]:
+        record = self._tasks.get(task_id) or self._completed.get(task_id)
         return record.to_dict() if record else None
 
     def list_tasks(self) -> list:
-        return [r.to_dict() for r in self._tasks.values()]
+        return [
+            r.to_dict() for r in chain(self._completed.values(), self._tasks.values())
+        ]
 
     async def cancel_task(self, task_id: str) -> bool:
         record = self._tasks.get(task_id)
@@ -138,18 +205,25 @@ class TaskManager:
 
     def cleanup_completed(self) -> int:
         """Remove completed/failed/cancelled tasks. Returns count removed."""
-        done_ids = [
-            tid
-            for tid, r in self._tasks.items()
-            if r.status in (STATUS_COMPLETED, STATUS_FAILED, STATUS_CANCELLED)
-        ]
-        for tid in done_ids:
-            del self._tasks[tid]
-        return len(done_ids)
+        count = len(self._completed)
+        self._completed.clear()
+        return count
+
+
+# (time_ns, ISO string) of the last timestamp _now() formatted
+_last_now = (0, "")
 
 
 def _now() -> str:
-    return datetime.now(timezone.utc).isoformat()
+    """Current UTC time as ISO 8601; calls within one millisecond share it."""
+    global _last_now
+    ns = time.time_ns()
+    last_ns, last_iso = _last_now
+    if 0 <= ns - last_ns < 1_000_000:
+        return last_iso
+    iso = datetime.fromtimestamp(ns / 1e9, tz=timezone.utc).isoformat()
+    _last_now = (ns, iso)
+    return iso
 
 
 # Shared singleton
@@ -1,15 +1,18 @@
 """Vector store service – ChromaDB persistence for document embeddings."""
 
 import asyncio
+import heapq
 import json
 import logging
 import os
 import subprocess
 import time
-from collections import Counter
+from array import array
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 import chromadb
 from chromadb.config import Settings
@@ -39,10 +42,119 @@ def get_vector_write_lock() -> asyncio.Lock:
     return _VECTOR_WRITE_LOCK
 
 
+# Chunk ids per collection.delete() call
+_DELETE_BATCH = 500
+
+# Disk usage changes slowly next to dashboard polling: walk at most this often
+# (writes through VectorStoreService drop the cached value early)
+_STORAGE_USAGE_TTL_S = 30.0
+# (monotonic time, directory, usage) of the last walk
+_storage_usage: Optional[Tuple[float, Path, Tuple[float, Optional[str]]]] = None
+
+
+def get_storage_usage() -> Tuple[float, Optional[str]]:
+    """Return (MB used by CHROMA_DIR, ISO mtime of the newest index segment).
+
+    Cached for _STORAGE_USAGE_TTL_S seconds.
+    """
+    global _storage_usage
+    now = time.monotonic()
+    cached = _storage_usage
+    if (
+        cached is not None
+        and cached[1] == CHROMA_DIR
+        and now - cached[0] < _STORAGE_USAGE_TTL_S
+    ):
+        return cached[2]
+    usage = _walk_storage_usage(CHROMA_DIR)
+    _storage_usage = (now, CHROMA_DIR, usage)
+    return usage
+
+
+def invalidate_storage_usage() -> None:
+    global _storage_usage
+    _storage_usage = None
+
+
+def _walk_storage_usage(root: Path) -> Tuple[float, Optional[str]]:
+    """Uncached get_storage_usage() for *root*.
+
+    Walks the tree with os.scandir: directory entries carry their file type,
+    so each file costs a single stat() for its size and mtime.
+    """
+    total_size = 0
+    latest_mtime = 0.0
+    stack = [str(root)]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    st = entry.stat()
+                    total_size += st.st_size
+                    if (
+                        entry.name.endswith((".bin", ".parquet"))
+                        and st.st_mtime > latest_mtime
+                    ):
+                        latest_mtime = st.st_mtime
+    last_indexed = (
+        datetime.fromtimestamp(latest_mtime, tz=timezone.utc).isoformat()
+        if latest_mtime > 0
+        else None
+    )
+    return round(total_size / (1024 * 1024), 1), last_indexed
+
+
+@dataclass
+class _MetadataSnapshot:
+    """Per-file view of the collection metadata, built from one full scan.
+
+    Chunks without a ``file_path`` are grouped under ``""``.
+    """
+
+    chunk_ids: Dict[str, List[str]]
+    # Metadata of the first chunk seen for each file
+    file_meta: Dict[str, Dict[str, Any]]
+
+    @classmethod
+    def build(
+        cls, ids: List[str], metadatas: List[Optional[Dict[str, Any]]]
+    ) -> "_MetadataSnapshot":
+        snapshot = cls({}, {})
+        snapshot.add(ids, metadatas)
+        return snapshot
+
+    def add(self, ids: List[str], metadatas: List[Optional[Dict[str, Any]]]) -> None:
+        chunk_ids = self.chunk_ids
+        for chunk_id, meta in zip(ids, metadatas):
+            meta = meta or {}
+            file_path = meta.get("file_path") or ""
+            file_ids = chunk_ids.get(file_path)
+            if file_ids is None:
+                chunk_ids[file_path] = [chunk_id]
+                # Copied: add_documents may hand over the caller's own dict
+                self.file_meta[file_path] = dict(meta)
+            else:
+                file_ids.append(chunk_id)
+
+    def drop(self, file_path: str) -> None:
+        self.chunk_ids.pop(file_path, None)
+        self.file_meta.pop(file_path, None)
+
+
 class VectorStoreService:
     """Manage document embeddings in ChromaDB."""
 
     COLLECTION_NAME = "knowledge_base"
+    # Shared by stats, deletes and file lookups; built on first use, the
+    # generation lets a build notice a write that raced with it
+    _snapshot: Optional[_MetadataSnapshot] = None
+    _snapshot_gen = 0
 
     def __init__(self) -> None:
         self.client = chromadb.PersistentClient(
@@ -58,35 +170,71 @@ class VectorStoreService:
         self,
         operation: Callable[..., Any],
         *args: Any,
+        on_success: Optional[Callable[[_MetadataSnapshot], None]] = None,
         **kwargs: Any,
     ) -> Any:
         """Execute a synchronous Chroma write under the global write lock.
 
         Runs the operation in a thread-pool so the event loop is not blocked,
         and acquires the process-wide write lock first to serialise mutations.
+        Writes that do not apply themselves to the metadata snapshot via
+        *on_success* drop it, so it is rebuilt on next use.
         """
         lock = get_vector_write_lock()
         async with lock:
-            return await asyncio.to_thread(operation, *args, **kwargs)
+            try:
+                result = await asyncio.to_thread(operation, *args, **kwargs)
+            except BaseException:
+                self._drop_snapshot()
+                raise
+            finally:
+                invalidate_storage_usage()
+            if on_success is None:
+                self._drop_snapshot()
+            elif self._snapshot is not None:
+                on_success(self._snapshot)
+            return result
+
+    def _drop_snapshot(self) -> None:
+        self._snapshot = None
+        self._snapshot_gen += 1
+
+    def _metadata_snapshot(self) -> _MetadataSnapshot:
+        """The shared metadata snapshot (blocking scan on first use)."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            gen = self._snapshot_gen
+            raw = self.collection.get(include=["metadatas"])
+            snapshot = _MetadataSnapshot.build(
+                raw.get("ids") or [], raw.get("metadatas") or []
+            )
+            if gen == self._snapshot_gen:
+                self._snapshot = snapshot
+        return snapshot
 
     async def add_documents(
         self,
         ids: List[str],
-        embeddings: List[List[float]],
+        embeddings: Sequence[Sequence[float]],
         documents: List[str],
         metadatas: List[Dict[str, Any]],
     ) -> None:
-        """Add documents to vector store."""
+        """Add documents to vector store.
+
+        *embeddings* may be float lists or packed float32 ``array('f')``
+        buffers; the latter are unpacked in the write thread.
+        """
         try:
             # ChromaDB metadata values must be str, int, float, or bool
             safe_metadatas = [_sanitize_metadata(m) for m in metadatas]
             t0 = time.monotonic()
             await self._safe_write(
-                self.collection.add,
+                self._add,
                 ids=ids,
                 embeddings=embeddings,
                 documents=documents,
                 metadatas=safe_metadatas,
+                on_success=lambda snapshot: snapshot.add(ids, safe_metadatas),
             )
             chromadb_query_duration.labels(operation="add").observe(
                 time.monotonic() - t0
@@ -99,9 +247,13 @@ class VectorStoreService:
             logger.error("Failed to add documents: %s", exc)
             raise
 
+    def _add(self, *, embeddings: Sequence[Sequence[float]], **kwargs: Any) -> None:
+        # chromadb 0.4 validates embeddings as lists of Python numbers
+        self.collection.add(embeddings=[_as_floats(e) for e in embeddings], **kwargs)
+
     def search(
         self,
-        query_embedding: List[float],
+        query_embedding: Sequence[float],
         top_k: int = 5,
         filter_metadata: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
@@ -117,7 +269,7 @@ class VectorStoreService:
                 return {"ids": [], "documents": [], "metadatas": [], "distances": []}
 
             kwargs: Dict[str, Any] = {
-                "query_embeddings": [query_embedding],
+                "query_embeddings": [_as_floats(query_embedding)],
                 "n_results": min(top_k, count),
             }
             if filter_metadata:
@@ -142,33 +294,65 @@ class VectorStoreService:
     async def delete_by_file_path(self, file_path: str) -> int:
         """Delete all chunks for a specific file. Returns count of deleted chunks."""
         try:
-            results = await asyncio.to_thread(
-                self.collection.get, where={"file_path": file_path}
+            if not file_path:
+                return 0
+            t0 = time.monotonic()
+            # Ids are looked up under the write lock, so a concurrent
+            # add_documents for the same file is either fully included or
+            # not started yet, and dropping the file from the snapshot is exact
+            ids = await self._safe_write(
+                self._delete_file_chunks,
+                file_path,
+                on_success=lambda snapshot: snapshot.drop(file_path),
             )
-            if results and results["ids"]:
-                t0 = time.monotonic()
-                await self._safe_write(self.collection.delete, ids=results["ids"])
+            if ids:
                 chromadb_query_duration.labels(operation="delete").observe(
                     time.monotonic() - t0
                 )
                 chromadb_documents_total.labels(collection=self.COLLECTION_NAME).set(
                     self.collection.count()
                 )
-                logger.info("Deleted %d chunks for %s", len(results["ids"]), file_path)
-                return len(results["ids"])
-            return 0
+                logger.info("Deleted %d chunks for %s", len(ids), file_path)
+            return len(ids)
         except Exception as exc:
             logger.error("Failed to delete file chunks: %s", exc)
             return 0
 
+    def _delete_file_chunks(self, file_path: str) -> List[str]:
+        """Delete every chunk of *file_path*; runs under the write lock."""
+        ids = list(self._metadata_snapshot().chunk_ids.get(file_path, ()))
+        self._delete_ids(ids)
+        return ids
+
+    def _delete_ids(self, ids: List[str]) -> None:
+        # Bounded batches keep each SQLite ``IN (...)`` clause small
+        for start in range(0, len(ids), _DELETE_BATCH):
+            self.collection.delete(ids=ids[start : start + _DELETE_BATCH])
+
+    def get_file_metadata(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """Metadata of the first indexed chunk of *file_path*, or None."""
+        if not file_path:
+            return None
+        meta = self._metadata_snapshot().file_meta.get(file_path)
+        return dict(meta) if meta is not None else None
+
+    def get_indexed_files(self) -> Dict[str, Dict[str, Any]]:
+        """Map every indexed file_path to the metadata of its first chunk."""
+        return {
+            file_path: dict(meta)
+            for file_path, meta in self._metadata_snapshot().file_meta.items()
+            if file_path
+        }
+
     def get_stats(
         self, detailed: bool = True, sample_limit: int = 10_000
     ) -> Dict[str, Any]:
         """Get collection statistics.
 
-        For large collections (>100k chunks), ``detailed=True`` analyses only
-        the first *sample_limit* metadata records and sets ``sampled=True`` in
-        the response so callers can warn the user.
+        Detailed breakdowns come from the shared metadata snapshot.  For
+        large collections (>50k chunks) without one, ``detailed=True``
+        analyses only the first *sample_limit* metadata records and sets
+        ``sampled=True`` in the response so callers can warn the user.
 
         Args:
             detailed: When False return only lightweight counts (no metadata
@@ -199,47 +383,58 @@ class VectorStoreService:
         if not detailed:
             return base
 
-        # --- detailed pass: fetch a bounded sample of metadatas ---
-        sampled = total_chunks > LARGE_THRESHOLD
-        fetch_limit = sample_limit if sampled else total_chunks
-
-        try:
-            result = self.collection.get(
-                limit=fetch_limit,
-                include=["metadatas"],
-            )
-            metadatas: List[Dict[str, Any]] = result.get("metadatas") or []
-        except Exception as exc:
-            logger.warning("Metadata fetch for stats failed: %s", exc)
-            metadatas = []
+        # --- detailed pass: the full snapshot, or a bounded sample of it ---
+        sampled = total_chunks > LARGE_THRESHOLD and self._snapshot is None
 
-        # file_types breakdown  (by extension)
-        file_types: Dict[str, int] = {}
         source_chunks: Dict[str, int] = {}
+        if sampled:
+            metadatas: List[Dict[str, Any]] = []
+            try:
+                result = self.collection.get(
+                    limit=sample_limit,
+                    include=["metadatas"],
+                )
+                metadatas = result.get("metadatas") or []
+            except Exception as exc:
+                logger.warning("Metadata fetch for stats failed: %s", exc)
+            for meta in metadatas:
+                file_path = (meta or {}).get("file_path") or ""
+                source_chunks[file_path] = source_chunks.get(file_path, 0) + 1
+            sample_size = len(metadatas)
+        elif total_chunks > 0:
+            try:
+                snapshot = self._metadata_snapshot()
+                source_chunks = {
+                    file_path: len(ids) for file_path, ids in snapshot.chunk_ids.items()
+                }
+            except Exception as exc:
+                logger.warning("Metadata fetch for stats failed: %s", exc)
+            sample_size = sum(source_chunks.values())
+        else:
+            sample_size = 0
 
-        for meta in metadatas:
-            file_path = meta.get("file_path", "")
-            ext = Path(file_path).suffix.lower() if file_path else ""
-            file_types[ext or "unknown"] = file_types.get(ext or "unknown", 0) + 1
-            source_chunks[file_path] = source_chunks.get(file_path, 0) + 1
+        # The extension breakdown is derived per unique file instead of
+        # parsing a path for every chunk
+        file_types: Dict[str, int] = {}
+        for file_path, chunks in source_chunks.items():
+            ext = (Path(file_path).suffix.lower() if file_path else "") or "unknown"
+            file_types[ext] = file_types.get(ext, 0) + chunks
 
         unique_files = len(source_chunks)
-        top_sources = sorted(source_chunks.items(), key=lambda x: x[1], reverse=True)[
-            :20
-        ]
+        top_sources = heapq.nlargest(20, source_chunks.items(), key=itemgetter(1))
 
         base.update(
             {
                 "total_documents": unique_files,
                 "file_types": file_types,
                 "top_sources": [{"path": p, "chunks": c} for p, c in top_sources],
-                "sample_size": len(metadatas),
+                "sample_size": sample_size,
                 "sampled": sampled,
             }
         )
         if sampled:
             base["warning"] = (
-                f"Stats are based on a sample of {len(metadatas):,} / {total_chunks:,} chunks. "
+                f"Stats are based on a sample of {sample_size:,} / {total_chunks:,} chunks. "
                 "Re-index to get exact file counts."
             )
         return base
@@ -338,8 +533,20 @@ class VectorStoreService:
         }
 
 
+def _as_floats(embedding: Sequence[float]) -> Sequence[float]:
+    return embedding.tolist() if isinstance(embedding, array) else embedding
+
+
+_CHROMA_SCALARS = frozenset((str, int, float, bool))
+
+
 def _sanitize_metadata(meta: Dict[str, Any]) -> Dict[str, Any]:
-    """Ensure all metadata values are ChromaDB-compatible (str, int, float, bool)."""
+    """Ensure all metadata values are ChromaDB-compatible (str, int, float, bool).
+
+    Already-clean dicts (the usual case) are returned as-is, not copied.
+    """
+    if all(type(value) in _CHROMA_SCALARS for value in meta.values()):
+        return meta
     sanitized = {}
     for key, value in meta.items():
         if isinstance(value, (str, int, float, bool)):
@@ -1,22 +1,71 @@
 """VS Code service – programmatic control via the `code` CLI."""
 
 import asyncio
+import copy
 import json
 import logging
+import os
+import threading
+import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from app.services.settings_service import get_settings_service
+from app.utils.subprocess_utils import run_in_thread
 
 logger = logging.getLogger(__name__)
 
+# Upper bound for one `code` CLI invocation
+CLI_TIMEOUT_S = 30.0
+
+# get_version() answers from memory for this long
+VERSION_TTL_S = 3600.0
+
+# list_extensions() answers from memory for this long
+EXTENSIONS_TTL_S = 60.0
+
+# Common lint/test output files get_diagnostics looks for in a project root
+_DIAGNOSTIC_FILES = ("lint-results.json", ".eslintcache", "test-results.xml")
+
 
 class VSCodeService:
     def __init__(self) -> None:
         self._settings = get_settings_service()
+        # (settings version, vscode config, project key → (open target, folder URI))
+        self._cfg_cache: Optional[
+            Tuple[Any, Dict[str, Any], Dict[str, Tuple[str, str]]]
+        ] = None
+        # (monotonic time, binary, extension ids) of the last --list-extensions
+        self._extensions: Optional[Tuple[float, str, List[str]]] = None
+        # (monotonic time, binary, version) of the last successful --version
+        self._version: Optional[Tuple[float, str, str]] = None
+        self._version_lock = asyncio.Lock()
+
+    def _load_cfg(self) -> Tuple[Any, Dict[str, Any], Dict[str, Tuple[str, str]]]:
+        # Loaded once per settings version; callers must not mutate it
+        version = self._settings.version
+        if self._cfg_cache is None or self._cfg_cache[0] != version:
+            cfg = self._settings.get_integration_config("vscode")
+            targets = {
+                key: (
+                    project.get("workspace") or project.get("path", ""),
+                    f"file://{project.get('path', '.')}",
+                )
+                for key, project in cfg.get("projects", {}).items()
+                if project
+            }
+            self._cfg_cache = (version, cfg, targets)
+        return self._cfg_cache
 
     def _cfg(self) -> Dict[str, Any]:
-        return self._settings.get_integration_config("vscode")
+        return self._load_cfg()[1]
+
+    def _targets(self, project_key: str) -> Tuple[str, str]:
+        """Return the (open target, folder URI) of a configured project."""
+        targets = self._load_cfg()[2].get(project_key)
+        if targets is None:
+            raise ValueError(f"Unknown project: {project_key}")
+        return targets
 
     def _binary(self) -> str:
         return self._cfg().get("binary_path", "code")
@@ -24,32 +73,27 @@ class VSCodeService:
     def _project(self, key: str) -> Optional[Dict[str, Any]]:
         return self._cfg().get("projects", {}).get(key)
 
-    async def _run(self, *args: str, cwd: Optional[str] = None) -> str:
-        """Run the VS Code CLI and return stdout."""
-        proc = await asyncio.create_subprocess_exec(
-            self._binary(),
-            *args,
-            cwd=cwd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+    async def _run(
+        self, *args: str, cwd: Optional[str] = None, capture: bool = True
+    ) -> str:
+        """Run the VS Code CLI and return stdout.
+
+        Fire-and-forget commands pass ``capture=False``: stdout is discarded
+        instead of piped and decoded, and "" is returned.
+        """
+        proc = await run_in_thread(
+            [self._binary(), *args], CLI_TIMEOUT_S, cwd=cwd, capture_stdout=capture
         )
-        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=30.0)
-        if proc.returncode not in (0, None):
-            logger.debug("VS Code CLI stderr: %s", stderr.decode())
-        return stdout.decode().strip()
+        if proc.returncode != 0:
+            logger.debug("VS Code CLI stderr: %s", proc.stderr.decode())
+        return proc.stdout.decode().strip() if capture else ""
 
     # ── Project / file operations ──────────────────────────────
 
     async def open_project(self, project_key: str) -> str:
         """Open a configured project by its key."""
-        project = self._project(project_key)
-        if not project:
-            raise ValueError(f"Unknown project: {project_key}")
-
-        workspace = project.get("workspace")
-        path = project.get("path", "")
-        target = workspace if workspace else path
-        await self._run(target)
+        target, _ = self._targets(project_key)
+        await self._run(target, capture=False)
         return f"Opened project '{project_key}' in VS Code"
 
     async def open_file_at_line(
@@ -57,38 +101,72 @@ class VSCodeService:
     ) -> str:
         """Open a file, optionally jumping to a specific line."""
         target = f"{file_path}:{line}" if line else file_path
-        await self._run("--goto", target)
+        await self._run("--goto", target, capture=False)
         return f"Opened {file_path}" + (f" at line {line}" if line else "")
 
+    async def open_files(self, files: List[Dict[str, Any]]) -> str:
+        """Open several ``{"file_path", "line"}`` entries with one CLI call.
+
+        ``--goto`` applies to every path argument, so one `code` process opens
+        them all instead of one Node start-up per file.
+        """
+        if not files:
+            raise ValueError("No files to open")
+        targets = [
+            f"{f['file_path']}:{f['line']}" if f.get("line") else f["file_path"]
+            for f in files
+        ]
+        await self._run("--goto", *targets, capture=False)
+        return f"Opened {len(targets)} files"
+
     async def open_folder(self, folder_path: str) -> str:
         """Open a folder in VS Code."""
-        await self._run(folder_path)
+        await self._run(folder_path, capture=False)
         return f"Opened folder: {folder_path}"
 
     # ── Task execution ─────────────────────────────────────────
 
     async def run_task(self, project_key: str, task_name: str) -> str:
         """Execute a VS Code task (runs the task runner in the project workspace)."""
-        project = self._project(project_key)
-        if not project:
-            raise ValueError(f"Unknown project: {project_key}")
-        path = project.get("path", ".")
+        _, folder_uri = self._targets(project_key)
         # VS Code --run-task only works when a workspace is already open, so we
         # open the workspace and schedule the task via the command palette
-        await self._run("--folder-uri", f"file://{path}", "--run-task", task_name)
+        await self._run(
+            "--folder-uri",
+            folder_uri,
+            "--run-task",
+            task_name,
+            capture=False,
+        )
         return f"Task '{task_name}' triggered in project '{project_key}'"
 
     # ── Extensions ────────────────────────────────────────────
 
     async def install_extension(self, extension_id: str) -> str:
         """Install a VS Code extension by ID."""
-        await self._run("--install-extension", extension_id)
+        self._extensions = None
+        await self._run("--install-extension", extension_id, capture=False)
         return f"Extension '{extension_id}' installed"
 
     async def list_extensions(self) -> List[str]:
-        """Return list of installed extension IDs."""
-        result = await self._run("--list-extensions")
-        return [e.strip() for e in result.splitlines() if e.strip()]
+        """Return list of installed extension IDs.
+
+        Every CLI call starts a fresh Node process, so the list is kept for
+        EXTENSIONS_TTL_S (changes made in VS Code itself show up after that),
+        and dropped at once by an install through this service or a
+        different binary_path.
+        """
+        binary = self._binary()
+        cached = self._extensions
+        if (
+            cached is None
+            or cached[1] != binary
+            or time.monotonic() - cached[0] >= EXTENSIONS_TTL_S
+        ):
+            result = await self._run("--list-extensions")
+            # One "publisher.name" per line; ids never contain whitespace
+            cached = self._extensions = (time.monotonic(), binary, result.split())
+        return list(cached[2])
 
     # ── Diagnostics ────────────────────────────────────────────
 
@@ -105,13 +183,13 @@ class VSCodeService:
             return {"status": "error", "detail": f"Unknown project: {project_key}"}
 
         path = Path(project.get("path", "."))
-        # Look for common output files
-        candidates = [
-            path / "lint-results.json",
-            path / ".eslintcache",
-            path / "test-results.xml",
-        ]
-        found = [str(c) for c in candidates if c.exists()]
+        # One directory read instead of a stat per candidate
+        try:
+            with os.scandir(path) as entries:
+                names = {entry.name for entry in entries}
+        except OSError:
+            names = set()
+        found = [str(path / name) for name in _DIAGNOSTIC_FILES if name in names]
         return {
             "status": "ok",
             "project": project_key,
@@ -122,15 +200,26 @@ class VSCodeService:
     # ── Status ────────────────────────────────────────────────
 
     async def get_version(self) -> str:
-        """Return VS Code version string."""
-        try:
-            return await self._run("--version")
-        except Exception as exc:
-            return f"VS Code not found: {exc}"
+        """Return VS Code version string (cached for VERSION_TTL_S)."""
+        binary = self._binary()
+        async with self._version_lock:
+            cached = self._version
+            if (
+                cached is not None
+                and cached[1] == binary
+                and time.monotonic() - cached[0] < VERSION_TTL_S
+            ):
+                return cached[2]
+            try:
+                version = await self._run("--version")
+            except Exception as exc:
+                return f"VS Code not found: {exc}"
+            self._version = (time.monotonic(), binary, version)
+            return version
 
     def list_projects(self) -> Dict[str, Any]:
         """Return all configured projects."""
-        return self._cfg().get("projects", {})
+        return copy.deepcopy(self._cfg().get("projects", {}))
 
     # ── Generic action dispatcher ──────────────────────────────
 
@@ -142,6 +231,8 @@ class VSCodeService:
                 result = await self.open_file_at_line(
                     params["file_path"], params.get("line")
                 )
+            elif action == "open_files":
+                result = await self.open_files(params["files"])
             elif action == "open_folder":
                 result = await self.open_folder(params["path"])
             elif action == "run_task":
@@ -175,10 +266,14 @@ class VSCodeService:
 
 
 _vscode_service: Optional[VSCodeService] = None
+_vscode_service_lock = threading.Lock()
 
 
 def get_vscode_service() -> VSCodeService:
     global _vscode_service
     if _vscode_service is None:
-        _vscode_service = VSCodeService()
+        # Callers in worker threads must not build a second instance
+        with _vscode_service_lock:
+            if _vscode_service is None:
+                _vscode_service = VSCodeService()
     return _vscode_service
@@ -1,12 +1,19 @@
 """WebSocket connection manager – broadcast messages to all connected clients."""
 
 import asyncio
-import json
 import logging
-from typing import Any, Dict, List
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Union
 
+import msgpack
+import orjson
 from fastapi import WebSocket
 
+try:
+    from pybase64 import b64encode as _b64encode  # SIMD encoder
+except ImportError:  # optional – stdlib is fine, just slower on big payloads
+    from base64 import b64encode as _b64encode
+
 from app.services.metrics_service import ws_connected_clients, ws_messages_total
 
 logger = logging.getLogger(__name__)
@@ -22,53 +29,170 @@ WS_EVENT_NIGHTLY_SUMMARY = "nightly_summary_ready"
 WS_EVENT_JOB_UPDATE = "job_update"
 WS_EVENT_JOB_COMPLETED = "job_completed"
 WS_EVENT_JOB_FAILED = "job_failed"
+# Several coalesced messages delivered in one frame: {"type", "messages": [...]}
+WS_EVENT_BATCH = "batch"
+
+# Subprotocol a client requests to receive msgpack binary frames instead of JSON
+WS_SUBPROTOCOL_MSGPACK = "msgpack"
+
+# broadcast_coalesced() messages within this window share one frame
+WS_COALESCE_WINDOW_S = 0.01
+
+# orjson flags for every JSON frame, combined once at import
+_ORJSON_OPTS = orjson.OPT_NON_STR_KEYS
 
 
 class ConnectionManager:
     def __init__(self) -> None:
-        self._connections: List[WebSocket] = []
+        self._connections: Set[WebSocket] = set()
+        self._binary: Set[WebSocket] = set()
         self._lock = asyncio.Lock()
+        # Messages waiting for the coalescing window, and its pending flush
+        self._pending: List[Dict[str, Any]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: Set[asyncio.Task] = set()
 
     async def connect(self, websocket: WebSocket) -> None:
-        await websocket.accept()
+        requested = websocket.scope.get("subprotocols") or []
+        if WS_SUBPROTOCOL_MSGPACK in requested:
+            await websocket.accept(subprotocol=WS_SUBPROTOCOL_MSGPACK)
+            self._binary.add(websocket)
+        else:
+            await websocket.accept()
         async with self._lock:
-            self._connections.append(websocket)
+            self._connections.add(websocket)
         ws_connected_clients.set(len(self._connections))
         logger.info("WS client connected. Total: %d", len(self._connections))
 
     def disconnect(self, websocket: WebSocket) -> None:
-        if websocket in self._connections:
-            self._connections.remove(websocket)
+        self._drop([websocket])
+
+    def _drop(self, websockets: Iterable[WebSocket]) -> None:
+        """Unregister *websockets*; O(1) per socket."""
+        gone = set(websockets)
+        self._connections -= gone
+        self._binary -= gone
         ws_connected_clients.set(len(self._connections))
-        logger.info("WS client disconnected. Total: %d", len(self._connections))
+        logger.info(
+            "%d WS client(s) disconnected. Total: %d",
+            len(gone),
+            len(self._connections),
+        )
 
     async def broadcast(self, message: Dict[str, Any]) -> None:
-        """Send a JSON message to all connected clients in parallel.
+        """Send a message to all connected clients in parallel.
 
         Uses asyncio.gather so a slow or dead client never blocks the event loop
         while other clients are being served. Disconnected clients are pruned
         automatically after each broadcast.
+
+        Clients that negotiated the ``msgpack`` subprotocol get a binary frame;
+        everyone else gets JSON text. Each encoding is produced at most once.
+        Coalesced messages still waiting are sent first, to keep ordering.
+        """
+        if self._pending:
+            await self._flush_pending()
+        await self._fanout(
+            message.get("type", "unknown"),
+            lambda: _encode_json(message),
+            lambda: _pack(message),
+        )
+
+    def broadcast_coalesced(self, message: Dict[str, Any]) -> None:
+        """Queue *message* for a broadcast shared with its burst.
+
+        Meant for chatty producers (per-file progress and the like): every
+        message queued within WS_COALESCE_WINDOW_S goes out as a single
+        ``batch`` frame; a lone message is sent as itself.
+        """
+        self._pending.append(message)
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                WS_COALESCE_WINDOW_S, self._schedule_flush
+            )
+
+    def _schedule_flush(self) -> None:
+        self._flush_handle = None
+        task = asyncio.create_task(self._flush_pending())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush_pending(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        if len(batch) == 1:
+            message = batch[0]
+        else:
+            message = {"type": WS_EVENT_BATCH, "messages": batch}
+        await self._fanout(
+            message.get("type", "unknown"),
+            lambda: _encode_json(message),
+            lambda: _pack(message),
+        )
+
+    async def broadcast_binary(
+        self,
+        header: Dict[str, Any],
+        payload: Union[bytes, bytearray, memoryview, array],
+    ) -> None:
+        """Broadcast raw bytes (e.g. packed float arrays) with a JSON-able header.
+
+        msgpack clients receive ``{**header, "data": payload}`` with *payload*
+        as a msgpack bin field, so numbers are never formatted or base64'd on
+        the way to them; JSON clients get ``data`` base64-encoded.
+
+        *payload* may be any buffer (an ``array("f")`` included); both
+        encoders read it through one memoryview instead of a bytes copy.
         """
-        data = json.dumps(message)
-        msg_type = message.get("type", "unknown")
+        view = memoryview(payload)
+        await self._fanout(
+            header.get("type", "unknown"),
+            lambda: _encode_json({**header, "data": _b64encode(view).decode("ascii")}),
+            lambda: _pack({**header, "data": view}),
+        )
+
+    async def _fanout(
+        self,
+        msg_type: str,
+        encode_text: Callable[[], str],
+        encode_binary: Callable[[], bytes],
+    ) -> None:
         ws_messages_total.labels(type=msg_type).inc()
         async with self._lock:
             conns = list(self._connections)  # snapshot under lock
         if not conns:
             return
-        results = await asyncio.gather(
-            *[c.send_text(data) for c in conns],
-            return_exceptions=True,
-        )
+        text = packed = None
+        sends = []
+        for c in conns:
+            if c in self._binary:
+                if packed is None:
+                    packed = encode_binary()
+                sends.append(c.send_bytes(packed))
+            else:
+                if text is None:
+                    text = encode_text()
+                sends.append(c.send_text(text))
+        results = await asyncio.gather(*sends, return_exceptions=True)
+        dead = []
         for conn, result in zip(conns, results):
             if isinstance(result, Exception):
                 logger.debug("WS client disconnected during broadcast: %s", result)
-                self.disconnect(conn)
+                dead.append(conn)
+        if dead:
+            self._drop(dead)
 
     async def send_to(self, websocket: WebSocket, message: Dict[str, Any]) -> None:
-        """Send a JSON message to a single client."""
+        """Send a message to a single client in its negotiated encoding."""
         try:
-            await websocket.send_json(message)
+            if websocket in self._binary:
+                await websocket.send_bytes(_pack(message))
+            else:
+                await websocket.send_text(_encode_json(message))
         except Exception as exc:
             logger.debug("Send to client failed: %s", exc)
             self.disconnect(websocket)
@@ -78,6 +202,15 @@ class ConnectionManager:
         return len(self._connections)
 
 
+def _pack(message: Dict[str, Any]) -> bytes:
+    return msgpack.packb(message, use_bin_type=True, default=str)
+
+
+def _encode_json(message: Dict[str, Any]) -> str:
+    # Text frames: browser clients JSON.parse() the event data
+    return orjson.dumps(message, option=_ORJSON_OPTS).decode()
+
+
 # Shared singleton
 manager = ConnectionManager()
 
@@ -37,6 +37,10 @@ MIN_KB_SEARCH_SCORE: float = 0.3
 #: agent trees that would exhaust resources.
 MAX_SUB_AGENT_DEPTH: int = 2
 
+#: Seconds a sub-agent spawn waits for a free concurrency slot before it is
+#: rejected.  Top-level spawns from the API never wait and fail fast instead.
+SUB_AGENT_SLOT_WAIT_S: float = 10.0
+
 # ── Text chunking ────────────────────────────────────────────────────────────
 
 #: Default target chunk size (in characters) used when splitting documents
@@ -0,0 +1,55 @@
+"""File helpers shared by the JSON-backed services."""
+
+import os
+import uuid
+from pathlib import Path
+
+# fdatasync() is not available on macOS; fsync() is the portable fallback
+_datasync = getattr(os, "fdatasync", os.fsync)
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Replace *path* with *data* so readers never see a partial file.
+
+    The bytes go to a temporary file in the same directory with as few
+    write() calls as the kernel allows, are flushed to disk, and the file is
+    then renamed over *path* (atomic on POSIX).  The file keeps the mode of
+    the one it replaces (new files get the umask default), and the directory
+    is fsynced afterwards so the rename itself survives a crash.
+    """
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        try:
+            os.fchmod(fd, os.stat(path).st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view) :]
+        _datasync(fd)
+    except BaseException:
+        os.close(fd)
+        tmp.unlink(missing_ok=True)
+        raise
+    os.close(fd)
+    try:
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    _fsync_dir(path.parent)
+
+
+def _fsync_dir(directory: Path) -> None:
+    """Flush a directory entry change (e.g. a rename) to disk, where supported."""
+    try:
+        fd = os.open(directory, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,110 @@
+"""Subprocess helpers shared by the git, macOS and CLI integration services.
+
+Timeouts never leave a child running, and large outputs are parsed off the
+event loop.
+"""
+
+import asyncio
+import os
+import signal
+import subprocess
+from typing import AnyStr, Awaitable, Callable, List, Optional, Tuple, TypeVar, Union
+
+T = TypeVar("T")
+
+# Below this many characters/bytes a thread hop costs more than the parse
+PARSE_IN_THREAD_MIN = 4096
+
+
+def kill_process_group(
+    proc: Union[asyncio.subprocess.Process, subprocess.Popen],
+) -> None:
+    """SIGKILL *proc* and everything it spawned.
+
+    The child must have been started with ``start_new_session=True`` so it
+    leads its own process group (git hooks, ssh, credential helpers…).
+    """
+    if proc.returncode is not None:
+        return
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+
+
+async def wait_or_kill(
+    proc: asyncio.subprocess.Process, aw: Awaitable[T], timeout: float
+) -> T:
+    """Await *aw* (I/O on *proc*) bounded by *timeout*.
+
+    On timeout (or cancellation) the process group is killed and reaped
+    before the exception propagates, so no zombie is left behind.
+    """
+    try:
+        return await asyncio.wait_for(aw, timeout=timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        kill_process_group(proc)
+        await proc.wait()
+        raise
+
+
+async def communicate_or_kill(
+    proc: asyncio.subprocess.Process, timeout: float
+) -> Tuple[bytes, bytes]:
+    """``proc.communicate()`` bounded by *timeout*; see wait_or_kill()."""
+    return await wait_or_kill(proc, proc.communicate(), timeout)
+
+
+async def parse_output(parse: Callable[[AnyStr], T], output: AnyStr) -> T:
+    """Run *parse(output)* inline for short output, in a worker thread otherwise.
+
+    Keeps long command output (thousands of status lines, app lists…) from
+    stalling websocket handlers while it is split and converted.
+    """
+    if len(output) > PARSE_IN_THREAD_MIN:
+        return await asyncio.to_thread(parse, output)
+    return parse(output)
+
+
+async def run_in_thread(
+    args: List[str],
+    timeout: float,
+    cwd: Optional[str] = None,
+    capture_stdout: bool = True,
+) -> subprocess.CompletedProcess:
+    """Run *args* to completion in worker threads and capture its output.
+
+    Blocking ``Popen``/``communicate`` in threads avoids asyncio's child
+    watcher, so the fork/exec never stalls the event loop and concurrent
+    actions do not queue behind each other's SIGCHLD handling.
+
+    The child leads its own process group; on timeout (surfaced as
+    ``asyncio.TimeoutError``) or cancellation the whole group is killed, so
+    helpers it spawned do not outlive it and the worker thread is released.
+
+    With ``capture_stdout=False`` stdout goes to /dev/null and the result's
+    ``stdout`` is None; stderr is always captured for error reporting.
+    """
+    proc = await asyncio.to_thread(
+        subprocess.Popen,
+        args,
+        stdout=subprocess.PIPE if capture_stdout else subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        stdin=subprocess.DEVNULL,
+        cwd=cwd,
+        start_new_session=True,
+    )
+    try:
+        stdout, stderr = await asyncio.to_thread(proc.communicate, timeout=timeout)
+    except subprocess.TimeoutExpired as exc:
+        kill_process_group(proc)
+        await asyncio.to_thread(proc.communicate)
+        raise asyncio.TimeoutError(str(exc)) from exc
+    except asyncio.CancelledError:
+        # The worker's communicate() returns once the group's pipes close
+        kill_process_group(proc)
+        raise
+    return subprocess.CompletedProcess(args, proc.returncode, stdout, stderr)
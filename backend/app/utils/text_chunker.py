@@ -19,39 +19,36 @@ def chunk_text(
     Returns:
         List of text chunks
     """
-    if not text.strip():
+    words = text.split()
+    if not words:
         return []
 
+    # Chunks are slices of the single-spaced text. Counting one space per
+    # word, [start, end) has length end - start + 1, so both boundaries are
+    # found with str.find/rfind instead of walking the words in Python.
+    flat = " ".join(words)
+    size = len(flat)
     chunks = []
-    words = text.split()
-    current_chunk: List[str] = []
-    current_length = 0
-
-    for word in words:
-        word_len = len(word) + 1  # +1 for space
-
-        if current_length + word_len > chunk_size and current_chunk:
-            # Save current chunk
-            chunks.append(" ".join(current_chunk))
-
-            # Start new chunk with overlap
-            overlap_words: List[str] = []
-            overlap_length = 0
-            for w in reversed(current_chunk):
-                if overlap_length + len(w) + 1 <= overlap:
-                    overlap_words.insert(0, w)
-                    overlap_length += len(w) + 1
-                else:
-                    break
-
-            current_chunk = overlap_words
-            current_length = overlap_length
-
-        current_chunk.append(word)
-        current_length += word_len
-
-    # Add last chunk
-    if current_chunk:
-        chunks.append(" ".join(current_chunk))
-
-    return chunks
+    start = 0
+    # End of the word a chunk must include even if it does not fit
+    min_end = flat.find(" ")
+    while True:
+        if min_end < 0:
+            min_end = size
+        limit = start + chunk_size - 1
+        if limit >= size:
+            end = size
+        else:
+            # Grow to the last word ending within the limit
+            end = max(min_end, flat.rfind(" ", start, limit + 1))
+        chunks.append(flat[start:end])
+        if end == size:
+            return chunks
+
+        # The next chunk repeats the longest tail of words fitting in overlap
+        # and always takes the word that did not fit
+        nxt = end + 1
+        tail = end + 1 - overlap
+        if tail > start:
+            start = flat.find(" ", tail - 1, end) + 1 or nxt
+        min_end = flat.find(" ", nxt)
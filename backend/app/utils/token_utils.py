@@ -51,7 +51,8 @@ def trim_messages_to_fit(
     """Trim messages to fit within max_tokens.
 
     Always preserves: system messages (if preserve_system) + last N messages.
-    Removes oldest non-system messages first.
+    Removes oldest non-system messages first.  Kept messages stay in their
+    original order, so a system message placed mid-conversation stays put.
 
     Returns (trimmed_messages, was_trimmed).
     """
@@ -59,28 +60,26 @@ def trim_messages_to_fit(
     if current_tokens <= max_tokens:
         return messages, False
 
-    # Separate system messages and conversation messages
-    system_msgs: List[Dict[str, str]] = []
-    conv_msgs: List[Dict[str, str]] = []
-
-    for m in messages:
-        if preserve_system and m.get("role") == "system":
-            system_msgs.append(m)
-        else:
-            conv_msgs.append(m)
+    # Indices of conversation messages, oldest first
+    conv_idx = [
+        i
+        for i, m in enumerate(messages)
+        if not (preserve_system and m.get("role") == "system")
+    ]
 
     # Always keep the last N conversation messages
-    if len(conv_msgs) <= preserve_last_n:
+    if len(conv_idx) <= preserve_last_n:
         # Can't trim further – return as is
         return messages, False
 
-    preserved_tail = conv_msgs[-preserve_last_n:]
-    trimmable = conv_msgs[:-preserve_last_n]
+    trimmable = conv_idx[: len(conv_idx) - preserve_last_n]
 
     # Remove oldest messages one by one until we fit
-    result = system_msgs + trimmable + preserved_tail
-    while estimate_messages_tokens(result) > max_tokens and trimmable:
-        trimmable.pop(0)
-        result = system_msgs + trimmable + preserved_tail
-
-    return result, True
+    dropped = set()
+    for i in trimmable:
+        if current_tokens <= max_tokens:
+            break
+        dropped.add(i)
+        current_tokens -= estimate_tokens(messages[i].get("content", ""))
+
+    return [m for i, m in enumerate(messages) if i not in dropped], True
@@ -338,7 +338,8 @@ class ReconnectingWS {
       try {
         const msg = JSON.parse(event.data);
         if (msg.type === 'pong') return;   // heartbeat reply – ignore
-        handleWsMessage(msg);
+        if (msg.type === 'batch') msg.messages.forEach(handleWsMessage);
+        else handleWsMessage(msg);
       } catch (e) { /* ignore parse errors */ }
     };
 
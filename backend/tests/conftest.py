@@ -1,5 +1,6 @@
 """Shared pytest fixtures for the ai-home-hub backend test suite."""
 
+import json
 import sys
 from typing import Any, Dict
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -41,7 +42,8 @@ def _make_ollama_mock() -> tuple:
     Build a patched httpx.AsyncClient that intercepts Ollama HTTP calls.
 
     Returns (mock_class, call_log) where call_log is a list of dicts
-    ``{"url": str, "json": dict}`` appended for each POST request.
+    ``{"url": str, "json": dict}`` appended for each POST request
+    (plain or streamed).
 
     Response routing:
     - URL contains ``/api/generate`` → ``{"response": "mocked vision reply"}``
@@ -59,14 +61,28 @@ def _make_ollama_mock() -> tuple:
             mock_resp.json.return_value = {"message": {"content": "mocked chat reply"}}
         return mock_resp
 
+    def _fake_stream(method: str, url: str, **kwargs: Any) -> AsyncMock:
+        call_log.append({"url": url, "json": kwargs.get("json", {})})
+
+        async def _aiter_lines():
+            yield json.dumps({"message": {"content": "mocked chat reply"}})
+            yield json.dumps({"message": {"content": ""}, "done": True})
+
+        mock_resp = AsyncMock()
+        mock_resp.raise_for_status = MagicMock(return_value=None)
+        mock_resp.aiter_lines = _aiter_lines
+        mock_resp.__aenter__ = AsyncMock(return_value=mock_resp)
+        mock_resp.__aexit__ = AsyncMock(return_value=False)
+        return mock_resp
+
+    # Usable both as a shared client and as ``async with httpx.AsyncClient()``
     mock_client = AsyncMock()
     mock_client.post.side_effect = _fake_post
+    mock_client.stream = MagicMock(side_effect=_fake_stream)
+    mock_client.__aenter__ = AsyncMock(return_value=mock_client)
+    mock_client.__aexit__ = AsyncMock(return_value=False)
 
-    mock_ctx = AsyncMock()
-    mock_ctx.__aenter__ = AsyncMock(return_value=mock_client)
-    mock_ctx.__aexit__ = AsyncMock(return_value=False)
-
-    mock_class = MagicMock(return_value=mock_ctx)
+    mock_class = MagicMock(return_value=mock_client)
     return mock_class, call_log
 
 
@@ -125,10 +125,162 @@ async def test_get_agent_artifacts_with_preview_returns_preview_data(
     artifact_path = tmp_path / f"{artifact_id}.json"
     artifact_path.write_text(json.dumps(artifact_data))
 
-    arts = orchestrator.get_agent_artifacts_with_preview(agent_id)
+    arts = await orchestrator.get_agent_artifacts_with_preview(agent_id)
 
     assert len(arts) >= 1
     report_art = next(a for a in arts if a["artifact_type"] == "report")
     assert "preview" in report_art
     assert len(report_art["preview"]) == 500
     assert report_art["preview"] == long_content[:500]
+
+
+@pytest.mark.asyncio
+async def test_generate_artifact_stores_size_and_preview(orchestrator, tmp_path):
+    """generate_artifact persists size and preview so listing needs no re-serialisation."""
+    content = {"goal": "g", "content": "Y" * 700}
+    artifact_id = await orchestrator.generate_artifact("agent1", "plan", content)
+
+    stored = json.loads((tmp_path / f"{artifact_id}.json").read_text())
+
+    assert stored["size"] == len(json.dumps(content).encode("utf-8"))
+    assert stored["preview"] == "Y" * 500
+
+
+@pytest.mark.asyncio
+async def test_artifact_preview_backfills_legacy_artifacts(orchestrator, tmp_path):
+    """Artifacts without stored preview fields are backfilled and rewritten on read."""
+    agent_id = await orchestrator.spawn_agent("general", {"goal": "legacy"})
+    legacy = {
+        "artifact_id": "legacy01",
+        "agent_id": agent_id,
+        "artifact_type": "test_results",
+        "content": {"passed": 3},
+        "created_at": "2024-01-01T00:00:00+00:00",
+    }
+    (tmp_path / "legacy01.json").write_text(json.dumps(legacy))
+    orchestrator._agents[agent_id].artifacts.append("legacy01")
+
+    arts = await orchestrator.get_agent_artifacts_with_preview(agent_id)
+
+    art = next(a for a in arts if a["artifact_id"] == "legacy01")
+    assert art["type"] == "json"
+    assert art["preview"] == json.dumps({"passed": 3})
+    rewritten = json.loads((tmp_path / "legacy01.json").read_text())
+    assert rewritten["size"] == art["size"]
+    assert rewritten["preview"] == art["preview"]
+
+
+@pytest.mark.asyncio
+async def test_spawn_rejected_when_slots_exhausted(orchestrator):
+    """Top-level spawns fail fast with concurrent_limit once all slots are taken."""
+    from app.services.agent_orchestrator import AgentSpawnError
+
+    orchestrator._settings.load.return_value = {
+        "agents": {"max_concurrent": 1, "timeout_minutes": 1}
+    }
+    await orchestrator.spawn_agent("general", {"goal": "first"})
+
+    with pytest.raises(AgentSpawnError) as exc_info:
+        await orchestrator.spawn_agent("general", {"goal": "second"})
+    assert exc_info.value.reason == "concurrent_limit"
+
+
+@pytest.mark.asyncio
+async def test_failed_spawn_releases_its_slot(orchestrator):
+    """An error between acquiring the slot and starting the task frees the slot."""
+    orchestrator._settings.load.return_value = {
+        "agents": {"max_concurrent": 1, "timeout_minutes": 1}
+    }
+    with patch(
+        "app.services.agent_orchestrator.AgentRecord",
+        side_effect=RuntimeError("boom"),
+    ):
+        with pytest.raises(RuntimeError):
+            await orchestrator.spawn_agent("general", {"goal": "broken"})
+
+    assert await orchestrator.spawn_agent("general", {"goal": "next"})
+
+
+@pytest.mark.asyncio
+async def test_sub_agent_waits_for_free_slot(orchestrator):
+    """Sub-agent spawns wait for a slot instead of being rejected outright."""
+    import asyncio
+
+    orchestrator._settings.load.return_value = {
+        "agents": {"max_concurrent": 1, "timeout_minutes": 1}
+    }
+    parent_id = await orchestrator.spawn_agent("general", {"goal": "parent"})
+
+    sub_task = asyncio.create_task(orchestrator.spawn_sub_agent(parent_id, "child"))
+    await asyncio.sleep(0)
+    assert not sub_task.done()
+
+    await orchestrator.interrupt_agent(parent_id)
+    child_id = await asyncio.wait_for(sub_task, timeout=5)
+
+    assert child_id is not None
+    assert orchestrator._agents[child_id].parent_agent_id == parent_id
+
+
+@pytest.mark.asyncio
+async def test_agent_dict_cache_invalidated_on_change(orchestrator):
+    """to_dict() is cached until the record changes; state_etag follows changes."""
+    agent_id = await orchestrator.spawn_agent("general", {"goal": "cache"})
+    record = orchestrator._agents[agent_id]
+    await orchestrator.interrupt_agent(agent_id)
+
+    first = record.to_dict()
+    etag = orchestrator.state_etag
+    assert record.to_dict() is first
+
+    record.progress = 42
+    assert record.to_dict() is not first
+    assert record.to_dict()["progress"] == 42
+    assert orchestrator.state_etag != etag
+
+
+def test_list_agents_returns_304_when_unchanged(client):
+    """GET /api/agents honours If-None-Match with the orchestrator ETag."""
+    first = client.get("/api/agents")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    second = client.get("/api/agents", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_agent_status_serialised_as_lowercase_name(orchestrator):
+    """AgentStatus flags are exposed to the frontend as lower-case strings."""
+    import asyncio
+
+    from app.services.agent_orchestrator import AGENT_STATUS_FINISHED
+
+    agent_id = await orchestrator.spawn_agent("general", {"goal": "status"})
+    assert orchestrator.get_agent(agent_id)["status"] == "pending"
+
+    await asyncio.sleep(0)  # let the agent task start
+    await orchestrator.interrupt_agent(agent_id)
+    record = orchestrator._agents[agent_id]
+    assert record.status & AGENT_STATUS_FINISHED
+    assert orchestrator.get_agent(agent_id)["status"] in (
+        "completed",
+        "failed",
+        "interrupted",
+    )
+    assert orchestrator.cleanup_finished() == 1
+
+
+@pytest.mark.asyncio
+async def test_broadcast_skipped_without_listeners(orchestrator):
+    """No agent dict is built or sent while the broadcaster has zero clients."""
+    sent = AsyncMock()
+    clients = {"n": 0}
+    orchestrator.set_broadcast(sent, lambda: clients["n"])
+
+    agent_id = await orchestrator.spawn_agent("general", {"goal": "quiet"})
+    sent.assert_not_awaited()
+
+    clients["n"] = 1
+    await orchestrator._broadcast(orchestrator._agents[agent_id])
+    sent.assert_awaited_once()
@@ -0,0 +1,104 @@
+"""Tests for the persistent stdio MCP connection."""
+
+import sys
+import textwrap
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services import claude_mcp_service as mod
+from app.services.claude_mcp_service import ClaudeMCPService
+
+# Minimal newline-delimited JSON-RPC MCP server
+_FAKE_SERVER = textwrap.dedent("""
+    import json, os, sys
+
+    for line in sys.stdin:
+        msg = json.loads(line)
+        if "id" not in msg:
+            continue  # notifications/initialized
+        if msg["method"] == "initialize":
+            result = {"protocolVersion": msg["params"]["protocolVersion"]}
+        elif msg["params"]["name"] == "fail":
+            print(json.dumps({"jsonrpc": "2.0", "id": msg["id"],
+                              "error": {"code": -32602, "message": "bad tool"}}))
+            sys.stdout.flush()
+            continue
+        else:
+            result = {"content": [{"type": "text", "text": str(os.getpid())}],
+                      "echo": msg["params"]["arguments"]}
+        print("log noise")
+        print("[]")  # valid JSON that is not a JSON-RPC message
+        print(1)
+        print(json.dumps({"jsonrpc": "2.0", "id": msg["id"], "result": result}))
+        sys.stdout.flush()
+    """)
+
+
+@pytest.fixture
+def mcp(tmp_path):
+    script = tmp_path / "server.py"
+    script.write_text(_FAKE_SERVER)
+    svc = ClaudeMCPService()
+    svc._settings = MagicMock()
+    svc._settings.get_integration_config.return_value = {
+        "enabled": True,
+        "connection_type": "stdio",
+        "stdio_path": sys.executable,
+        "stdio_args": [str(script)],
+    }
+    return svc
+
+
+@pytest.mark.asyncio
+async def test_stdio_calls_reuse_one_server_process(mcp):
+    try:
+        first = await mcp.call_tool("github_list_issues", {"repository": "a/b"})
+        second = await mcp.call_tool("brave_search", {"query": "x"})
+    finally:
+        await mcp.aclose()
+
+    assert first["echo"] == {"repository": "a/b"}
+    assert second["echo"] == {"query": "x"}
+    assert first["content"] == second["content"]  # same server pid
+    assert not mcp.get_status()["stdio_running"]
+
+
+@pytest.mark.asyncio
+async def test_stdio_error_response_raises(mcp):
+    try:
+        with pytest.raises(RuntimeError, match="bad tool"):
+            await mcp.call_tool("fail", {})
+        assert mcp._stdio_pending == {}
+    finally:
+        await mcp.aclose()
+
+
+@pytest.mark.asyncio
+async def test_stdio_missing_server_binary(mcp, tmp_path):
+    mcp._settings.get_integration_config.return_value["stdio_path"] = str(
+        tmp_path / "missing"
+    )
+    with pytest.raises(RuntimeError, match="not found"):
+        await mcp.call_tool("github_list_issues", {})
+
+
+@pytest.mark.asyncio
+async def test_stdio_server_ignoring_sigterm_is_killed(mcp, tmp_path, monkeypatch):
+    script = tmp_path / "stubborn.py"
+    script.write_text(
+        "import signal, sys\n"
+        "signal.signal(signal.SIGTERM, signal.SIG_IGN)\n"
+        + (tmp_path / "server.py").read_text()
+    )
+    mcp._settings.get_integration_config.return_value["stdio_args"] = [str(script)]
+    monkeypatch.setattr(mod, "_STDIO_STOP_TIMEOUT_S", 0.2)
+
+    await mcp.call_tool("github_list_issues", {})
+    proc = mcp._stdio_proc
+    started = time.monotonic()
+    await mcp.aclose()
+
+    assert proc.returncode is not None
+    assert time.monotonic() - started < 5
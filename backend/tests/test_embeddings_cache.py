@@ -3,6 +3,7 @@
 import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import orjson
 import pytest
 
 
@@ -25,7 +26,7 @@ def _make_mock_client(embedding: list[float]):
     """Build a mock httpx.AsyncClient that returns a fixed embedding."""
     mock_resp = MagicMock()
     mock_resp.raise_for_status.return_value = None
-    mock_resp.json.return_value = {"embedding": embedding}
+    mock_resp.content = orjson.dumps({"embedding": embedding})
 
     mock_client = AsyncMock()
     mock_client.post = AsyncMock(return_value=mock_resp)
@@ -39,15 +40,16 @@ async def test_cache_hit():
     """Second call with same text should return cached result without calling Ollama."""
     from app.services.embeddings_service import EmbeddingsService
 
-    mock_client = _make_mock_client([0.1, 0.2, 0.3])
+    # Exact in float32, the precision the cache stores vectors at
+    mock_client = _make_mock_client([0.5, 0.25, 0.125])
 
     with patch("httpx.AsyncClient", return_value=mock_client):
         svc = EmbeddingsService()
         result1 = await svc.get_embedding("hello world")
         result2 = await svc.get_embedding("hello world")
 
-    assert result1 == [0.1, 0.2, 0.3]
-    assert result2 == [0.1, 0.2, 0.3]
+    assert result1 == [0.5, 0.25, 0.125]
+    assert result2 == [0.5, 0.25, 0.125]
     # Only one actual call to Ollama
     assert mock_client.post.await_count == 1
     assert svc._cache_hits == 1
@@ -160,3 +162,162 @@ async def test_empty_text_returns_none():
     result = await svc.get_embedding("   ")
     assert result is None
     assert len(svc._cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_batch_sends_misses_in_one_request():
+    """generate_embeddings_batch embeds all cache misses in a single /api/embed call."""
+    from app.services.embeddings_service import EmbeddingsService
+
+    mock_client = _make_mock_client([9.0])
+
+    with patch("httpx.AsyncClient", return_value=mock_client):
+        svc = EmbeddingsService()
+        await svc.get_embedding("cached")  # primes the cache
+
+        mock_client.post.reset_mock()
+        mock_client.post.return_value.content = orjson.dumps(
+            {"embeddings": [[1.0], [2.0]]}
+        )
+        result = await svc.generate_embeddings_batch(
+            ["a", "cached", "", "b", "a"], batch_size=64
+        )
+
+    assert result == [[1.0], [9.0], None, [2.0], [1.0]]
+    assert mock_client.post.await_count == 1
+    sent = orjson.loads(mock_client.post.await_args.kwargs["content"])["input"]
+    assert sent == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_batch_splits_by_batch_size():
+    """Misses are chunked into requests of at most batch_size inputs."""
+    from app.services.embeddings_service import EmbeddingsService
+
+    mock_client = _make_mock_client([0.0])
+    mock_client.post.return_value.content = orjson.dumps({"embeddings": [[0.0], [0.0]]})
+
+    with patch("httpx.AsyncClient", return_value=mock_client):
+        svc = EmbeddingsService()
+        result = await svc.generate_embeddings_batch(
+            ["t1", "t2", "t3", "t4"], batch_size=2
+        )
+
+    assert mock_client.post.await_count == 2
+    assert result == [[0.0]] * 4
+
+
+@pytest.mark.asyncio
+async def test_persistent_tier_survives_new_service(tmp_path):
+    """Vectors stored in the SQLite tier are served to a fresh service instance."""
+    from app.db.embeddings_cache import EmbeddingsCacheDB
+    from app.services.embeddings_service import EmbeddingsService
+
+    db = EmbeddingsCacheDB(tmp_path / "emb.db")
+    mock_client = _make_mock_client([0.5, 0.25])
+
+    with patch("httpx.AsyncClient", return_value=mock_client):
+        await EmbeddingsService(persistent_cache=db).get_embedding("persist me")
+        fresh = EmbeddingsService(persistent_cache=db)
+        result = await fresh.get_embedding("persist me")
+
+    assert result == [0.5, 0.25]
+    assert mock_client.post.await_count == 1
+    assert fresh._cache_hits == 1
+    assert db.count() == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_key_includes_model():
+    """Changing the embeddings model must not serve vectors of the old model."""
+    from app.services.embeddings_service import EmbeddingsService, get_settings_service
+
+    mock_client = _make_mock_client([1.0])
+
+    with patch("httpx.AsyncClient", return_value=mock_client):
+        svc = EmbeddingsService()
+        await svc.get_embedding("same text")
+        get_settings_service().load.return_value = {
+            "llm": {"embeddings_model": "mxbai-embed-large"}
+        }
+        await svc.get_embedding("same text")
+
+    assert mock_client.post.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_vectors_cached_as_float32_arrays():
+    """The cache holds packed float32 buffers; callers get independent lists."""
+    from array import array
+
+    from app.services.embeddings_service import EmbeddingsService
+
+    mock_client = _make_mock_client([0.1, 0.5])
+
+    with patch("httpx.AsyncClient", return_value=mock_client):
+        svc = EmbeddingsService()
+        first = await svc.get_embedding("text")
+        packed = await svc.generate_embeddings_packed(["text", " "])
+
+    ((cached, _),) = svc._cache.values()
+    assert isinstance(cached, array) and cached.typecode == "f"
+    assert packed == [cached, None]
+    assert first == cached.tolist() == pytest.approx([0.1, 0.5])
+    first.append(1.0)
+    assert await svc.get_embedding("text") == cached.tolist()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_single_requests_share_one_batch():
+    """get_embedding calls inside one batching window become one /api/embed call."""
+    import asyncio
+
+    from app.services.embeddings_service import EmbeddingsService
+
+    mock_client = _make_mock_client([0.0])
+    mock_client.post.return_value.content = orjson.dumps(
+        {"embeddings": [[1.0], [2.0], [3.0]]}
+    )
+
+    with patch("httpx.AsyncClient", return_value=mock_client):
+        svc = EmbeddingsService()
+        results = await asyncio.gather(
+            svc.get_embedding("a"), svc.get_embedding("b"), svc.get_embedding("c")
+        )
+
+    assert results == [[1.0], [2.0], [3.0]]
+    assert mock_client.post.await_count == 1
+    sent = orjson.loads(mock_client.post.await_args.kwargs["content"])["input"]
+    assert sent == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_batch_window_zero_disables_micro_batching():
+    import asyncio
+
+    from app.services.embeddings_service import EmbeddingsService
+
+    mock_settings = MagicMock()
+    mock_settings.load.return_value = {"llm": {"embeddings_batch_window_ms": 0}}
+    mock_client = _make_mock_client([1.0])
+
+    with patch(
+        "app.services.embeddings_service.get_settings_service",
+        return_value=mock_settings,
+    ), patch("httpx.AsyncClient", return_value=mock_client):
+        svc = EmbeddingsService()
+        await asyncio.gather(svc.get_embedding("a"), svc.get_embedding("b"))
+
+    assert mock_client.post.await_count == 2
+
+
+def test_persistent_tier_evicts_oldest_past_max_rows(tmp_path):
+    """put_many keeps the table at max_rows by dropping the oldest entries."""
+    from app.db.embeddings_cache import EmbeddingsCacheDB
+
+    db = EmbeddingsCacheDB(tmp_path / "emb.db", max_rows=3)
+    db.put_many([("a", [1.0]), ("b", [2.0])])
+    db.put_many([("c", [3.0]), ("d", [4.0])])
+
+    assert db.count() == 3
+    assert set(db.get_many(["a", "b", "c", "d"])) == {"b", "c", "d"}
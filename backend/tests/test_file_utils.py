@@ -0,0 +1,51 @@
+"""Tests for app.utils.file_utils."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from app.utils.file_utils import atomic_write_bytes
+
+
+def test_atomic_write_replaces_content_and_leaves_no_temp(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_bytes(b"old")
+
+    atomic_write_bytes(path, b"new" * 100_000)
+
+    assert path.read_bytes() == b"new" * 100_000
+    assert [p.name for p in tmp_path.iterdir()] == ["data.json"]
+
+
+def test_atomic_write_keeps_old_file_when_write_fails(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_bytes(b"old")
+
+    with patch.object(os, "write", side_effect=OSError("disk full")):
+        with pytest.raises(OSError, match="disk full"):
+            atomic_write_bytes(path, b"new")
+
+    assert path.read_bytes() == b"old"
+    assert [p.name for p in tmp_path.iterdir()] == ["data.json"]
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+def test_atomic_write_keeps_mode_and_fsyncs_directory(tmp_path):
+    path = tmp_path / "secret.json"
+    path.write_bytes(b"old")
+    path.chmod(0o600)
+
+    real_fsync = os.fsync
+    synced = []
+
+    def spy(fd):
+        synced.append(os.path.realpath(f"/proc/self/fd/{fd}"))
+        return real_fsync(fd)
+
+    with patch.object(os, "fsync", spy):
+        atomic_write_bytes(path, b"new")
+
+    assert path.read_bytes() == b"new"
+    assert path.stat().st_mode & 0o777 == 0o600
+    assert str(tmp_path.resolve()) in synced
@@ -0,0 +1,259 @@
+"""Tests for FilesystemService access rules, search and file operations."""
+
+import os
+import shutil
+import stat
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services.filesystem_service import FilesystemService
+
+
+def _service(allowed, blacklist=()) -> FilesystemService:
+    svc = FilesystemService()
+    cfg = {
+        "allowed_directories": [str(d) for d in allowed],
+        "blacklist_patterns": list(blacklist),
+    }
+    svc._cfg = lambda: cfg
+    return svc
+
+
+def _fake_rg(bin_dir: Path, matches: int) -> None:
+    """Install an ``rg`` stub that prints *matches* hits and then hangs."""
+    line = (
+        '{"type":"match","data":{"path":{"text":"/tmp/f.txt"},'
+        '"lines":{"text":"hit\\n"},"line_number":%d}}'
+    )
+    script = bin_dir / "rg"
+    body = "\n".join(f"printf '%s\\n' '{line % (i + 1)}'" for i in range(matches))
+    script.write_text(
+        f'#!/bin/sh\necho \'{{"type":"begin"}}\'\n{body}\nexec sleep 60\n'
+    )
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+
+
+@pytest.mark.asyncio
+async def test_search_rg_stops_streaming_at_max_results(tmp_path, monkeypatch):
+    _fake_rg(tmp_path, matches=10)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+    started = time.monotonic()
+    results = await FilesystemService()._search_rg(str(tmp_path), "hit", None, 3)
+
+    assert [r["line"] for r in results] == [1, 2, 3]
+    assert results[0] == {"file": "/tmp/f.txt", "line": 1, "content": "hit"}
+    # rg was terminated instead of waited on until it exits by itself
+    assert time.monotonic() - started < 10
+
+
+@pytest.mark.asyncio
+async def test_search_python_reports_line_numbers_and_limits(tmp_path):
+    (tmp_path / "a.txt").write_text("foo\nbar foo foo\nbaz\r\nfoo", encoding="utf-8")
+    (tmp_path / "empty.txt").write_text("")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.md").write_text("no hit\nčeský foo\n", encoding="utf-8")
+
+    svc = _service([tmp_path])
+    results = await svc._search_python(tmp_path, "foo", "*.txt", 100)
+    assert [(r["line"], r["content"]) for r in results] == [
+        (1, "foo"),
+        (2, "bar foo foo"),
+        (4, "foo"),
+    ]
+
+    results = await svc._search_python(tmp_path / "sub", "foo$", None, 100)
+    assert results == [
+        {"file": str(tmp_path / "sub" / "b.md"), "line": 2, "content": "český foo"}
+    ]
+
+    assert len(await svc._search_python(tmp_path, "foo", None, 2)) == 2
+    # Invalid regex falls back to a literal search
+    assert await svc._search_python(tmp_path, "bar (", None, 10) == []
+
+
+@pytest.mark.asyncio
+async def test_search_python_matches_each_line_on_its_own(tmp_path):
+    (tmp_path / "a.txt").write_bytes(
+        "foo\r\nbar x\nČESKÝ text\nčíslo ٣\nplain needle here\n".encode()
+    )
+    svc = _service([tmp_path])
+
+    async def lines(pattern):
+        return [
+            r["line"] for r in await svc._search_python(tmp_path, pattern, None, 10)
+        ]
+
+    assert await lines(r"foo$") == [1]  # $ before \r\n
+    assert await lines(r"foo\sbar") == []  # \s never crosses a line break
+    assert await lines(r"o[^x]+bar") == []
+    assert await lines(r"\n") == [1, 2, 3, 4, 5]
+    assert await lines(r"^\w+Ý\b") == [3]  # Unicode \w
+    assert await lines(r"\d$") == [4]
+    assert await lines(r"(?i)český") == [3]
+    # Literal fast path
+    assert await lines("needle here") == [5]
+    assert await lines("x\nČ") == []
+
+
+def test_assert_allowed_whitelist_and_blacklist(tmp_path):
+    svc = _service([tmp_path / "root"], blacklist=[".env", "*.key"])
+
+    assert svc._assert_allowed(str(tmp_path / "root")) == (tmp_path / "root")
+    assert svc._assert_allowed(str(tmp_path / "root" / "a.txt")).name == "a.txt"
+    for bad in ("root/.env", "root/sub/id.key", "rootx/a.txt", "../etc/passwd"):
+        with pytest.raises(PermissionError):
+            svc._assert_allowed(str(tmp_path / bad))
+
+    with pytest.raises(PermissionError, match=r"pattern: \*\.key"):
+        svc._assert_allowed(str(tmp_path / "root" / "id.key"))
+    assert svc._fast_allowed(svc._access_rules(), str(tmp_path / "root" / "x.py"))
+    assert not svc._fast_allowed(svc._access_rules(), str(tmp_path / "root" / ".env"))
+
+    with pytest.raises(PermissionError, match="No allowed_directories"):
+        _service([])._assert_allowed(str(tmp_path))
+
+
+def test_access_rules_rebuilt_only_on_config_change(tmp_path):
+    svc = _service([tmp_path])
+    rules = svc._access_rules()
+    assert svc._access_rules() is rules
+
+    svc._cfg = lambda: {"allowed_directories": [str(tmp_path / "other")]}
+    assert svc._access_rules() is not rules
+    with pytest.raises(PermissionError):
+        svc._assert_allowed(str(tmp_path / "a.txt"))
+
+
+@pytest.mark.asyncio
+async def test_search_python_skips_blacklisted_and_escaping_files(tmp_path):
+    root = tmp_path / "root"
+    root.mkdir()
+    (root / "ok.txt").write_text("secret")
+    (root / ".env").write_text("secret")
+    (tmp_path / "outside.txt").write_text("secret")
+    (root / "link.txt").symlink_to(tmp_path / "outside.txt")
+
+    svc = _service([root], blacklist=[".env"])
+    results = await svc._search_python(root, "secret", None, 100)
+
+    assert [Path(r["file"]).name for r in results] == ["ok.txt"]
+
+
+@pytest.mark.asyncio
+async def test_list_directory_sorted_entries(tmp_path):
+    (tmp_path / "b.txt").write_text("12345")
+    (tmp_path / "a_dir").mkdir()
+    (tmp_path / "dangling").symlink_to(tmp_path / "missing")
+
+    entries = await _service([tmp_path]).list_directory(str(tmp_path))
+
+    assert [(e["name"], e["type"], e["size"]) for e in entries] == [
+        ("a_dir", "dir", None),
+        ("b.txt", "file", 5),
+    ]
+    assert entries[1]["path"] == str(tmp_path / "b.txt")
+
+
+@pytest.mark.asyncio
+async def test_copy_file_copies_content_and_into_directory(tmp_path):
+    src = tmp_path / "src.bin"
+    src.write_bytes(os.urandom(3 * 1024 * 1024 + 7))
+    (tmp_path / "out").mkdir()
+    svc = _service([tmp_path])
+
+    await svc.copy_file(str(src), str(tmp_path / "copy.bin"))
+    await svc.copy_file(str(src), str(tmp_path / "out"))
+
+    assert (tmp_path / "copy.bin").read_bytes() == src.read_bytes()
+    assert (tmp_path / "out" / "src.bin").read_bytes() == src.read_bytes()
+    assert (tmp_path / "copy.bin").stat().st_mtime == src.stat().st_mtime
+    with pytest.raises(shutil.SameFileError):
+        await svc.copy_file(str(src), str(src))
+    assert src.stat().st_size == 3 * 1024 * 1024 + 7
+
+
+@pytest.mark.asyncio
+async def test_read_file_stream_yields_chunks(tmp_path):
+    (tmp_path / "big.txt").write_text("ř" * 10 + "x" * 25, encoding="utf-8")
+    svc = _service([tmp_path], blacklist=[".env"])
+
+    chunks = [
+        c async for c in svc.read_file_stream(str(tmp_path / "big.txt"), chunk_size=10)
+    ]
+
+    assert chunks[0] == "ř" * 10
+    assert "".join(chunks) == "ř" * 10 + "x" * 25
+    with pytest.raises(PermissionError):
+        svc.read_file_stream(str(tmp_path / ".env"))
+    with pytest.raises(FileNotFoundError):
+        svc.read_file_stream(str(tmp_path / "missing.txt"))
+
+
+@pytest.mark.asyncio
+async def test_search_python_parallel_shards_keep_walk_order(tmp_path):
+    for i in range(100):
+        (tmp_path / f"f{i:03d}.txt").write_text(f"x\nneedle {i}\n")
+    svc = _service([tmp_path])
+
+    results = await svc._search_python(tmp_path, "needle", None, 1000)
+    walk_order = [str(p) for p in tmp_path.rglob("*")]
+    assert len(results) == 100
+    assert [r["file"] for r in results] == walk_order
+    assert all(r["line"] == 2 for r in results)
+
+    assert len(await svc._search_python(tmp_path, "needle", None, 40)) == 40
+
+
+@pytest.mark.asyncio
+async def test_search_python_limit_independent_of_shard_timing(tmp_path, monkeypatch):
+    from app.services import filesystem_service as mod
+
+    for i in range(100):
+        (tmp_path / f"f{i:03d}.txt").write_text(f"needle {i}\n")
+    walk_order = [str(p) for p in tmp_path.rglob("*")]
+    first_shard = set(walk_order[: mod._GREP_SHARD_FILES])
+    real_grep = mod._grep_file
+
+    def slow_first_shard(filepath, *args):
+        if str(filepath) in first_shard:
+            time.sleep(0.005)  # later shards finish first
+        return real_grep(filepath, *args)
+
+    monkeypatch.setattr(mod, "_grep_file", slow_first_shard)
+    svc = _service([tmp_path])
+
+    results = await svc._search_python(tmp_path, "needle", None, 40)
+    assert [r["file"] for r in results] == walk_order[:40]
+
+
+def test_is_under_root_with_nested_and_sibling_roots(tmp_path):
+    svc = _service([tmp_path / "a" / "b", tmp_path / "a", tmp_path / "z"])
+    rules = svc._access_rules()
+
+    for ok in ("a", "a/c/x.txt", "a/b/y", "z", "z/q"):
+        assert rules.is_under_root(str(tmp_path / ok)), ok
+    for bad in ("a-b/x", "ab", "b", "y/z", ""):
+        assert not rules.is_under_root(str(tmp_path / bad)), bad
+
+
+def test_config_reloaded_only_when_settings_version_changes(tmp_path):
+    settings = MagicMock()
+    settings.version = (0, 1)
+    settings.get_filesystem_config.return_value = {
+        "allowed_directories": [str(tmp_path)]
+    }
+    svc = FilesystemService()
+    svc._settings = settings
+
+    assert svc.is_path_allowed(str(tmp_path / "a.txt"))
+    assert svc.is_path_allowed(str(tmp_path / "b.txt"))
+    assert settings.get_filesystem_config.call_count == 1
+
+    settings.version = (1, 1)
+    settings.get_filesystem_config.return_value = {"allowed_directories": []}
+    assert not svc.is_path_allowed(str(tmp_path / "a.txt"))
+    assert settings.get_filesystem_config.call_count == 2
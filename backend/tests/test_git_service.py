@@ -0,0 +1,343 @@
+"""Tests for GitService against throwaway repositories."""
+
+import os
+import shutil
+import subprocess
+import time
+
+import pytest
+
+from app.services.git_service import (
+    GitService,
+    _Libgit2Repos,
+    _lg2_log,
+    _lg2_status,
+    _parse_branch_header,
+    _read_head_branch,
+    _read_local_branches,
+    _relative_date,
+)
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+
+
+def _git(repo, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+    )
+
+
+@pytest.fixture
+def repo(tmp_path):
+    _git(tmp_path, "init", "-q", "-b", "main")
+    (tmp_path / "a.txt").write_text("a")
+    _git(tmp_path, "add", "-A")
+    _git(tmp_path, "commit", "-q", "-m", "init")
+    return tmp_path
+
+
+@pytest.mark.parametrize(
+    "header, branch",
+    [
+        ("## main", "main"),
+        ("## feature/x...origin/feature/x [ahead 1, behind 2]", "feature/x"),
+        ("## No commits yet on main", "main"),
+        ("## HEAD (no branch)", "HEAD"),
+    ],
+)
+def test_parse_branch_header(header, branch):
+    assert _parse_branch_header(header) == branch
+
+
+@pytest.mark.asyncio
+async def test_status_reports_branch_and_changes(repo):
+    (repo / "a.txt").write_text("changed")
+    (repo / "new.txt").write_text("n")
+
+    result = await GitService().status(str(repo))
+
+    assert result["branch"] == "main"
+    assert result["clean"] is False
+    assert result["changes"] == [
+        {"status": " M", "file": "a.txt"},
+        {"status": "??", "file": "new.txt"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_status_clean_and_detached(repo):
+    svc = GitService()
+    assert (await svc.status(str(repo)))["clean"] is True
+
+    _git(repo, "checkout", "-q", "--detach")
+    assert (await svc.status(str(repo)))["branch"] == "HEAD"
+
+
+@pytest.mark.asyncio
+async def test_run_actions_keeps_order(repo):
+    results = await GitService().run_actions(
+        [
+            ("status", {"repo_path": str(repo)}),
+            ("log", {"repo_path": str(repo), "count": 1}),
+            ("bogus", {"repo_path": str(repo)}),
+        ]
+    )
+
+    assert results[0]["data"]["branch"] == "main"
+    assert results[1]["data"]["commits"][0]["subject"] == "init"
+    assert results[2] == {"status": "error", "detail": "Unknown action: bogus"}
+
+
+@pytest.mark.asyncio
+async def test_multi_status_keyed_by_repo(repo, tmp_path_factory):
+    (repo / "new.txt").write_text("n")
+    not_a_repo = tmp_path_factory.mktemp("plain")
+
+    results = await GitService().multi_status([str(repo), str(not_a_repo), str(repo)])
+
+    assert list(results) == [str(repo), str(not_a_repo)]
+    assert results[str(repo)]["data"]["changes"] == [
+        {"status": "??", "file": "new.txt"}
+    ]
+    assert results[str(not_a_repo)]["status"] == "error"
+
+
+@pytest.mark.asyncio
+async def test_multi_status_bounds_concurrency(monkeypatch):
+    import asyncio
+
+    from app.models.schemas import GitMultiStatusRequest
+    from app.services import git_service as mod
+
+    monkeypatch.setattr(mod, "_MULTI_STATUS_CONCURRENCY", 4)
+    svc = GitService()
+    running = peak = 0
+
+    async def fake_status(action, params):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {"status": "ok", "data": params["repo_path"]}
+
+    monkeypatch.setattr(svc, "run_action", fake_status)
+    paths = [f"/r{i}" for i in range(40)]
+
+    results = await svc.multi_status(paths)
+
+    assert peak == 4
+    assert [r["data"] for r in results.values()] == paths
+    with pytest.raises(ValueError):
+        GitMultiStatusRequest(repo_paths=paths * 6)
+
+
+@pytest.mark.asyncio
+async def test_write_actions_serialized_per_repo(repo, tmp_path_factory):
+    import asyncio
+
+    other = tmp_path_factory.mktemp("other")
+    svc = GitService()
+    running = {}
+    peak = {}
+
+    async def fake_dispatch(action, params):
+        key = params["repo_path"]
+        running[key] = running.get(key, 0) + 1
+        peak[key] = max(peak.get(key, 0), running[key])
+        await asyncio.sleep(0.01)
+        running[key] -= 1
+        return {"status": "ok"}
+
+    svc._dispatch = fake_dispatch
+    await svc.run_actions(
+        [("push", {"repo_path": str(repo)})] * 3
+        + [("fetch", {"repo_path": str(other)})]
+        + [("status", {"repo_path": str(other)})] * 2
+    )
+
+    assert peak[str(repo)] == 1  # writes on one repo never overlap
+    assert peak[str(other)] == 3  # reads overlap each other and other writes
+
+
+@pytest.mark.asyncio
+async def test_branch_lookups_cached_until_refs_change(repo):
+    svc = GitService()
+    spawned = []
+    real_run = svc._run
+
+    async def _counting_run(*args, **kwargs):
+        spawned.append(args[0])
+        return await real_run(*args, **kwargs)
+
+    svc._run = _counting_run
+
+    assert await svc.current_branch(str(repo)) == "main"
+    assert await svc.current_branch(str(repo)) == "main"
+    assert await svc.list_branches(str(repo)) == ["main"]
+    assert await svc.list_branches(str(repo)) == ["main"]
+    assert spawned == []  # both read straight from .git
+
+    # Changed outside the service: nested branch dir and a new HEAD
+    _git(repo, "branch", "feature/a")
+    assert await svc.list_branches(str(repo)) == ["feature/a", "main"]
+    _git(repo, "branch", "feature/b")
+    assert "feature/b" in await svc.list_branches(str(repo))
+    _git(repo, "checkout", "-q", "feature/a")
+    assert await svc.current_branch(str(repo)) == "feature/a"
+
+    # Changed through the service
+    await svc.checkout(str(repo), "main")
+    assert await svc.current_branch(str(repo)) == "main"
+
+
+@pytest.mark.parametrize(
+    "age_s",
+    [
+        5,
+        89,
+        600,
+        5000,
+        40 * 3600,
+        9 * 86400,
+        50 * 86400,
+        200 * 86400,
+        400 * 86400,
+        800 * 86400,
+        3000 * 86400,
+    ],
+)
+def test_relative_date_matches_git(repo, age_s):
+    ts = int(time.time()) - age_s
+    env = {**os.environ, "GIT_AUTHOR_DATE": f"{ts} +0000"}
+    subprocess.run(
+        [
+            "git",
+            "-c",
+            "user.name=t",
+            "-c",
+            "user.email=t@t",
+            "commit",
+            "-q",
+            "--allow-empty",
+            "-m",
+            "old",
+        ],
+        cwd=repo,
+        check=True,
+        env=env,
+    )
+    out = subprocess.run(
+        ["git", "log", "-1", "--format=%at%x1f%ar"],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+    commit_ts, expected = out.split("\x1f")
+    assert _relative_date(int(commit_ts)) == expected
+
+
+@pytest.mark.asyncio
+async def test_libgit2_reads_match_git_cli(repo):
+    pytest.importorskip("pygit2")
+    (repo / "a.txt").write_text("changed")
+    (repo / "new.txt").write_text("n")
+    _git(repo, "commit", "-q", "--allow-empty", "-m", "second\n\nbody")
+
+    cli = GitService()
+    cli._lg2 = None
+    repos = _Libgit2Repos()
+
+    assert repos.call(str(repo), _lg2_status) == await cli.status(str(repo))
+    assert repos.call(str(repo), _lg2_log, 10) == await cli.log(str(repo))
+
+    # Staged renames are reported like porcelain's "R  old -> new"
+    (repo / "z.txt").write_text("z")
+    _git(repo, "add", "z.txt")
+    _git(repo, "commit", "-q", "-m", "z")
+    _git(repo, "mv", "z.txt", "b.txt")
+    (repo / "b.txt").write_text("z2")
+    status = repos.call(str(repo), _lg2_status)
+    assert {"status": "RM", "file": "z.txt -> b.txt"} in status["changes"]
+    assert status == await cli.status(str(repo))
+
+
+def test_libgit2_handles_bounded(repo, tmp_path_factory, monkeypatch):
+    pytest.importorskip("pygit2")
+    from app.services import git_service as mod
+
+    monkeypatch.setattr(mod, "_LG2_MAX_REPOS", 2)
+    others = []
+    for name in ("r1", "r2"):
+        path = tmp_path_factory.mktemp(name)
+        _git(path, "init", "-q")
+        others.append(str(path))
+    repos = _Libgit2Repos()
+
+    for path in (str(repo), *others, str(repo)):
+        assert repos.call(path, _lg2_status)["clean"] in (True, False)
+
+    assert list(repos._repos) == [os.path.realpath(p) for p in (others[1], repo)]
+
+
+@pytest.mark.asyncio
+async def test_diff_into_file_and_large_output(repo, tmp_path):
+    (repo / "a.txt").write_text("x\n" * 50_000)
+    svc = GitService()
+
+    out_file = tmp_path / "diff.txt"
+    assert await svc.diff(str(repo), output_path=str(out_file)) == str(out_file)
+    assert out_file.read_text().strip() == await svc.diff(str(repo))
+    assert "a.txt" in out_file.read_text()
+
+    # Multi-chunk stdout arrives intact
+    raw = await svc._run_bytes("diff", cwd=str(repo))
+    assert len(raw) > 64 * 1024
+    assert raw.count(b"\n+x") == 50_000
+
+    with pytest.raises(RuntimeError):
+        await svc._run_bytes("no-such-command", cwd=str(repo))
+
+
+@pytest.mark.asyncio
+async def test_log_parses_nul_delimited_records(repo):
+    _git(repo, "commit", "-q", "--allow-empty", "-m", "druhý commit\n\ntělo")
+    svc = GitService()
+    svc._lg2 = None
+
+    commits = await svc.log(str(repo))
+
+    assert [c["subject"] for c in commits] == ["druhý commit", "init"]
+    assert all(len(c["hash"]) == 8 and c["author"] == "t" for c in commits)
+    assert commits[0]["when"].endswith("ago")
+    assert len(await svc.log(str(repo), count=1)) == 1
+
+
+def test_refs_read_from_git_dir_match_cli(repo):
+    def cli_branches():
+        out = subprocess.run(
+            ["git", "branch", "--format=%(refname:short)"],
+            cwd=repo,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        return out.split()
+
+    _git(repo, "branch", "feature/x")
+    _git(repo, "branch", "zeta")
+    _git(repo, "pack-refs", "--all")  # main, feature/x, zeta now packed
+    _git(repo, "branch", "alpha")  # loose
+    assert _read_local_branches(str(repo)) == cli_branches()
+    assert _read_head_branch(str(repo)) == "main"
+
+    _git(repo, "checkout", "-q", "--detach")
+    assert _read_head_branch(str(repo)) == "HEAD"
+
+    # A tag with a branch's name makes git print "heads/zeta" – defer to git
+    _git(repo, "tag", "zeta")
+    assert _read_local_branches(str(repo)) is None
@@ -284,3 +284,22 @@ class TestKbOverview:
         ):
             data = client.get("/api/knowledge/overview").json()
         assert isinstance(data["collections"], list)
+
+    def test_overview_file_types_per_collection(self, client):
+        vs = MagicMock()
+        vs.collection.get.return_value = {
+            "metadatas": [
+                {"collection": "a", "file_path": "/x/r.PDF"},
+                {"collection": "a", "file_path": "/x/r.PDF"},
+                {"collection": "b", "file_path": "/x/r.PDF"},
+                {"collection": "b", "file_path": ""},
+            ]
+        }
+        with patch(
+            "app.services.kb_stats_cache.get_cached_stats", return_value=_MOCK_KB_STATS
+        ), patch("app.routers.knowledge.get_vector_store_service", return_value=vs):
+            data = client.get("/api/knowledge/overview").json()
+        assert [(c["name"], c["file_types"]) for c in data["collections"]] == [
+            ("a", {".pdf": 2}),
+            ("b", {".pdf": 1, "unknown": 1}),
+        ]
@@ -1,6 +1,7 @@
 """Tests for KB incremental ingest and file-deletion operations."""
 
 import os
+from array import array
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
@@ -34,8 +35,8 @@ def mock_embeddings(monkeypatch):
     """Replace get_embeddings_service with an AsyncMock returning fake vectors."""
     svc = AsyncMock()
     # Return one fake embedding per chunk so the ingest pipeline succeeds.
-    svc.generate_embeddings_batch.side_effect = lambda chunks: [
-        [0.1, 0.2, 0.3] for _ in chunks
+    svc.generate_embeddings_packed.side_effect = lambda chunks: [
+        array("f", [0.1, 0.2, 0.3]) for _ in chunks
     ]
     svc.generate_embedding.return_value = [0.1, 0.2, 0.3]
     monkeypatch.setattr("app.routers.knowledge.get_embeddings_service", lambda: svc)
@@ -3,6 +3,7 @@
 import json
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 import pytest
 import pytest_asyncio
 
@@ -136,3 +137,175 @@ async def test_generate_stream_fallback_on_connect_error():
         or "not reachable" in collected[0].lower()
         or "stub" in collected[0].lower()
     )
+
+
+@pytest.mark.asyncio
+async def test_ollama_client_is_shared_and_closed_on_shutdown():
+    """All Ollama calls reuse one pooled client until aclose()."""
+    from app.services import llm_service
+
+    client = llm_service._get_client()
+    assert llm_service._get_client() is client
+    assert client.timeout.connect == 5.0
+
+    await llm_service.LLMService().aclose()
+    assert client.is_closed
+    assert llm_service._get_client() is not client
+    await llm_service.aclose_client()
+
+
+@pytest.mark.asyncio
+async def test_generate_reads_streamed_ndjson_reply():
+    """generate() streams the chat reply and joins the NDJSON tokens."""
+    from app.services.llm_service import LLMService
+
+    ndjson_lines = _make_ndjson_lines(["Ahoj", " ", "světe"])
+    requests = []
+
+    def _stream(method, url, **kwargs):
+        requests.append(kwargs["json"])
+
+        async def _aiter_lines():
+            for line in ndjson_lines:
+                yield line
+
+        mock_response = AsyncMock()
+        mock_response.raise_for_status = MagicMock()
+        mock_response.aiter_lines = _aiter_lines
+        mock_response.__aenter__ = AsyncMock(return_value=mock_response)
+        mock_response.__aexit__ = AsyncMock(return_value=False)
+        return mock_response
+
+    mock_client = AsyncMock()
+    mock_client.stream = MagicMock(side_effect=_stream)
+
+    with patch("httpx.AsyncClient", return_value=mock_client):
+        reply, meta = await LLMService().generate("Ahoj")
+
+    assert reply == "Ahoj světe"
+    assert meta["provider"] == "ollama"
+    assert requests[0]["stream"] is True
+    mock_client.post.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_config_and_prompt_cached_until_settings_version_changes(
+    _patch_settings,
+):
+    """Settings are read once per settings version, not on every request."""
+    from app.services.llm_service import LLMService
+
+    _patch_settings.version = (0, 1)
+    svc = LLMService()
+    with patch(
+        "app.services.llm_service._call_ollama_with_retry",
+        AsyncMock(return_value="Odpověď"),
+    ):
+        await svc.generate("a")
+        await svc.generate("b")
+        assert _patch_settings.get_llm_config.call_count == 1
+        assert _patch_settings.get_system_prompt.call_count == 1
+
+        _patch_settings.version = (1, 1)
+        await svc.generate("c")
+        assert _patch_settings.get_llm_config.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_chat_batcher_releases_window_in_model_order():
+    """Calls arriving together are started grouped by model, results routed back."""
+    import asyncio
+
+    from app.services.llm_service import _ChatBatcher
+
+    batcher = _ChatBatcher()
+    started = []
+
+    def _call(name):
+        async def _run():
+            started.append(name)
+            await asyncio.sleep(0)
+            return f"reply-{name}"
+
+        return _run
+
+    results = await asyncio.gather(
+        batcher.submit("qwen", _call("q1")),
+        batcher.submit("llama", _call("l1")),
+        batcher.submit("qwen", _call("q2")),
+    )
+
+    assert results == ["reply-q1", "reply-l1", "reply-q2"]
+    assert started == ["l1", "q1", "q2"]
+
+
+@pytest.mark.asyncio
+async def test_chat_batcher_propagates_errors_and_cancellation():
+    import asyncio
+
+    from app.services.llm_service import _ChatBatcher
+
+    batcher = _ChatBatcher()
+    release = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def _fail():
+        raise httpx.ConnectError("refused")
+
+    async def _hang():
+        try:
+            await release.wait()
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(httpx.ConnectError):
+        await batcher.submit("m", _fail)
+
+    waiter = asyncio.ensure_future(batcher.submit("m", _hang))
+    await asyncio.sleep(0.05)
+    waiter.cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+
+
+@pytest.mark.asyncio
+async def test_prompt_prefix_stable_across_turns():
+    """System prompt + history are byte-identical between turns; per-call context trails."""
+    from app.services.llm_service import LLMService
+
+    payloads = []
+
+    async def _fake_call(ollama_url, payload, timeout):
+        payloads.append(payload)
+        return "Odpověď"
+
+    svc = LLMService()
+    history = [
+        {"role": "user", "content": "Ahoj"},
+        {"role": "assistant", "content": "Dobrý den"},
+    ]
+    with patch("app.services.llm_service._call_ollama_with_retry", _fake_call):
+        await svc.generate("Porovnej A vs B", history=history)
+        await svc.generate("Jak na to?", history=history)
+
+    first, second = (p["messages"] for p in payloads)
+    assert first[:3] == second[:3]
+    assert first[0] == {"role": "system", "content": "You are a helpful assistant."}
+    assert first[-2]["role"] == "system"
+    assert first[-2]["content"].startswith("Aktuální datum a čas")
+    assert "porovnání" in first[-2]["content"]
+    assert "kroků" in second[-2]["content"]
+    assert second[-1] == {"role": "user", "content": "Jak na to?"}
+
+
+def test_llm_service_is_the_async_ollama_implementation():
+    """Guard against a stub class shadowing the real service at import time."""
+    import inspect
+
+    from app.services import llm_service
+
+    source = inspect.getsource(llm_service)
+    assert source.count("\nclass LLMService") == 1
+    assert inspect.iscoroutinefunction(llm_service.LLMService.generate)
+    assert inspect.iscoroutinefunction(llm_service.LLMService._generate_ollama)
+    assert isinstance(llm_service.get_llm_service(), llm_service.LLMService)
@@ -0,0 +1,238 @@
+"""Tests for MacOSService – argv-based scripts and the persistent osascript session."""
+
+import asyncio
+import os
+import stat
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services.macos_service import MacOSService, _applescript_literal
+
+# Minimal stand-in for ``osascript -i``: answers every ``run script`` line with
+# the wrapper's tagged result (the arguments joined by commas) and echoes the
+# sentinel line, the way the REPL prints evaluated values. A "slow" argument
+# delays the reply by a second and a "garbled" one drops the result marker.
+# ``-e`` runs print the arguments and exit.
+_FAKE_OSASCRIPT = r"""#!{python}
+import os, re, sys, time
+with open(os.environ["OSA_SPAWN_LOG"], "a") as log:
+    log.write(sys.argv[1] + "\n")
+if sys.argv[1] == "-e":
+    print(",".join(sys.argv[3:]))
+    sys.exit(0)
+lit = re.compile(r'"((?:[^"\\]|\\.)*)"')
+for line in sys.stdin:
+    values = [v.replace('\\"', '"') for v in lit.findall(line)]
+    if line.startswith("run script"):
+        args = values[2:]
+        if "slow" in args:
+            time.sleep(1)
+        tag = "__ERR__" if "fail" in args else "__OK__"
+        out = ("" if "garbled" in args else tag) + ",".join(args)
+        print('=> "' + out.replace('"', '\\"') + '"', flush=True)
+    elif values:
+        print('=> "' + values[0] + '"', flush=True)
+"""
+
+
+@pytest.fixture
+def fake_osascript(tmp_path, monkeypatch) -> Path:
+    script = tmp_path / "osascript"
+    script.write_text(_FAKE_OSASCRIPT.format(python=sys.executable))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    spawn_log = tmp_path / "spawns.log"
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("OSA_SPAWN_LOG", str(spawn_log))
+    return spawn_log
+
+
+def _fake_proc() -> MagicMock:
+    proc = MagicMock()
+    proc.returncode = 0
+    proc.communicate = AsyncMock(return_value=(b"", b""))
+    return proc
+
+
+@pytest.mark.asyncio
+async def test_mail_send_passes_untrusted_values_as_argv():
+    svc = MacOSService()
+    svc._osa_disabled = True  # one-shot ``osascript -e`` path
+    subject = 'Hi" & (do shell script "rm -rf ~") & "'
+
+    with patch(
+        "asyncio.create_subprocess_exec", AsyncMock(return_value=_fake_proc())
+    ) as spawn:
+        await svc.mail_send("a@b.cz", subject, "body")
+
+    args = spawn.call_args.args
+    assert args[:3] == ("osascript", "-e", MacOSService.MAIL_SEND_SCRIPT)
+    assert args[3:] == ("a@b.cz", subject, "body")
+    assert subject not in MacOSService.MAIL_SEND_SCRIPT
+
+
+@pytest.mark.asyncio
+async def test_safari_and_notification_use_constant_scripts():
+    svc = MacOSService()
+    svc._osa_disabled = True
+
+    with patch(
+        "asyncio.create_subprocess_exec", AsyncMock(return_value=_fake_proc())
+    ) as spawn:
+        await svc.safari_open('https://example.com/?q="x"')
+        await svc.show_notification("T", "M")
+
+    first, second = (c.args for c in spawn.call_args_list)
+    assert first[2:] == (MacOSService.SAFARI_OPEN_SCRIPT, 'https://example.com/?q="x"')
+    assert second[2:] == (MacOSService.NOTIFICATION_SCRIPT, "T", "M", "")
+
+
+@pytest.mark.asyncio
+async def test_persistent_session_reuses_one_child(fake_osascript):
+    svc = MacOSService()
+    try:
+        first = await svc._run_applescript(MacOSService.QUIT_APP_SCRIPT, 'Say "hi"')
+        second = await svc._run_applescript(MacOSService.MAIL_SEND_SCRIPT, "a", "b")
+        with pytest.raises(RuntimeError, match="fail"):
+            await svc._run_applescript(MacOSService.QUIT_APP_SCRIPT, "fail")
+    finally:
+        await svc.aclose()
+
+    assert first == 'Say "hi"'
+    assert second == "a,b"
+    assert fake_osascript.read_text().splitlines() == ["-i"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_exchange_does_not_leak_reply_into_next_call(fake_osascript):
+    svc = MacOSService()
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                svc._run_applescript(MacOSService.QUIT_APP_SCRIPT, "slow"), 0.3
+            )
+        second = await svc._run_applescript(MacOSService.QUIT_APP_SCRIPT, "second")
+    finally:
+        await svc.aclose()
+
+    assert second == "second"
+    # The child with the unread reply was replaced
+    assert fake_osascript.read_text().splitlines() == ["-i", "-i"]
+
+
+@pytest.mark.asyncio
+async def test_run_script_timeout_falls_back_to_one_shot(fake_osascript):
+    svc = MacOSService()
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            await svc.run_script(MacOSService.QUIT_APP_SCRIPT, "slow", timeout=0.3)
+        assert await svc.run_script(MacOSService.QUIT_APP_SCRIPT, "next") == "next"
+        assert await svc.run_script(MacOSService.QUIT_APP_SCRIPT, "more") == "more"
+    finally:
+        await svc.aclose()
+
+    # The session is not restarted after a timeout
+    assert fake_osascript.read_text().splitlines() == ["-i", "-e", "-e"]
+
+
+@pytest.mark.asyncio
+async def test_unmarked_session_reply_is_an_error(fake_osascript):
+    svc = MacOSService()
+    try:
+        with pytest.raises(RuntimeError, match="Unexpected osascript session reply"):
+            await svc._run_applescript(MacOSService.QUIT_APP_SCRIPT, "garbled")
+        assert await svc._run_applescript(MacOSService.QUIT_APP_SCRIPT, "ok") == "ok"
+    finally:
+        await svc.aclose()
+
+    assert fake_osascript.read_text().splitlines() == ["-i", "-e"]
+
+
+def test_applescript_literal_escapes_quotes_and_newlines():
+    assert _applescript_literal('a"b\\c\nd') == '"a\\"b\\\\c\\nd"'
+    assert _applescript_literal("ř\t\r") == '"ř\\t\\r"'
+
+
+@pytest.mark.asyncio
+async def test_battery_status_uses_iokit_when_available():
+    iokit = {
+        "IOPSCopyPowerSourcesInfo": lambda: "info",
+        "IOPSCopyPowerSourcesList": lambda info: ["ups", "batt"],
+        "IOPSGetPowerSourceDescription": lambda info, src: {
+            "ups": {"Type": "UPS"},
+            "batt": {
+                "Type": "InternalBattery",
+                "Current Capacity": 40,
+                "Max Capacity": 80,
+                "Is Charging": True,
+                "Power Source State": "AC Power",
+            },
+        }[src],
+    }
+    svc = MacOSService()
+
+    with patch("app.services.macos_service._load_iokit", return_value=iokit), patch(
+        "asyncio.create_subprocess_exec"
+    ) as spawn:
+        status = await svc.get_battery_status()
+
+    assert status["percent"] == 50
+    assert status["charging"] is True
+    assert status["power_source"] == "AC Power"
+    spawn.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_iokit_errors_fall_back_to_pmset():
+    def broken(*args):
+        raise RuntimeError("objc.error: bad selector")
+
+    iokit = {
+        "IOPSCopyPowerSourcesInfo": broken,
+        "IOServiceMatching": broken,
+    }
+    svc = MacOSService()
+    proc = _fake_proc()
+    proc.communicate = AsyncMock(return_value=(b"Now drawing from 'AC Power'", b""))
+
+    with patch("app.services.macos_service._load_iokit", return_value=iokit), patch(
+        "asyncio.create_subprocess_exec", AsyncMock(return_value=proc)
+    ) as spawn:
+        status = await svc.get_battery_status()
+        assert await svc.sleep_display() == "Display sleeping"
+
+    assert status == {"raw": "Now drawing from 'AC Power'"}
+    assert [c.args for c in spawn.call_args_list] == [
+        ("pmset", "-g", "batt"),
+        ("pmset", "displaysleepnow"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_run_action_table_shapes_results():
+    with patch.object(
+        MacOSService, "list_running_apps", AsyncMock(return_value=["Finder"])
+    ), patch.object(
+        MacOSService, "set_volume", AsyncMock(return_value="Volume set to 50")
+    ) as set_volume:
+        svc = MacOSService()
+
+    assert await svc.run_action("list_apps", {}) == {
+        "status": "ok",
+        "data": {"apps": ["Finder"]},
+    }
+    assert await svc.run_action("volume_set", {}) == {
+        "status": "ok",
+        "detail": "Volume set to 50",
+    }
+    set_volume.assert_awaited_once_with(50)
+    assert await svc.run_action("quit_app", {}) == {
+        "status": "error",
+        "detail": "Missing required param: 'app_name'",
+    }
+    assert await svc.run_action("bogus", {}) == {
+        "status": "error",
+        "detail": "Unknown action: bogus",
+    }
@@ -98,6 +98,72 @@ class TestFileParserServiceNew:
         assert "Hello" in result["text"]
         assert "World" in result["text"]
 
+    def test_parse_pdf_pymupdf_matches_pypdf2_fallback(self, tmp_path: Path) -> None:
+        pymupdf = pytest.importorskip("pymupdf", reason="pymupdf not installed")
+        from app.services.file_parser_service import FileParserService
+
+        pdf_path = tmp_path / "doc.pdf"
+        doc = pymupdf.open()
+        for text in ("First page text", "Second page text"):
+            doc.new_page().insert_text((72, 72), text)
+        doc.set_metadata({"author": "Tester", "title": "Doc"})
+        doc.save(pdf_path)
+        doc.close()
+
+        svc = FileParserService()
+        fast = svc.parse_file(pdf_path)
+        fallback = svc._parse_pdf_pypdf2(pdf_path)
+
+        for result in (fast, fallback):
+            assert result["page_count"] == 2
+            assert "First page text" in result["text"]
+            assert "Second page text" in result["text"]
+            assert result["metadata"]["author"] == "Tester"
+
+    def test_parse_pdf_without_pymupdf_uses_pypdf2(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        PyPDF2 = pytest.importorskip("PyPDF2", reason="PyPDF2 not installed")
+        from app.services.file_parser_service import FileParserService
+
+        pdf_path = tmp_path / "blank.pdf"
+        writer = PyPDF2.PdfWriter()
+        writer.add_blank_page(width=200, height=200)
+        writer.add_metadata({"/Author": "Tester"})
+        with open(pdf_path, "wb") as f:
+            writer.write(f)
+
+        monkeypatch.setitem(sys.modules, "pymupdf", None)
+        result = FileParserService().parse_file(pdf_path)
+
+        assert result["page_count"] == 1
+        assert result["metadata"]["author"] == "Tester"
+
+    def test_parse_xlsx_calamine_matches_openpyxl_fallback(
+        self, tmp_path: Path
+    ) -> None:
+        pytest.importorskip("python_calamine", reason="python-calamine not installed")
+        openpyxl = pytest.importorskip("openpyxl", reason="openpyxl not installed")
+        from app.services.file_parser_service import FileParserService
+
+        xlsx_path = tmp_path / "data.xlsx"
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = "Data"
+        ws.append(["Name", "Qty", None, "Price"])
+        ws.append(["apple", 3, None, 2.5])
+        ws.append([None, None, None, None])
+        wb.create_sheet("Notes").append(["hello"])
+        wb.save(xlsx_path)
+
+        svc = FileParserService()
+        fast = svc.parse_file(xlsx_path)
+        fallback = svc._parse_xlsx_openpyxl(xlsx_path)
+
+        assert fast == fallback
+        assert "apple | 3 |  | 2.5" in fast["text"]
+        assert fast["metadata"]["sheets"] == ["Data", "Notes"]
+
     def test_parse_zip_extracts_text(self, tmp_path: Path) -> None:
         from app.services.file_parser_service import FileParserService
 
@@ -131,6 +197,27 @@ class TestFileParserServiceNew:
         assert "root:x:0:0" not in result.get("text", "")
         assert "safe content" in result.get("text", "")
 
+    @pytest.mark.asyncio
+    async def test_parse_file_async_matches_sync(self, tmp_path: Path) -> None:
+        """Pool-parsed (zip) and thread-parsed (txt) results equal parse_file."""
+        from app.services.file_parser_service import FileParserService
+
+        zip_path = tmp_path / "docs.zip"
+        with zipfile.ZipFile(zip_path, "w") as zf:
+            zf.writestr("a.txt", "pooled content")
+        txt_path = tmp_path / "note.txt"
+        txt_path.write_text("threaded content", encoding="utf-8")
+
+        svc = FileParserService()
+        for path in (zip_path, txt_path):
+            assert await svc.parse_file_async(path) == svc.parse_file(path)
+
+    def test_parser_pool_does_not_fork(self) -> None:
+        """Workers must not be forked from the multi-threaded server process."""
+        from app.services.file_parser_service import _get_parser_pool
+
+        assert _get_parser_pool()._mp_context.get_start_method() != "fork"
+
     def test_parse_pptx_extracts_slides(self, tmp_path: Path) -> None:
         from app.services.file_parser_service import FileParserService
 
@@ -314,6 +401,32 @@ class TestKBFilesEndpoint:
         audio = next(f for f in data["files"] if f["file_name"] == "audio.mp3")
         assert audio["media_type"] == "audio"
 
+    def test_list_kb_files_pages_newest_first(self, client: TestClient) -> None:
+        vs = self._make_mock_vector_store(
+            [
+                {"meta": {"file_path": f"/kb/f{i}.txt", "mtime": float(m)}}
+                for i, m in enumerate([3, 1, 5, 2, 4])
+            ]
+        )
+        with patch("app.routers.knowledge.get_vector_store_service", return_value=vs):
+            data = client.get(
+                "/api/knowledge/files", params={"limit": 2, "offset": 1}
+            ).json()
+        assert data["total"] == 5
+        assert [f["file_name"] for f in data["files"]] == ["f4.txt", "f0.txt"]
+
+    def test_list_kb_files_sizes_from_disk(self, client: TestClient, tmp_path) -> None:
+        (tmp_path / "a.txt").write_bytes(b"x" * 10)
+        vs = self._make_mock_vector_store(
+            [
+                {"meta": {"file_path": str(tmp_path / "a.txt"), "mtime": 2.0}},
+                {"meta": {"file_path": str(tmp_path / "gone.txt"), "mtime": 1.0}},
+            ]
+        )
+        with patch("app.routers.knowledge.get_vector_store_service", return_value=vs):
+            files = client.get("/api/knowledge/files").json()["files"]
+        assert [f["size_bytes"] for f in files] == [10, 0]
+
     def test_delete_kb_file_requires_auth(self, client: TestClient) -> None:
         """Delete without API key should be rejected (403) when api_key is configured."""
         with patch("app.utils.auth.get_settings_service") as mock_svc:
@@ -0,0 +1,92 @@
+"""Tests for NotificationService – fire-and-forget ntfy notifications."""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services import notification_service as mod
+
+
+def _service(post) -> mod.NotificationService:
+    settings = MagicMock()
+    settings.get_notification_config.return_value = {
+        "enabled": True,
+        "ntfy_url": "https://ntfy.example",
+        "topic": "hub",
+    }
+    svc = mod.NotificationService()
+    svc._settings = settings
+    svc._get_client = lambda: MagicMock(post=post)
+    return svc
+
+
+@pytest.mark.asyncio
+async def test_notify_helpers_return_before_the_request_finishes():
+    release = asyncio.Event()
+    sent = []
+
+    async def _slow_post(url, content, headers):
+        await release.wait()
+        sent.append((url, headers["Title"], content))
+        return MagicMock()
+
+    svc = _service(_slow_post)
+
+    outcome = svc.notify_error("worker", "boom")
+    await asyncio.sleep(mod._COALESCE_WINDOW_S + 0.05)
+    assert not outcome.done()
+    assert len(mod._background_tasks) == 1
+
+    release.set()
+    assert await outcome is True
+    assert sent == [("https://ntfy.example/hub", "Error", b"worker: boom")]
+    await asyncio.sleep(0)
+    assert not mod._background_tasks
+
+
+@pytest.mark.asyncio
+async def test_burst_is_coalesced_into_one_post_per_title():
+    posts = []
+
+    async def _post(url, content, headers):
+        posts.append((headers["Title"], content.decode()))
+        return MagicMock()
+
+    svc = _service(_post)
+    outcomes = [
+        svc.notify_task_complete("a"),
+        svc.notify_task_complete("b"),
+        svc.notify_task_complete("a"),  # duplicate collapses
+        svc.notify_error("ctx", "err"),
+    ]
+
+    assert await asyncio.gather(*outcomes) == [True] * 4
+    assert sorted(posts) == [
+        ("Error", "ctx: err"),
+        ("Task completed", "'a' completed\n'b' completed"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_aclose_sends_notifications_still_in_coalescing_window():
+    posts = []
+
+    async def _post(url, content, headers):
+        posts.append(content.decode())
+        return MagicMock()
+
+    svc = _service(_post)
+    outcome = svc.notify_task_complete("late")
+
+    await svc.aclose()
+
+    assert posts == ["'late' completed"]
+    assert outcome.done() and outcome.result() is True
+    assert svc._flush_timer is None
+
+
+def test_service_getter_is_a_cached_singleton():
+    assert mod.get_notification_service() is mod.get_notification_service()
+    mod.get_notification_service.cache_clear()
+    assert isinstance(mod.get_notification_service(), mod.NotificationService)
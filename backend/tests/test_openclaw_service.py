@@ -0,0 +1,158 @@
+"""Tests for OpenClawService helpers."""
+
+import asyncio
+import base64
+import os
+import subprocess
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services.openclaw_service import (
+    _B64_CHUNK,
+    OpenClawService,
+    _encode_file_b64,
+    _region_arg,
+    _spawn,
+)
+
+
+def test_encode_file_b64_matches_one_shot_encoding(tmp_path):
+    for size in (0, 1, _B64_CHUNK - 1, _B64_CHUNK, 3 * _B64_CHUNK + 2):
+        path = tmp_path / f"shot-{size}.png"
+        raw = os.urandom(size)
+        path.write_bytes(raw)
+        assert _encode_file_b64(str(path)) == base64.b64encode(raw).decode()
+
+    assert _encode_file_b64(str(tmp_path / "missing.png")) is None
+
+
+@pytest.mark.asyncio
+async def test_run_actions_async_orders_dependent_actions():
+    svc = OpenClawService()
+    log = []
+
+    async def fake_run(action, params):
+        log.append(f"start {action}")
+        await asyncio.sleep(params.get("delay", 0))
+        log.append(f"end {action}")
+        return {"status": params.get("status", "ok"), "detail": action}
+
+    svc.run_action_async = fake_run
+    results = await svc.run_actions_async(
+        [
+            {"action": "screenshot", "params": {"delay": 0.05}},
+            {"action": "click_at", "params": {}},
+            {"action": "type_text", "params": {}, "depends_on": 0},
+            {"action": "open_application", "params": {"status": "error"}},
+            {"action": "find_element", "params": {}, "depends_on": 3},
+            {"action": "x", "params": {}, "depends_on": 9},
+        ]
+    )
+
+    assert [r["status"] for r in results] == ["ok"] * 3 + ["error"] * 3
+    assert results[4]["detail"] == "Skipped: action 3 did not succeed"
+    # click_at did not wait for the screenshot, type_text did
+    assert log.index("end click_at") < log.index("end screenshot")
+    assert log.index("start type_text") > log.index("end screenshot")
+
+
+@pytest.mark.asyncio
+async def test_type_text_runs_in_shared_osascript_session():
+    macos = AsyncMock()
+    text = 'say "hi" & (do shell script "id")'
+
+    with patch("app.services.openclaw_service.get_macos_service", return_value=macos):
+        assert (
+            await OpenClawService().type_text(text) == f"Typed {len(text)} characters"
+        )
+
+    macos.run_script.assert_awaited_once_with(
+        OpenClawService.TYPE_TEXT_SCRIPT, text, timeout=10.0
+    )
+
+
+@pytest.mark.asyncio
+async def test_spawn_runs_in_thread_and_maps_errors():
+    proc = await _spawn(["sh", "-c", "echo out; echo err >&2; exit 3"], timeout=5)
+    assert (proc.returncode, proc.stdout, proc.stderr) == (3, b"out\n", b"err\n")
+
+    with pytest.raises(asyncio.TimeoutError):
+        await _spawn(["sleep", "5"], timeout=0.1)
+    with pytest.raises(FileNotFoundError):
+        await _spawn(["definitely-not-a-binary-xyz"], timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_run_action_async_dispatch_table():
+    svc = OpenClawService()
+    svc.click_at = AsyncMock(return_value="Clicked at (1, 2)")
+
+    assert await svc.run_action_async("click_at", {"x": "1", "y": 2}) == {
+        "status": "ok",
+        "detail": "Clicked at (1, 2)",
+    }
+    svc.click_at.assert_awaited_once_with(1, 2)
+    assert await svc.run_action_async("type_text", {}) == {
+        "status": "error",
+        "detail": "Missing required param: 'text'",
+    }
+    assert (await svc.run_action_async("run_workflow", {}))["status"] == (
+        "not_implemented"
+    )
+    assert await svc.run_action_async("bogus", {}) == {
+        "status": "error",
+        "detail": "Unknown action: bogus",
+    }
+
+
+def test_binary_path_reloaded_only_when_settings_version_changes():
+    settings = MagicMock()
+    settings.version = (0, 1)
+    settings.get_integration_config.return_value = {"binary_path": "/opt/oc"}
+    svc = OpenClawService()
+    svc._settings = settings
+
+    assert svc._binary() == svc._binary() == "/opt/oc"
+    assert settings.get_integration_config.call_count == 1
+
+    settings.version = (1, 1)
+    settings.get_integration_config.return_value = {}
+    assert svc._binary() == "openclaw"
+    assert settings.get_integration_config.call_count == 2
+
+
+def test_region_arg_fills_missing_keys():
+    assert _region_arg({"x": 10, "width": 300}) == "10,0,300,1080"
+    assert _region_arg({"x": 1, "y": 2, "width": 3, "height": 4, "z": 9}) == "1,2,3,4"
+
+
+@pytest.mark.asyncio
+async def test_screenshot_formats(tmp_path):
+    calls = []
+
+    async def fake_spawn(args, timeout):
+        calls.append(args)
+        out = args[-1]
+        with open(out, "wb") as f:
+            f.write(b"webp" if args[0] == "cwebp" else b"shot")
+        return subprocess.CompletedProcess(args, 0, b"", b"")
+
+    svc = OpenClawService()
+    with patch("app.services.openclaw_service._spawn", fake_spawn):
+        result = await svc.screenshot(str(tmp_path / "s.jpg"), fmt="jpg")
+        assert calls[-1][:4] == ["screencapture", "-x", "-t", "jpg"]
+        assert base64.b64decode(result["base64"]) == b"shot"
+
+        result = await svc.screenshot(str(tmp_path / "s.webp"), fmt="webp")
+        assert calls[-2][3] == "png" and calls[-1][0] == "cwebp"
+        assert base64.b64decode(result["base64"]) == b"webp"
+        # The intermediate PNG is removed after conversion
+        assert sorted(tmp_path.iterdir()) == [tmp_path / "s.jpg", tmp_path / "s.webp"]
+
+        assert await svc.screenshot_bytes("jpg") == (b"shot", "image/jpeg")
+        result = await svc.run_action_async("screenshot", {"format": "gif"})
+        assert result == {
+            "status": "error",
+            "detail": "Unsupported screenshot format: gif",
+        }
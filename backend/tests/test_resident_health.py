@@ -250,6 +250,8 @@ class TestAgentSpawnReturnsStructuredError:
 
         try:
             orch._agents = fake_agents
+            # Force the slot semaphore to be rebuilt from the fake active agents
+            orch._spawn_sem = None
 
             resp = healthy_client.post(
                 "/api/agents/spawn",
@@ -262,6 +264,7 @@ class TestAgentSpawnReturnsStructuredError:
             assert body.get("detail", {}).get("reason") == "concurrent_limit"
         finally:
             orch._agents = original_agents
+            orch._spawn_sem = None
 
     def test_agent_spawn_error_is_http_exception(self):
         """AgentSpawnError is an HTTPException with status 429."""
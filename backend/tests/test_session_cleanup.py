@@ -3,6 +3,7 @@
 import json
 import time
 from pathlib import Path
+from unittest.mock import MagicMock
 
 import pytest
 
@@ -98,6 +99,142 @@ def test_list_sessions_detailed(session_svc):
     assert "size_bytes" in sessions[0]
 
 
+@pytest.mark.asyncio
+async def test_list_sessions_newest_first_skips_broken(session_svc):
+    svc, sessions_dir = session_svc
+    _create_session_file(sessions_dir, "older", age_days=3)
+    _create_session_file(sessions_dir, "newer", age_days=1)
+    (sessions_dir / "broken.json").write_text("{not json")
+
+    sessions = await svc.list_sessions()
+
+    assert [s["session_id"] for s in sessions] == ["newer", "older"]
+    assert sessions[0]["message_count"] == 1
+    assert sessions[0]["preview"] == "Hello"
+
+
+def test_save_message_appends_to_log_after_inline_history(session_svc):
+    svc, sessions_dir = session_svc
+    _create_session_file(sessions_dir, "legacy")
+
+    svc.save_message("legacy", "assistant", "Hi there")
+    svc.save_message("legacy", "user", "Bye", meta={"k": 1})
+
+    assert json.loads((sessions_dir / "legacy.json").read_text())["messages"] == [
+        {
+            "role": "user",
+            "content": "Hello",
+            "timestamp": "2020-01-01T00:00:00+00:00",
+        }
+    ]
+    assert len((sessions_dir / "legacy.msgs.jsonl").read_text().splitlines()) == 2
+    history = svc.load_history("legacy")
+    assert [m["content"] for m in history] == ["Hello", "Hi there", "Bye"]
+    assert history[-1]["meta"] == {"k": 1}
+    assert [m["content"] for m in svc.load_history("legacy", limit=2)] == [
+        "Hi there",
+        "Bye",
+    ]
+    assert svc.list_sessions_detailed()[0]["message_count"] == 3
+
+    assert svc.delete_session("legacy")
+    assert list(sessions_dir.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_list_sessions_preview_stored_in_metadata(session_svc):
+    svc, sessions_dir = session_svc
+    svc.create_session("s")
+    svc.save_message("s", "assistant", "Welcome")
+    svc.save_message("s", "user", "  " + "x" * 60)
+    svc.save_message("s", "user", "Second question")
+
+    assert json.loads((sessions_dir / "s.json").read_text())["preview"] == "x" * 50
+    (sessions_dir / "s.msgs.jsonl").write_text("")
+    [summary] = await svc.list_sessions()
+    assert summary["preview"] == "x" * 50 + "..."
+
+
+@pytest.mark.asyncio
+async def test_list_sessions_counts_messages_without_parsing_log(
+    session_svc, monkeypatch
+):
+    import app.services.session_service as mod
+
+    svc, sessions_dir = session_svc
+    svc.create_session("s")
+    for content in ("Hi", "Again", "Third"):
+        svc.save_message("s", "user", content)
+    mod._log_cache.pop(sessions_dir / "s.msgs.jsonl")
+    logged = MagicMock(wraps=svc._logged_messages)
+    monkeypatch.setattr(svc, "_logged_messages", logged)
+
+    [summary] = await svc.list_sessions()
+
+    assert summary["message_count"] == 3
+    assert summary["preview"] == "Hi"
+    logged.assert_not_called()
+
+
+def test_save_message_creates_missing_session(session_svc):
+    svc, sessions_dir = session_svc
+
+    svc.save_message("fresh", "user", "First")
+
+    assert svc.session_exists("fresh")
+    assert [m["content"] for m in svc.load_history("fresh")] == ["First"]
+
+
+def test_session_reads_cached_until_files_change(session_svc, monkeypatch):
+    import app.services.session_service as mod
+
+    svc, sessions_dir = session_svc
+    _create_session_file(sessions_dir, "cached")
+    svc.save_message("cached", "assistant", "Hi")
+    loads = MagicMock(wraps=mod.orjson.loads)
+    monkeypatch.setattr(mod.orjson, "loads", loads)
+
+    assert len(svc.load_history("cached")) == 2
+    parsed = loads.call_count
+    svc.save_message("cached", "user", "Again")
+    assert [m["content"] for m in svc.load_history("cached")] == [
+        "Hello",
+        "Hi",
+        "Again",
+    ]
+    assert loads.call_count == parsed  # served from cache, appended in place
+
+    svc.set_model_override("cached", "mistral:7b")
+    assert svc.get_model_override("cached") == "mistral:7b"
+    assert loads.call_count == parsed
+
+    # Edited behind the service's back → re-read
+    (sessions_dir / "cached.msgs.jsonl").write_text(
+        '{"role": "user", "content": "Replaced", "timestamp": "t"}\n'
+    )
+    assert [m["content"] for m in svc.load_history("cached")] == ["Hello", "Replaced"]
+
+
+def test_failed_metadata_write_leaves_cached_state_untouched(session_svc, monkeypatch):
+    import app.services.session_service as mod
+
+    svc, sessions_dir = session_svc
+    svc.create_session("s")
+    svc.attach_artifact("s", "a1")
+
+    def boom(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(mod, "atomic_write_bytes", boom)
+    with pytest.raises(OSError):
+        svc.attach_artifact("s", "a2")
+    with pytest.raises(OSError):
+        svc.set_model_override("s", "mistral:7b")
+
+    assert svc._read("s")["artifacts"] == ["a1"]
+    assert svc.get_model_override("s") is None
+
+
 # ── API endpoint tests ───────────────────────────────────────────────────
 
 
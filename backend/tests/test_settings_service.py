@@ -0,0 +1,109 @@
+"""Tests for SettingsService caching, persistence and accessors."""
+
+import json
+import os
+from unittest.mock import patch
+
+
+def test_settings_version_tracks_saves_and_file_edits(tmp_path):
+    from app.services import settings_service as mod
+
+    with patch.object(mod, "SETTINGS_FILE", tmp_path / "settings.json"):
+        svc = mod.SettingsService()
+        before = svc.version
+        svc.save({"a": 1})
+        after_save = svc.version
+        assert after_save != before
+
+        os.utime(tmp_path / "settings.json", ns=(0, 12345))
+        assert svc.version != after_save
+
+
+def test_settings_load_cached_until_file_changes(tmp_path):
+    from app.services import settings_service as mod
+
+    path = tmp_path / "settings.json"
+    with patch.object(mod, "SETTINGS_FILE", path):
+        svc = mod.SettingsService()
+        svc.save({"notifications": {"topic": "a"}})
+
+        with patch.object(mod.orjson, "loads", wraps=mod.orjson.loads) as json_load:
+            first = svc.load()
+            first["notifications"]["topic"] = "mutated"
+            assert svc.load()["notifications"]["topic"] == "a"
+            assert json_load.call_count == 1
+
+            path.write_text('{"notifications": {"topic": "b"}}')
+            os.utime(path, ns=(0, 12345))
+            assert svc.get_notification_config()["topic"] == "b"
+            assert json_load.call_count == 2
+
+
+def test_deep_merge_copies_only_overridden_paths():
+    from app.services.settings_service import _deep_merge
+
+    base = {"a": {"x": 1, "y": {"z": 2}}, "b": {"k": [1]}}
+    merged = _deep_merge(base, {"a": {"y": {"z": 3}}, "c": 4})
+
+    assert merged == {"a": {"x": 1, "y": {"z": 3}}, "b": {"k": [1]}, "c": 4}
+    assert base == {"a": {"x": 1, "y": {"z": 2}}, "b": {"k": [1]}}
+    assert merged["b"] is base["b"]
+
+
+def test_settings_save_writes_only_overrides(tmp_path):
+    from app.services import settings_service as mod
+
+    path = tmp_path / "settings.json"
+    with patch.object(mod, "SETTINGS_FILE", path):
+        svc = mod.SettingsService()
+        settings = svc.load()
+        settings["notifications"]["topic"] = "mine"
+        settings["extra"] = [1, 2]
+        svc.save(settings)
+
+        assert json.loads(path.read_text()) == {
+            "notifications": {"topic": "mine"},
+            "extra": [1, 2],
+        }
+        assert svc.load() == settings
+
+
+def test_settings_save_keeps_user_values_equal_to_default(tmp_path):
+    from app.services import settings_service as mod
+
+    path = tmp_path / "settings.json"
+    with patch.object(mod, "SETTINGS_FILE", path):
+        svc = mod.SettingsService()
+        svc.update({"notifications": {"topic": "mine", "enabled": True}})
+        # Set back to the default value: still the user's choice
+        svc.update({"notifications": {"topic": "ai-home-hub"}})
+        settings = svc.load()
+        settings["agents"]["max_concurrent"] = 3  # unchanged: not pinned
+        svc.save(settings)
+
+        assert json.loads(path.read_text()) == {
+            "notifications": {"topic": "ai-home-hub", "enabled": True},
+        }
+        new_defaults = mod._deep_merge(
+            mod.DEFAULT_SETTINGS, {"notifications": {"topic": "changed"}}
+        )
+        with patch.object(mod, "DEFAULT_SETTINGS", new_defaults):
+            svc._cache = None
+            assert svc.load()["notifications"]["topic"] == "ai-home-hub"
+
+
+def test_settings_accessors_copy_only_their_section(tmp_path):
+    from app.services import settings_service as mod
+
+    with patch.object(mod, "SETTINGS_FILE", tmp_path / "settings.json"):
+        svc = mod.SettingsService()
+        svc.save({"integrations": {"openclaw": {"binary_path": "/opt/oc"}}})
+
+        with patch.object(mod.copy, "deepcopy", wraps=mod.copy.deepcopy) as deepcopy:
+            cfg = svc.get_integration_config("openclaw")
+            [call] = deepcopy.call_args_list
+            assert call.args[0] is svc._merged()["integrations"]["openclaw"]
+        assert cfg["binary_path"] == "/opt/oc"
+        cfg["binary_path"] = "mutated"
+        assert svc.get_integration_config("openclaw")["binary_path"] == "/opt/oc"
+        assert svc.load()["integrations"]["openclaw"]["binary_path"] == "/opt/oc"
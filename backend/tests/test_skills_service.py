@@ -0,0 +1,109 @@
+"""Tests for SkillsService CRUD, lookups and the skills.json cache."""
+
+import json
+
+import pytest
+
+from app.services import skills_service as mod
+
+
+@pytest.fixture
+def skills_svc(tmp_path, monkeypatch):
+    path = tmp_path / "skills.json"
+    path.write_text(
+        json.dumps(
+            [
+                {"id": "a", "name": "Alpha", "description": "x", "tags": ["t1"]},
+                {"id": "b", "name": "Beta", "description": "Y", "tags": ["t1", "t2"]},
+                {"id": "c", "name": "Gamma", "description": "z", "tags": []},
+            ]
+        )
+    )
+    monkeypatch.setattr(mod, "SKILLS_FILE", path)
+    return mod.SkillsService(), path
+
+
+def test_lookups_by_id_and_tag(skills_svc):
+    svc, _ = skills_svc
+
+    assert svc.get("b")["name"] == "Beta"
+    assert svc.get("missing") is None
+    assert [s["id"] for s in svc.list(tag="t1")] == ["a", "b"]
+    assert svc.list(tag="nope") == []
+    assert [s["id"] for s in svc.list(tag="t1", search="bet")] == ["b"]
+    assert [s["id"] for s in svc.list(search="y")] == ["b"]
+    # Name and description are matched separately, never across the join
+    assert svc.list(search="alphax") == []
+    assert svc.get_tags() == ["t1", "t2"]
+    assert [s["id"] for s in svc.get_by_ids(["c", "a", "zz", "c"])] == ["c", "a"]
+
+
+def test_index_rebuilt_after_writes_and_file_edits(skills_svc):
+    svc, path = skills_svc
+
+    created = svc.create({"name": "Delta", "description": "", "tags": ["t2"]})
+    assert svc.get(created["id"]) == created
+    assert [s["name"] for s in svc.list(tag="t2")] == ["Beta", "Delta"]
+
+    assert svc.update("a", {"tags": ["t3"], "id": "ignored"})["id"] == "a"
+    assert [s["id"] for s in svc.list(tag="t1")] == ["b"]
+    assert svc.delete("b") and not svc.delete("b")
+    assert svc.get_tags() == ["t2", "t3"]
+
+    path.write_text(json.dumps([{"id": "only", "name": "Edited", "tags": ["e"]}]))
+    assert [s["id"] for s in svc.list()] == ["only"]
+    assert svc.get_tags() == ["e"]
+
+
+def test_reads_parse_file_only_when_it_changes(skills_svc, monkeypatch):
+    svc, path = skills_svc
+    loads = []
+    real_loads = mod.orjson.loads
+    monkeypatch.setattr(mod.orjson, "loads", lambda b: loads.append(1) or real_loads(b))
+
+    svc.list()
+    svc.get("a")
+    svc.create({"name": "New", "description": ""})
+    assert svc.list()[-1]["name"] == "New"
+    assert len(loads) == 1
+
+    path.unlink()
+    assert len(svc.list()) == len(mod.DEFAULT_SKILLS)
+    assert path.exists() and len(loads) == 1
+
+
+def test_bulk_writes_file_once(skills_svc, monkeypatch):
+    svc, path = skills_svc
+    writes = []
+    real_write = svc._write
+    monkeypatch.setattr(
+        svc, "_write", lambda skills: writes.append(1) or real_write(skills)
+    )
+
+    with svc.bulk():
+        created = [svc.create({"name": f"S{i}", "description": ""}) for i in range(5)]
+        with svc.bulk():
+            svc.update(created[0]["id"], {"name": "Renamed"})
+        svc.delete("a")
+        assert svc.get(created[0]["id"])["name"] == "Renamed"
+        assert writes == []
+
+    assert writes == [1]
+    names = [s["name"] for s in json.loads(path.read_text())]
+    assert names == ["Beta", "Gamma", "Renamed", "S1", "S2", "S3", "S4"]
+
+
+def test_failed_write_keeps_previous_file(skills_svc, monkeypatch):
+    svc, path = skills_svc
+    before = path.read_bytes()
+
+    def boom(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("app.utils.file_utils.os.replace", boom)
+    with pytest.raises(OSError):
+        svc.create({"name": "Lost", "description": ""})
+
+    assert path.read_bytes() == before
+    assert [p.name for p in path.parent.iterdir()] == ["skills.json"]
+    assert [s["id"] for s in svc.list()] == ["a", "b", "c"]
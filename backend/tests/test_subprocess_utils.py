@@ -0,0 +1,105 @@
+"""Tests for the subprocess helpers – timed-out children are killed and reaped."""
+
+import asyncio
+import signal
+import time
+from pathlib import Path
+
+import pytest
+
+from app.utils.subprocess_utils import communicate_or_kill, run_in_thread
+
+
+def _live_group_members(pgid: int) -> list:
+    """PIDs in process group *pgid* that are not zombies (Linux /proc)."""
+    live = []
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            # "pid (comm) state ppid pgrp ..." – comm may contain spaces
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[2]) == pgid and fields[0] != "Z":
+            live.append(int(stat.parent.name))
+    return live
+
+
+@pytest.mark.skipif(not Path("/proc/self/stat").exists(), reason="needs /proc")
+@pytest.mark.asyncio
+async def test_timeout_kills_whole_process_group():
+    proc = await asyncio.create_subprocess_exec(
+        "sh",
+        "-c",
+        "sleep 30 & sleep 30",
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+    )
+    started = time.monotonic()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await communicate_or_kill(proc, timeout=0.2)
+
+    assert proc.returncode == -signal.SIGKILL
+    assert time.monotonic() - started < 5
+    # The backgrounded grandchild went down with the group
+    await asyncio.sleep(0.1)
+    assert _live_group_members(proc.pid) == []
+
+
+@pytest.mark.asyncio
+async def test_returns_output_when_process_finishes():
+    proc = await asyncio.create_subprocess_exec(
+        "sh",
+        "-c",
+        "echo out; echo err >&2",
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+    )
+    assert await communicate_or_kill(proc, timeout=5) == (b"out\n", b"err\n")
+
+
+@pytest.mark.asyncio
+async def test_parse_output_moves_large_output_to_a_thread():
+    import threading
+
+    from app.utils.subprocess_utils import PARSE_IN_THREAD_MIN, parse_output
+
+    def _parse(text):
+        return threading.current_thread() is threading.main_thread(), len(text)
+
+    assert await parse_output(_parse, "a,b") == (True, 3)
+    big = "x" * (PARSE_IN_THREAD_MIN + 1)
+    assert await parse_output(_parse, big) == (False, len(big))
+
+
+@pytest.mark.skipif(not Path("/proc/self/stat").exists(), reason="needs /proc")
+@pytest.mark.asyncio
+async def test_run_in_thread_kills_group_on_timeout_and_cancel(tmp_path):
+    pid_file = tmp_path / "pid"
+    # The backgrounded grandchild's pid is what must not survive
+    args = ["sh", "-c", f"sleep 30 & echo $! > {pid_file}; sleep 30"]
+
+    def grandchild_alive() -> bool:
+        stat = Path(f"/proc/{pid_file.read_text().strip()}/stat")
+        try:
+            return stat.read_text().rsplit(")", 1)[1].split()[0] != "Z"
+        except OSError:
+            return False
+
+    started = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        await run_in_thread(args, timeout=0.3)
+    await asyncio.sleep(0.1)
+    assert not grandchild_alive()
+
+    pid_file.unlink()
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(run_in_thread(args, timeout=30), 0.3)
+    await asyncio.sleep(0.2)
+    assert not grandchild_alive()
+    assert time.monotonic() - started < 5
+
+    proc = await run_in_thread(["sh", "-c", "echo out; exit 3"], timeout=5)
+    assert (proc.returncode, proc.stdout) == (3, b"out\n")
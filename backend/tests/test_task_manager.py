@@ -0,0 +1,118 @@
+"""Tests for TaskManager task lifecycle and bookkeeping."""
+
+import asyncio
+
+import pytest
+
+from app.services import task_manager as mod
+from app.services.task_manager import (
+    STATUS_CANCELLED,
+    STATUS_COMPLETED,
+    STATUS_FAILED,
+    TaskManager,
+)
+
+
+async def _value(v):
+    return v
+
+
+async def _fail():
+    raise ValueError("boom")
+
+
+@pytest.mark.asyncio
+async def test_finished_tasks_retired_and_capped(monkeypatch):
+    monkeypatch.setattr(mod, "MAX_COMPLETED_TASKS", 2)
+    tm = TaskManager()
+
+    ids = [await tm.create_task(f"t{i}", "test", _value(i)) for i in range(3)]
+    failed = await tm.create_task("bad", "test", _fail())
+    await asyncio.sleep(0.01)
+
+    assert tm._tasks == {}
+    assert list(tm._completed) == [ids[2], failed]
+    assert tm.get_status(ids[0]) is None
+    assert tm.get_status(ids[2])["status"] == STATUS_COMPLETED
+    assert tm.get_status(failed)["status"] == STATUS_FAILED
+    assert [t["name"] for t in tm.list_tasks()] == ["t2", "bad"]
+    assert tm.cleanup_completed() == 2
+    assert tm.list_tasks() == []
+
+
+@pytest.mark.asyncio
+async def test_running_and_cancelled_tasks():
+    tm = TaskManager()
+    gate = asyncio.Event()
+    running = await tm.create_task("wait", "test", gate.wait())
+    unstarted = await tm.create_task("never", "test", gate.wait())
+    tm._tasks[unstarted]._asyncio_task.cancel()
+    await asyncio.sleep(0.01)
+
+    assert [t["name"] for t in tm.list_tasks()] == ["never", "wait"]
+    assert tm.get_status(unstarted)["status"] == STATUS_CANCELLED
+    assert await tm.cancel_task(running)
+    assert tm.get_status(running)["status"] == STATUS_CANCELLED
+    assert not await tm.cancel_task(running)
+
+
+@pytest.mark.asyncio
+async def test_progress_broadcasts_coalesced(monkeypatch):
+    monkeypatch.setattr(mod, "PROGRESS_BROADCAST_DELAY_S", 0.01)
+    tm = TaskManager()
+    sent = []
+
+    async def broadcast(msg):
+        task = msg["task"]
+        sent.append((task["status"], task["progress"]))
+
+    tm.set_broadcast(broadcast)
+    gate = asyncio.Event()
+    task_id = await tm.create_task("work", "test", gate.wait())
+    await asyncio.sleep(0)
+    for p in range(1, 51):
+        await tm.update_progress(task_id, p)
+    await asyncio.sleep(0.05)
+    await tm.update_progress(task_id, 60)
+    gate.set()
+    await asyncio.sleep(0.05)
+
+    # running, one coalesced progress flush, then the final state (the
+    # pending 60% update is dropped in favour of it)
+    assert sent == [("running", 0), ("running", 50), (STATUS_COMPLETED, 100)]
+
+
+def test_now_reuses_string_within_a_millisecond(monkeypatch):
+    clock = [1_700_000_000_000_000_000]
+    monkeypatch.setattr(mod.time, "time_ns", lambda: clock[0])
+    monkeypatch.setattr(mod, "_last_now", (0, ""))
+
+    first = mod._now()
+    assert first == "2023-11-14T22:13:20+00:00"
+    clock[0] += 999_999
+    assert mod._now() is first
+    clock[0] += 1
+    assert mod._now() == "2023-11-14T22:13:20.001000+00:00"
+
+
+@pytest.mark.asyncio
+async def test_task_dicts_reused_until_record_changes():
+    tm = TaskManager()
+    gate = asyncio.Event()
+
+    async def _wait():
+        await gate.wait()
+
+    task_id = await tm.create_task("t", "test", _wait())
+    await asyncio.sleep(0)
+    first = tm.get_status(task_id)
+    assert tm.list_tasks() == [first] and tm.list_tasks()[0] is first
+
+    await tm.update_progress(task_id, 40, "halfway")
+    second = tm.get_status(task_id)
+    assert second is not first
+    assert (second["progress"], second["message"]) == (40, "halfway")
+
+    gate.set()
+    await asyncio.sleep(0.01)
+    assert tm.get_status(task_id)["status"] == STATUS_COMPLETED
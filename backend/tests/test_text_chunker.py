@@ -0,0 +1,22 @@
+"""Tests for chunk_text boundaries and overlap."""
+
+from app.utils.text_chunker import chunk_text
+
+
+def test_chunks_fit_size_and_repeat_overlap_tail():
+    text = "aaa bbb\n\nccc   ddd eee\tfff"
+
+    assert chunk_text(text, chunk_size=12, overlap=4) == [
+        "aaa bbb ccc",
+        "ccc ddd eee",
+        "eee fff",
+    ]
+    assert chunk_text(text, chunk_size=12, overlap=0) == ["aaa bbb ccc", "ddd eee fff"]
+    assert chunk_text(text, chunk_size=100) == ["aaa bbb ccc ddd eee fff"]
+
+
+def test_oversized_words_and_blank_text():
+    assert chunk_text("   \n ") == []
+    assert chunk_text("x" * 20 + " y", chunk_size=5, overlap=3) == ["x" * 20, "y"]
+    # An overlap as large as the chunk still makes progress
+    assert chunk_text("a b c", chunk_size=4, overlap=10) == ["a b", "a b c"]
@@ -117,3 +117,16 @@ class TestTrimMessagesToFit:
         # Last 4 should always be there
         assert "message number 9" in result[-1]["content"]
         assert "message number 6" in result[-4]["content"]
+
+    def test_keeps_system_messages_in_place(self):
+        msgs = [
+            {"role": "system", "content": "Prompt"},
+            {"role": "user", "content": "A" * 300},
+            {"role": "assistant", "content": "B" * 300},
+            {"role": "user", "content": "C"},
+            {"role": "system", "content": "Context"},
+            {"role": "user", "content": "D"},
+        ]
+        result, trimmed = trim_messages_to_fit(msgs, max_tokens=50, preserve_last_n=2)
+        assert trimmed is True
+        assert [m["content"] for m in result] == ["Prompt", "C", "Context", "D"]
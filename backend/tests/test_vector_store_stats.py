@@ -1,9 +1,13 @@
 """Tests for VectorStoreService.get_stats() – sampling and detailed/lightweight modes."""
 
+import os
+from array import array
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 
+from app.services import vector_store_service as mod
 from app.services.vector_store_service import VectorStoreService
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
@@ -14,7 +18,10 @@ def _make_service(count: int, metadatas: list) -> VectorStoreService:
     svc = VectorStoreService.__new__(VectorStoreService)
     col = MagicMock()
     col.count.return_value = count
-    col.get.return_value = {"metadatas": metadatas}
+    col.get.return_value = {
+        "ids": [f"c{i}" for i in range(len(metadatas))],
+        "metadatas": metadatas,
+    }
     svc.collection = col
     return svc
 
@@ -91,3 +98,142 @@ def test_stats_endpoint_detailed_false(client, monkeypatch):
     assert data["total_chunks"] == 7
     assert data["detailed"] is False
     mock_vs.get_stats.assert_called_once_with(detailed=False)
+
+
+def test_get_stats_detailed_empty_collection_skips_fetch():
+    svc = _make_service(count=0, metadatas=[])
+
+    result = svc.get_stats(detailed=True)
+
+    assert result["total_documents"] == 0
+    assert result["file_types"] == {}
+    svc.collection.get.assert_not_called()
+
+
+def test_get_stats_file_types_counted_per_chunk():
+    metadatas = [
+        {"file_path": "/a/x.PDF"},
+        {"file_path": "/a/x.PDF"},
+        {"file_path": "/b/y.pdf"},
+        {"file_path": "/b/README"},
+        {},
+    ]
+    svc = _make_service(count=5, metadatas=metadatas)
+
+    result = svc.get_stats(detailed=True)
+
+    assert result["file_types"] == {".pdf": 3, "unknown": 2}
+    assert result["top_sources"][0] == {"path": "/a/x.PDF", "chunks": 2}
+
+
+def test_get_storage_usage_walks_tree(tmp_path, monkeypatch):
+    monkeypatch.setattr(mod, "CHROMA_DIR", tmp_path)
+    assert mod.get_storage_usage() == (0.0, None)
+
+    (tmp_path / "seg").mkdir()
+    (tmp_path / "chroma.sqlite3").write_bytes(b"x" * 1024 * 1024)
+    (tmp_path / "seg" / "data.bin").write_bytes(b"x" * 512 * 1024)
+    os.utime(tmp_path / "seg" / "data.bin", (0, 86400))
+    (tmp_path / "link").symlink_to(tmp_path / "seg")
+
+    # Cached until the TTL expires or a write invalidates it
+    assert mod.get_storage_usage() == (0.0, None)
+    mod.invalidate_storage_usage()
+    assert mod.get_storage_usage() == (1.5, "1970-01-02T00:00:00+00:00")
+
+    monkeypatch.setattr(mod, "CHROMA_DIR", tmp_path / "missing")
+    assert mod.get_storage_usage() == (0.0, None)
+
+
+@pytest.mark.asyncio
+async def test_metadata_snapshot_shared_by_lookups_deletes_and_stats():
+    svc = _make_service(count=3, metadatas=[])
+    svc.collection.get.return_value = {
+        "ids": ["a0", "a1", "b0"],
+        "metadatas": [{"file_path": "/a"}, {"file_path": "/a"}, {"file_path": "/b"}],
+    }
+
+    assert await svc.delete_by_file_path("/a") == 2
+    svc.collection.delete.assert_called_once_with(ids=["a0", "a1"])
+    assert await svc.delete_by_file_path("/a") == 0
+
+    await svc.add_documents(["c0"], [[0.1]], ["doc"], [{"file_path": "/c"}])
+    assert svc.get_file_metadata("/c") == {"file_path": "/c"}
+    assert svc.get_file_metadata("/missing") is None
+    assert svc.get_indexed_files() == {
+        "/b": {"file_path": "/b"},
+        "/c": {"file_path": "/c"},
+    }
+    stats = svc.get_stats(detailed=True)
+    assert stats["top_sources"] == [
+        {"path": "/b", "chunks": 1},
+        {"path": "/c", "chunks": 1},
+    ]
+    # One metadata scan built the snapshot; later writes updated it in place
+    svc.collection.get.assert_called_once_with(include=["metadatas"])
+
+    # A write that does not maintain the snapshot drops it
+    await svc._safe_write(svc.collection.delete, ids=["b0"])
+    assert svc._snapshot is None
+
+
+@pytest.mark.asyncio
+async def test_delete_includes_chunks_added_while_waiting_for_lock():
+    import asyncio
+
+    svc = _make_service(count=2, metadatas=[{"file_path": "/a"}] * 2)
+    assert list(svc.get_indexed_files()) == ["/a"]
+
+    lock = mod.get_vector_write_lock()
+    async with lock:
+        add = asyncio.create_task(
+            svc.add_documents(["c2"], [[0.1]], ["doc"], [{"file_path": "/a"}])
+        )
+        await asyncio.sleep(0)
+        delete = asyncio.create_task(svc.delete_by_file_path("/a"))
+        await asyncio.sleep(0)
+    await add
+
+    assert await delete == 3
+    svc.collection.delete.assert_called_once_with(ids=["c0", "c1", "c2"])
+    assert svc.get_indexed_files() == {}
+
+
+def test_sanitize_metadata_returns_clean_dicts_unchanged():
+    clean = {"file_path": "/a", "chunk": 1, "score": 0.5, "ok": True}
+    assert mod._sanitize_metadata(clean) is clean
+
+    assert mod._sanitize_metadata(
+        {"tags": ["a", "b"], "missing": None, "path": Path("/x"), "n": 2}
+    ) == {"tags": "a, b", "missing": "", "path": "/x", "n": 2}
+
+
+@pytest.mark.asyncio
+async def test_delete_by_file_path_deletes_in_batches(monkeypatch):
+    monkeypatch.setattr(mod, "_DELETE_BATCH", 2)
+    ids = [f"c{i}" for i in range(5)]
+    svc = _make_service(count=5, metadatas=[{"file_path": "/a"}] * 5)
+
+    assert await svc.delete_by_file_path("/a") == 5
+    assert [c.kwargs["ids"] for c in svc.collection.delete.call_args_list] == [
+        ids[0:2],
+        ids[2:4],
+        ids[4:5],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_packed_embeddings_unpacked_at_chroma_boundary():
+    svc = _make_service(count=1, metadatas=[])
+    svc.collection.query.return_value = {"ids": [[]]}
+
+    await svc.add_documents(
+        ["c0", "c1"], [array("f", [0.5, 0.25]), [1.0, 2.0]], ["a", "b"], [{}, {}]
+    )
+    svc.search(array("f", [0.5]), top_k=1)
+
+    assert svc.collection.add.call_args.kwargs["embeddings"] == [
+        [0.5, 0.25],
+        [1.0, 2.0],
+    ]
+    assert svc.collection.query.call_args.kwargs["query_embeddings"] == [[0.5]]
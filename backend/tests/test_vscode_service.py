@@ -0,0 +1,197 @@
+"""Tests for VSCodeService configuration and CLI helpers."""
+
+import asyncio
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services import vscode_service as mod
+from app.services.vscode_service import VSCodeService
+
+
+def _service(cfg) -> VSCodeService:
+    settings = MagicMock()
+    settings.version = (0, 1)
+    settings.get_integration_config.return_value = cfg
+    svc = VSCodeService()
+    svc._settings = settings
+    return svc
+
+
+def test_config_reloaded_only_when_settings_version_changes():
+    svc = _service({"binary_path": "/opt/code", "projects": {"p": {"path": "/p"}}})
+    settings = svc._settings
+
+    assert svc._binary() == "/opt/code"
+    assert svc._project("p") == {"path": "/p"}
+    projects = svc.list_projects()
+    projects["p"]["path"] = "mutated"
+    assert svc._project("p") == {"path": "/p"}
+    assert settings.get_integration_config.call_count == 1
+
+    settings.version = (1, 1)
+    settings.get_integration_config.return_value = {}
+    assert svc._binary() == "code"
+    assert svc.list_projects() == {}
+    assert settings.get_integration_config.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_project_targets_precomputed_with_config(tmp_path):
+    log = tmp_path / "calls"
+    code = _fake_code(tmp_path, f'echo "$@" >> {log}')
+    projects = {
+        "ws": {"path": "/src/ws", "workspace": "/src/ws/x.code-workspace"},
+        "plain": {"path": "/src/plain"},
+    }
+    svc = _service({"binary_path": code, "projects": projects})
+
+    assert svc._targets("plain") == ("/src/plain", "file:///src/plain")
+    await svc.open_project("ws")
+    await svc.run_task("plain", "build")
+    assert log.read_text().splitlines() == [
+        "/src/ws/x.code-workspace",
+        "--folder-uri file:///src/plain --run-task build",
+    ]
+    assert await svc.run_action("open_project", {"project_key": "nope"}) == {
+        "status": "error",
+        "detail": "Unknown project: nope",
+    }
+
+
+@pytest.mark.asyncio
+async def test_open_files_uses_one_cli_call(tmp_path):
+    log = tmp_path / "calls"
+    svc = _service({"binary_path": _fake_code(tmp_path, f'echo "$@" >> {log}')})
+
+    result = await svc.run_action(
+        "open_files",
+        {"files": [{"file_path": "/a.py", "line": 3}, {"file_path": "/b.py"}]},
+    )
+
+    assert result == {"status": "ok", "detail": "Opened 2 files"}
+    assert log.read_text().splitlines() == ["--goto /a.py:3 /b.py"]
+    assert (await svc.run_action("open_files", {"files": []}))["status"] == "error"
+
+
+def _fake_code(bin_dir: Path, body: str) -> str:
+    script = bin_dir / "code"
+    script.write_text(f"#!/bin/sh\n{body}\n")
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    return str(script)
+
+
+@pytest.mark.asyncio
+async def test_run_returns_stdout_and_kills_cli_on_timeout(tmp_path, monkeypatch):
+    svc = _service({"binary_path": _fake_code(tmp_path, 'echo "v $1"; exec sleep 60')})
+    monkeypatch.setattr(mod, "CLI_TIMEOUT_S", 0.5)
+
+    started = time.monotonic()
+    result = await svc.run_action("list_extensions", {})
+    assert result == {"status": "error", "detail": "VS Code CLI timed out"}
+    assert time.monotonic() - started < 5
+
+    svc = _service({"binary_path": _fake_code(tmp_path, 'echo "v $1"')})
+    assert await svc.run_action("version", {}) == {
+        "status": "ok",
+        "data": {"version": "v --version"},
+    }
+
+
+@pytest.mark.asyncio
+async def test_extension_list_reused_until_install_or_ttl(tmp_path, monkeypatch):
+    log = tmp_path / "calls"
+    code = _fake_code(tmp_path, f'echo "$1" >> {log}; echo a.ext; echo b.ext')
+    svc = _service({"binary_path": code})
+
+    assert await svc.list_extensions() == ["a.ext", "b.ext"]
+    assert await svc.list_extensions() == ["a.ext", "b.ext"]
+    await svc.install_extension("c.ext")
+    await svc.list_extensions()
+    monkeypatch.setattr(mod, "EXTENSIONS_TTL_S", 0.0)
+    await svc.list_extensions()
+
+    assert log.read_text().split() == [
+        "--list-extensions",
+        "--install-extension",
+        "--list-extensions",
+        "--list-extensions",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_fire_and_forget_actions_discard_stdout(tmp_path, monkeypatch):
+    svc = _service({"binary_path": _fake_code(tmp_path, "echo noise")})
+    calls = []
+    real_run = mod.run_in_thread
+
+    async def spy(*args, **kwargs):
+        proc = await real_run(*args, **kwargs)
+        calls.append(proc.stdout)
+        return proc
+
+    monkeypatch.setattr(mod, "run_in_thread", spy)
+
+    assert await svc.open_folder(str(tmp_path)) == f"Opened folder: {tmp_path}"
+    assert await svc.list_extensions() == ["noise"]
+    assert calls == [None, b"noise\n"]
+
+
+@pytest.mark.asyncio
+async def test_diagnostics_lists_present_output_files(tmp_path):
+    (tmp_path / "test-results.xml").write_text("")
+    (tmp_path / "lint-results.json").write_text("{}")
+    svc = _service(
+        {"projects": {"p": {"path": str(tmp_path)}, "gone": {"path": "/nope"}}}
+    )
+
+    result = await svc.get_diagnostics("p")
+    assert result["diagnostic_files"] == [
+        str(tmp_path / "lint-results.json"),
+        str(tmp_path / "test-results.xml"),
+    ]
+    assert (await svc.get_diagnostics("gone"))["diagnostic_files"] == []
+    assert (await svc.get_diagnostics("missing"))["status"] == "error"
+
+
+@pytest.mark.asyncio
+async def test_version_cached_for_ttl(tmp_path, monkeypatch):
+    log = tmp_path / "calls"
+    code = _fake_code(tmp_path, f'echo "$1" >> {log}; echo 1.90.0')
+    svc = _service({"binary_path": code})
+
+    versions = await asyncio.gather(*(svc.get_version() for _ in range(3)))
+    assert versions == ["1.90.0"] * 3
+    assert log.read_text().split() == ["--version"]
+
+    monkeypatch.setattr(mod, "VERSION_TTL_S", 0)
+    await svc.get_version()
+    assert log.read_text().split() == ["--version", "--version"]
+
+
+def test_concurrent_first_calls_share_one_instance(monkeypatch):
+    monkeypatch.setattr(mod, "_vscode_service", None)
+    built = []
+    barrier = threading.Barrier(8)
+
+    class SlowService(VSCodeService):
+        def __init__(self):
+            built.append(self)
+            time.sleep(0.05)
+
+    monkeypatch.setattr(mod, "VSCodeService", SlowService)
+
+    def first_call():
+        barrier.wait()
+        return mod.get_vscode_service()
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: first_call(), range(8)))
+
+    assert len(built) == 1
+    assert all(r is built[0] for r in results)
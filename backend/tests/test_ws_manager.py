@@ -0,0 +1,154 @@
+"""Tests for the WebSocket ConnectionManager broadcast encoding."""
+
+import asyncio
+import base64
+import json
+from array import array
+from unittest.mock import AsyncMock, MagicMock
+
+import msgpack
+import pytest
+
+from app.services import ws_manager as mod
+from app.services.ws_manager import ConnectionManager, WS_SUBPROTOCOL_MSGPACK
+
+
+def _fake_ws(subprotocols=None) -> MagicMock:
+    ws = MagicMock()
+    ws.scope = {"subprotocols": subprotocols or []}
+    ws.accept = AsyncMock()
+    ws.send_text = AsyncMock()
+    ws.send_bytes = AsyncMock()
+    ws.send_json = AsyncMock()
+    return ws
+
+
+@pytest.mark.asyncio
+async def test_msgpack_subprotocol_is_negotiated():
+    mgr = ConnectionManager()
+    ws = _fake_ws([WS_SUBPROTOCOL_MSGPACK])
+
+    await mgr.connect(ws)
+
+    ws.accept.assert_awaited_once_with(subprotocol=WS_SUBPROTOCOL_MSGPACK)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_sends_msgpack_to_binary_and_json_to_text_clients():
+    mgr = ConnectionManager()
+    text_ws = _fake_ws()
+    bin_ws = _fake_ws([WS_SUBPROTOCOL_MSGPACK])
+    await mgr.connect(text_ws)
+    await mgr.connect(bin_ws)
+
+    message = {"type": "agent_update", "agent": {"agent_id": "a1", "progress": 50}}
+    await mgr.broadcast(message)
+
+    assert json.loads(text_ws.send_text.await_args.args[0]) == message
+    assert msgpack.unpackb(bin_ws.send_bytes.await_args.args[0]) == message
+    text_ws.send_bytes.assert_not_awaited()
+    bin_ws.send_text.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_failed_client_is_pruned_after_broadcast():
+    mgr = ConnectionManager()
+    ok_ws = _fake_ws()
+    dead_ws = _fake_ws([WS_SUBPROTOCOL_MSGPACK])
+    dead_ws.send_bytes.side_effect = RuntimeError("closed")
+    await mgr.connect(ok_ws)
+    await mgr.connect(dead_ws)
+
+    await mgr.broadcast({"type": "ping"})
+
+    assert mgr.connection_count == 1
+
+
+@pytest.mark.asyncio
+async def test_all_failed_clients_pruned_in_one_pass(monkeypatch):
+    mgr = ConnectionManager()
+    clients = [_fake_ws() for _ in range(4)]
+    for ws in clients:
+        await mgr.connect(ws)
+    for ws in clients[1:]:
+        ws.send_text.side_effect = RuntimeError("closed")
+    drops = []
+    real_drop = mgr._drop
+    monkeypatch.setattr(
+        mgr, "_drop", lambda dead: drops.append(dead) or real_drop(dead)
+    )
+
+    await mgr.broadcast({"type": "ping"})
+    await mgr.broadcast({"type": "ping"})
+
+    assert [set(d) for d in drops] == [set(clients[1:])]
+    assert mgr.connection_count == 1
+    assert clients[0].send_text.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_json_encoded_once_per_broadcast_and_for_send_to():
+    mgr = ConnectionManager()
+    clients = [_fake_ws() for _ in range(3)]
+    for ws in clients:
+        await mgr.connect(ws)
+
+    await mgr.broadcast({"type": "t", "counts": {1: "č"}})
+    frames = [ws.send_text.await_args.args[0] for ws in clients]
+    assert frames[0] is frames[1] is frames[2]
+    assert json.loads(frames[0]) == {"type": "t", "counts": {"1": "č"}}
+
+    await mgr.send_to(clients[0], {"type": "pong"})
+    assert json.loads(clients[0].send_text.await_args.args[0]) == {"type": "pong"}
+    clients[0].send_json.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_broadcast_binary_keeps_payload_raw_for_msgpack_clients():
+    mgr = ConnectionManager()
+    text_ws = _fake_ws()
+    bin_ws = _fake_ws([WS_SUBPROTOCOL_MSGPACK])
+    await mgr.connect(text_ws)
+    await mgr.connect(bin_ws)
+    payload = array("f", [0.5, -1.0]).tobytes()
+
+    await mgr.broadcast_binary({"type": "activations", "dtype": "float32"}, payload)
+
+    assert msgpack.unpackb(bin_ws.send_bytes.await_args.args[0]) == {
+        "type": "activations",
+        "dtype": "float32",
+        "data": payload,
+    }
+    sent = json.loads(text_ws.send_text.await_args.args[0])
+    assert base64.b64decode(sent.pop("data")) == payload
+    assert sent == {"type": "activations", "dtype": "float32"}
+
+    # Buffers are sent as-is, without a tobytes() copy by the caller
+    await mgr.broadcast_binary({"type": "a"}, array("f", [0.5, -1.0]))
+    assert msgpack.unpackb(bin_ws.send_bytes.await_args.args[0])["data"] == payload
+    sent = json.loads(text_ws.send_text.await_args.args[0])
+    assert base64.b64decode(sent["data"]) == payload
+
+
+@pytest.mark.asyncio
+async def test_coalesced_messages_share_one_frame_and_keep_order():
+    mgr = ConnectionManager()
+    ws = _fake_ws()
+    await mgr.connect(ws)
+
+    mgr.broadcast_coalesced({"type": "p", "n": 1})
+    mgr.broadcast_coalesced({"type": "p", "n": 2})
+    await asyncio.sleep(mod.WS_COALESCE_WINDOW_S * 5)
+    assert ws.send_text.await_count == 1
+    assert json.loads(ws.send_text.await_args.args[0]) == {
+        "type": mod.WS_EVENT_BATCH,
+        "messages": [{"type": "p", "n": 1}, {"type": "p", "n": 2}],
+    }
+
+    # A lone message goes out as itself; a direct broadcast flushes it first
+    mgr.broadcast_coalesced({"type": "p", "n": 3})
+    await mgr.broadcast({"type": "done"})
+    frames = [json.loads(c.args[0]) for c in ws.send_text.await_args_list[1:]]
+    assert frames == [{"type": "p", "n": 3}, {"type": "done"}]
+    await asyncio.sleep(mod.WS_COALESCE_WINDOW_S * 5)
+    assert ws.send_text.await_count == 3
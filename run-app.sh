@@ -160,11 +160,11 @@ cd "$BACKEND_DIR"
 if [[ "$MODE" == "dev" ]]; then
     info "Starting app in DEV mode (hot-reload)…"
     uvicorn app.main:app --reload --host 0.0.0.0 --port "$APP_PORT" \
-        --workers 1 >> "$LOG_FILE" 2>&1 &
+        --workers 1 --loop uvloop >> "$LOG_FILE" 2>&1 &
 else
     info "Starting app in PROD mode…"
     uvicorn app.main:app --host 0.0.0.0 --port "$APP_PORT" \
-        --workers 1 >> "$LOG_FILE" 2>&1 &
+        --workers 1 --loop uvloop >> "$LOG_FILE" 2>&1 &
 fi
 APP_PID=$!
 ok "App started (PID $APP_PID)"